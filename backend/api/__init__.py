@@ -1,22 +1,43 @@
 """
 This module implements the functions to handle routes of /api
 """
+from api.admin import admin
+from api.cache import make_etag, not_modified, with_etag
+from api.export import export_response
 from api.form import form
+from api.query import ItemQuery
+from api.stream import parse_int_arg, negotiate_format, negotiate_encoding, stream_items, stream_headers, FORMATS
+from collections import deque
 from datetime import datetime, timedelta
 from flask import Blueprint, Response, request, current_app
 import json
 import os
 from pathlib import Path
 import random
-import time
 import traceback
-from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound
+
+# Local Imports:
+from data import LogStore
+from similarity import RecordIndex
+
+
+
+"""
+Setup Stores
+"""
+log_store = LogStore("logs.jsonl")
+record_store = LogStore("records.jsonl")
+record_index = RecordIndex(record_store) # similar records, follows the record store
 
 
 
 """
 Helper Functions
 """
+MAX_TAIL_WAIT = 30 # longest time a live tail request is held open (seconds)
+MAX_SIMILAR = 50 # most similar records returned at once
+
 def my_traceback(exception: Exception) -> str:
     """
     Formats a traceback to only include frames whose file paths are within the specified project root directory.
@@ -55,28 +76,101 @@ def my_traceback(exception: Exception) -> str:
 
 def generate_logs(num_items=20, with_solution=False):
     """
-    A generator that yields JSON Line strings with a delay.
+    A generator that yields log items as dictionaries. Serialization, batching and compression
+    is done by the caller (see api.stream).
     """
     START_DATE = datetime(2025, 10, 25)
     END_DATE = datetime(2025, 10, 31)
     TIME_RANGE_SECONDS = int((END_DATE - START_DATE).total_seconds())
+    CATEGORIES = ["Critical","Error","Warning","Info","Debug"]
+    SOURCES = ["Thirsty-Wombat","Jumpy-Giraffe","Sleepy-Koala"]
+    MESSAGES = ["User 'alice' attempted to access restricted resource /admin/settings.", "Database connection pool initialized successfully with 10 connections.", "Failed to serialize response object for container 'zealous-pony': null value found in required field 'name'.", "Starting garbage collection cycle. Memory usage before: 128MB.", "System wide disk space usage exceeded 95%. Automated cleanup initiated.", "Mounted disk with 128MB."]
+    SOLUTIONS = ["Just pray at this point", "Try to restart the container", None]
 
     for idx in range(0, num_items):
         random_offset = random.randint(0, TIME_RANGE_SECONDS*1000)
-        log_item = {
+        yield {
             "id": str(idx),
             "timestamp": (START_DATE + timedelta(milliseconds=random_offset)).isoformat(),
-            "category": random.choice(["Critical","Error","Warning","Info","Debug"]),
-            "source": random.choice(["Thirsty-Wombat","Jumpy-Giraffe","Sleepy-Koala"]),
-            "message": random.choice(["User 'alice' attempted to access restricted resource /admin/settings.", "Database connection pool initialized successfully with 10 connections.", "Failed to serialize response object for container 'zealous-pony': null value found in required field 'name'.", "Starting garbage collection cycle. Memory usage before: 128MB.", "System wide disk space usage exceeded 95%. Automated cleanup initiated.", "Mounted disk with 128MB."]),
-            "solution": random.choice(["Just pray at this point", "Try to restart the container", None]) if with_solution else None
+            "category": random.choice(CATEGORIES),
+            "source": random.choice(SOURCES),
+            "message": random.choice(MESSAGES),
+            "solution": random.choice(SOLUTIONS) if with_solution else None
         }
-        json_line = json.dumps(log_item) + "\r\n"        
-        yield json_line.encode('utf-8') # yield the string (Flask sends this chunk immediately)
-        time.sleep(1/num_items)
-    
-    yield '\n' # send final LF character
 
+def stream_response(items) -> Response:
+    """
+    Creates a streamed response of the given items. The encoding is chosen by the 'format' query
+    parameter and the compression is negotiated with the 'Accept-Encoding' header.
+    """
+    fmt = negotiate_format(request.args)
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    chunks = stream_items(items, fmt, encoding)
+    return Response(chunks, mimetype=FORMATS[fmt], headers=stream_headers(fmt, encoding))
+
+def filtered_tail(store: LogStore, query: ItemQuery, num_items: int) -> list[dict]:
+    """
+    Returns the last num_items items of the store matching the query. The file is scanned line by
+    line and only the last matches are kept.
+    """
+    matches = deque(maxlen=num_items or None)
+    for line in store.scan():
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        if query.matches(item):
+            matches.append(item)
+    return list(matches)
+
+def store_response(store: LogStore, num_items: int, with_solution: bool = False) -> Response:
+    """
+    Streams the last num_items of the given store, optionally filtered (see ItemQuery). The
+    response carries an entity tag derived from the write generation of the store, so unchanged
+    result pages are answered with "304 Not Modified" without reading the store. As long as the
+    store is empty, generated demo items are streamed instead (without entity tag).
+    """
+    if store.is_empty():
+        return stream_response(generate_logs(num_items=num_items, with_solution=with_solution))
+    fmt = negotiate_format(request.args)
+    query = ItemQuery(request.args)
+    etag = make_etag(request.endpoint, store.generation, num_items, fmt, query.key)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    items = filtered_tail(store, query, num_items) if query else store.tail(num_items)
+    return with_etag(stream_response(items), etag)
+
+def tail_response(store: LogStore) -> Response:
+    """
+    Streams the items appended to the given store after the cursor given by the 'cursor' query
+    parameter (live tail). Without cursor, the last 'num' items are returned. With the 'wait'
+    parameter the request is held open until new items arrive or the given number of seconds
+    passed (long polling). The cursor for the next request is sent in the 'X-Cursor' header.
+    Items are served from the buffer of the store, without reading the file.
+    """
+    num_items = parse_int_arg(request.args, "num", default=40)
+    wait = min(parse_int_arg(request.args, "wait", default=0), MAX_TAIL_WAIT)
+    cursor = parse_int_arg(request.args, "cursor", default=0) if "cursor" in request.args else None
+    items, cursor = store.since(cursor, limit=num_items)
+    if not items and wait and store.buffer.wait(cursor, timeout=wait):
+        items, cursor = store.since(cursor, limit=num_items)
+    response = stream_response(items)
+    response.headers["X-Cursor"] = str(cursor)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def similar_response(text: str, exclude: str | None = None) -> Response:
+    """
+    Returns the records most similar to the given text as JSON list, each with its 'score' (0..1).
+    The number of records is given by the 'k' query parameter. The index is brought up to date
+    with the record store first (only new records are read).
+    """
+    k = min(parse_int_arg(request.args, "k", default=5, minimum=1), MAX_SIMILAR)
+    record_index.refresh()
+    similar = [{**record, "score": score} for score, record in record_index.query(text, k=k, exclude=exclude)]
+    return Response(json.dumps(similar), mimetype="application/json", headers={"Cache-Control": "no-cache"})
 
 
 """
@@ -85,6 +179,7 @@ Blueprint Endpoints
 # Register Blueprint Hierarchy:
 api = Blueprint("api", __name__, url_prefix="/api")
 api.register_blueprint(form, url_prefix="/form")
+api.register_blueprint(admin, url_prefix="/admin")
 
 @api.route("", methods=["GET"])
 def index():
@@ -93,17 +188,73 @@ def index():
 
 @api.route("/logs", methods=["GET"])
 def logs():
-    num_param = request.args.get("num")
-    if num_param is None:
-        num_param = 40
-    return Response(generate_logs(num_items=num_param), mimetype="application/json-lines")
+    num_param = parse_int_arg(request.args, "num", default=40)
+    return store_response(log_store, num_items=num_param)
 
 @api.route("/records", methods=["GET"])
 def records():
-    num_param = request.args.get("num")
-    if num_param is None:
-        num_param = 40
-    return Response(generate_logs(num_items=num_param, with_solution=True), mimetype="application/json-lines")
+    num_param = parse_int_arg(request.args, "num", default=40)
+    return store_response(record_store, num_items=num_param, with_solution=True)
+
+@api.route("/logs/export", methods=["GET"])
+def logs_export():
+    return export_response(log_store, "logs")
+
+@api.route("/records/export", methods=["GET"])
+def records_export():
+    return export_response(record_store, "records")
+
+@api.route("/records/similar", methods=["GET"])
+def records_similar():
+    message = request.args.get("message", "")
+    if not message.strip():
+        raise BadRequest("Query parameter 'message' is required.")
+    return similar_response(message, exclude=request.args.get("exclude"))
+
+@api.route("/records/<record_id>/similar", methods=["GET"])
+def record_similar(record_id: str):
+    record_index.refresh()
+    record = record_index.records.get(record_id)
+    if record is None:
+        raise NotFound(f"Record '{record_id}' does not exist.")
+    return similar_response(record.get("message") or "", exclude=record_id)
+
+@api.route("/logs/tail", methods=["GET"])
+def logs_tail():
+    return tail_response(log_store)
+
+@api.route("/records/tail", methods=["GET"])
+def records_tail():
+    return tail_response(record_store)
+
+@api.route("/buffer", methods=["GET"])
+def buffer_usage():
+    data = {"logs": log_store.buffer.memory_usage(), "records": record_store.buffer.memory_usage()}
+    return json.dumps(data), 200, {"Content-Type": "application/json"}
+
+@api.route("/scanner/stats", methods=["GET"])
+def scanner_stats():
+    from scanner import get_scanner # imported on demand, the web tier does not depend on it
+    return json.dumps(get_scanner().stats()), 200, {"Content-Type": "application/json"}
+
+@api.route("/scanner/timeline", methods=["GET"])
+def scanner_timeline():
+    from scanner import get_scanner
+    return json.dumps(get_scanner().timeline_stats()), 200, {"Content-Type": "application/json"}
+
+@api.route("/scanner/hosts", methods=["GET"])
+def scanner_hosts():
+    from scanner import get_scanner
+    try:
+        hosts = get_scanner().hosts()
+    except RuntimeWarning as e: # no Docker host configured
+        raise NotFound(str(e))
+    return json.dumps(hosts), 200, {"Content-Type": "application/json"}
+
+@api.route("/notifications/stats", methods=["GET"])
+def notification_stats():
+    from notify import get_notifier
+    return json.dumps(get_notifier().stats()), 200, {"Content-Type": "application/json"}
 
 @api.errorhandler(Exception)
 def error(e: Exception):
@@ -0,0 +1,70 @@
+"""
+This module implements the functions to handle routes of /admin. The profiling endpoints expose
+stack traces and memory snapshots of the process, they are disabled unless the setting
+admin.profiling is true.
+"""
+# System Imports:
+from flask import Blueprint, Response, request
+import json
+from werkzeug.exceptions import BadRequest, Conflict, Forbidden, NotFound
+
+# Local Imports:
+from data import get_settings
+from profiling import get_profiler
+
+
+"""
+Helper Functions
+"""
+def download(data: bytes | str | None, filename: str, mimetype: str) -> Response:
+    """
+    Returns the given data as file download, raises NotFound if there is no data (yet)
+    """
+    if data is None:
+        raise NotFound(f"No results for '{filename}'. Arm the profiler and wait for the session to finish.")
+    return Response(data, mimetype=mimetype, headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+
+"""
+Blueprint Endpoints
+"""
+# Register Blueprint Hierarchy:
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+@admin.before_request
+def check_profiling_enabled():
+    # [INFO] Checked on every request, so the endpoints can be switched off without a restart.
+    if not get_settings().admin_profiling():
+        raise Forbidden("Profiling is disabled. Enable it with the setting admin.profiling.")
+
+@admin.route("/profile", methods=["GET", "POST", "DELETE"])
+def profile():
+    profiler = get_profiler()
+    if request.method == "POST": # arm the profiler for the next cycles
+        payload = request.get_json(silent=True) or {}
+        cycles = payload.get("cycles", 10)
+        if not isinstance(cycles, int) or isinstance(cycles, bool) or cycles < 1:
+            raise BadRequest(f"Parameter 'cycles' has to be a positive integer. It is {cycles}.")
+        try:
+            status = profiler.arm(cycles, cpu=bool(payload.get("cpu", True)), memory=bool(payload.get("memory", False)))
+        except RuntimeError as e:
+            raise Conflict(str(e))
+        return json.dumps(status), 202, {"Content-Type": "application/json"}
+    if request.method == "DELETE": # end the session early
+        profiler.disarm()
+    return json.dumps(profiler.status()), 200, {"Content-Type": "application/json"}
+
+@admin.route("/profile/pstats", methods=["GET"])
+def profile_pstats():
+    return download(get_profiler().pstats_data(), "scan.pstats", "application/octet-stream")
+
+@admin.route("/profile/flamegraph", methods=["GET"])
+def profile_flamegraph():
+    return download(get_profiler().folded_stacks(), "scan.folded", "text/plain")
+
+@admin.route("/profile/memory", methods=["GET"])
+def profile_memory():
+    profiler = get_profiler()
+    if request.args.get("format") == "snapshot":
+        return download(profiler.memory_snapshot(), "scan.tracemalloc", "application/octet-stream")
+    return download(profiler.memory_report(), "scan-memory.txt", "text/plain")
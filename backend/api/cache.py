@@ -0,0 +1,80 @@
+"""
+This module implements helpers for conditional GET requests (ETag / If-None-Match)
+"""
+# System Imports:
+from functools import wraps
+import time
+from typing import Callable
+from flask import Response, request
+
+
+"""
+Constants
+"""
+# ETags only depend on in-memory revision counters. The boot id makes sure clients do not
+# reuse validators issued by a previous run of the server (counters restart at 0).
+BOOT_ID = format(time.time_ns(), "x")
+
+
+"""
+Helper Functions
+"""
+def make_etag(*parts) -> str:
+    """
+    Builds an (unquoted) entity tag from the given parts and the boot id of this server
+    """
+    return "-".join([BOOT_ID, *(str(part) for part in parts)])
+
+def not_modified(etag: str) -> Response | None:
+    """
+    Checks the 'If-None-Match' header of the current request against the given entity tag
+
+    Returns:
+        Response | None: a "304 Not Modified" response if the client is up to date, None otherwise
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+def with_etag(response: Response, etag: str) -> Response:
+    """
+    Attaches the given entity tag to the response
+    """
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache" # always revalidate
+    return response
+
+def conditional(revision: Callable[[], object]):
+    """
+    Decorator for GET/POST endpoints returning a JSON string. GET requests are answered with an
+    entity tag derived from revision(). If the client already has this version, "304 Not Modified"
+    is returned without calling the endpoint. The body of the latest version is cached in memory,
+    so unchanged data is neither read from disk nor serialized again.
+
+    Args:
+        revision (callable): returns the current revision of the data behind the endpoint
+    """
+    def decorator(view):
+        cache = {} # etag -> body of the latest version
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+            etag = make_etag(request.endpoint, revision())
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            body = cache.get(etag)
+            if body is None:
+                body = view(*args, **kwargs)
+                if not isinstance(body, str):
+                    return body # error or custom response, do not cache
+                cache.clear() # keep only the latest version
+                cache[etag] = body
+            return with_etag(Response(body, mimetype="application/json"), etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,154 @@
+"""
+This module implements the bulk export of a store as NDJSON or CSV file. Exports are streamed
+from the file of the store in chunks, so memory usage does not depend on the size of the export.
+"""
+# System Imports:
+import csv
+import hashlib
+import io
+import json
+from typing import Iterable, Iterator
+from flask import Response, request
+from werkzeug.exceptions import BadRequest, RequestedRangeNotSatisfiable
+
+# Local Imports:
+from api.query import ItemQuery
+from api.stream import compress_chunks, negotiate_encoding
+from data import LogStore
+
+
+"""
+Constants
+"""
+CHUNK_SIZE = 64 * 1024 # size of the chunks sent (bytes)
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CSV_COLUMNS = ("id", "timestamp", "category", "source", "host", "message", "bug_id", "solution", "trace_id")
+
+
+"""
+Helper Functions
+"""
+def _raw_chunks(store: LogStore, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yields the bytes of the file between the given offsets (unfiltered NDJSON export)
+    """
+    try:
+        file = open(store.filename, "rb")
+    except FileNotFoundError:
+        return
+    with file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+def _matching_items(store: LogStore, query: ItemQuery, end: int) -> Iterator[tuple[bytes, dict]]:
+    for line in store.scan(0, end):
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue # skip damaged lines
+        if query.matches(item):
+            yield line, item
+
+def _join_chunks(parts: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Groups small parts into chunks of about CHUNK_SIZE bytes
+    """
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+def _csv_rows(items: Iterable[dict]) -> Iterator[bytes]:
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(CSV_COLUMNS)
+    yield text.getvalue().encode("utf-8")
+    for item in items:
+        text.seek(0)
+        text.truncate()
+        writer.writerow(["" if item.get(column) is None else item.get(column) for column in CSV_COLUMNS])
+        yield text.getvalue().encode("utf-8")
+
+def export_chunks(store: LogStore, query: ItemQuery, fmt: str, end: int) -> Iterator[bytes]:
+    """
+    Yields the export of the store up to the byte offset end of its file. Stored lines are passed
+    through unchanged for NDJSON, so exports only grow at their end while the store grows.
+    """
+    if fmt == "ndjson":
+        if not query:
+            return _raw_chunks(store, 0, end)
+        return _join_chunks(line for line, _ in _matching_items(store, query, end))
+    return _join_chunks(_csv_rows(item for _, item in _matching_items(store, query, end)))
+
+def export_response(store: LogStore, name: str) -> Response:
+    """
+    Streams the items of the store matching the filters of the request (see ItemQuery) as file
+    download. The format is chosen by the 'format' query parameter ("ndjson" or "csv"). Full
+    downloads are compressed as negotiated with the 'Accept-Encoding' header. The unfiltered NDJSON
+    export is a byte range of the store file, so requests with a 'Range' header (e.g. to resume a
+    download) are answered uncompressed with "206 Partial Content". Filtered and CSV exports would
+    have to be generated twice for a range (length and content), they are always sent in full.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        raise BadRequest(f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    query = ItemQuery(request.args)
+    status = store.stat()
+    end = status.st_size if status else 0
+
+    # Entity Tag:
+    # [INFO] The export of a file only grows at its end, so the entity tag only depends on the file
+    # (inode) and the filters. It is a strong validator, as required for 'If-Range'.
+    identity = f"{status.st_ino if status else 0}|{fmt}|{query.key}"
+    etag = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:20]
+    ranges = fmt == "ndjson" and not query
+    headers = {
+        "Accept-Ranges": "bytes" if ranges else "none",
+        "Content-Disposition": f"attachment; filename={name}.{fmt}",
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding, Range",
+    }
+
+    # Partial Content:
+    # [INFO] 'If-Range' with a date is never answered partially: the export has no modification
+    # date that could be compared as strong validator, so the full export is sent instead.
+    byte_range = request.range
+    if_range = request.if_range
+    unchanged = if_range.etag == etag if if_range.etag or if_range.date else True
+    if ranges and byte_range is not None and len(byte_range.ranges) == 1 and unchanged:
+        bounds = byte_range.range_for_length(end)
+        if bounds is None:
+            raise RequestedRangeNotSatisfiable(length=end)
+        start, stop = bounds
+        response = Response(_raw_chunks(store, start, stop), status=206, mimetype=EXPORT_FORMATS[fmt], headers=headers)
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{end}"
+        response.headers["Content-Length"] = str(stop - start)
+        response.set_etag(etag)
+        return response
+
+    # Full Content:
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    chunks = compress_chunks(export_chunks(store, query, fmt, end), encoding)
+    response = Response(chunks, mimetype=EXPORT_FORMATS[fmt], headers=headers)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    elif ranges:
+        response.headers["Content-Length"] = str(end)
+    response.set_etag(etag)
+    return response
@@ -9,12 +9,15 @@ import time
 from werkzeug.exceptions import NotImplemented
 
 # Local Imports:
-from data import SettingsHandler
+from api.cache import conditional
+from data import get_settings
 
 """
 Setup File Handlers
 """
-settings = SettingsHandler("settings.json")
+# [INFO] The settings handler is created on the first request, not when importing this module.
+def settings_revision() -> int:
+    return get_settings().settings_revision()
 
 
 """
@@ -52,10 +55,13 @@ def delete_record():
     return "OK", 200
 
 @form.route("/docker-interface", methods=["GET","POST"])
+@conditional(settings_revision)
 def docker_interface():
+    settings = get_settings()
     if request.method == "GET":
         data = {
             "network": settings.docker_interface_network(),
+            "hosts": settings.docker_interface_hosts(),
             "whitelist": settings.docker_interface_whitelist(),
             "blacklist": settings.docker_interface_blacklist(),
         }
@@ -68,6 +74,8 @@ def docker_interface():
 
         if "network" in payload:
             settings.docker_interface_network(payload["network"])
+        if "hosts" in payload and isinstance(payload["hosts"], list):
+            settings.docker_interface_hosts(payload["hosts"])
         if "whitelist" in payload:
             settings.docker_interface_whitelist(payload["whitelist"])
         if "blacklist" in payload:
@@ -76,7 +84,9 @@ def docker_interface():
         return "OK", 200
 
 @form.route("/scanner", methods=["GET","POST"])
+@conditional(settings_revision)
 def scanner():
+    settings = get_settings()
     if request.method == "GET":
         logging_list = settings.scanner_logging()
         recording_list = settings.scanner_recording()
@@ -134,7 +144,9 @@ def scanner():
         return "OK", 200
 
 @form.route("/disk-usage", methods=["GET","POST"])
+@conditional(settings_revision)
 def disk_usage():
+    settings = get_settings()
     if request.method == "GET":
         disk_usage = settings.disk_usage()
         response = json.dumps(disk_usage) # convert to valid json string
@@ -153,7 +165,9 @@ def disk_usage():
         return "OK", 200
 
 @form.route("/database", methods=["GET","POST"])
+@conditional(settings_revision)
 def database():
+    settings = get_settings()
     if request.method == "GET":
         database_settings = settings.database()
         response = json.dumps(database_settings)
@@ -0,0 +1,84 @@
+"""
+This module implements the filters of the query and export endpoints (category, source, host,
+text search and time range)
+"""
+# System Imports:
+from datetime import datetime, timezone
+from werkzeug.exceptions import BadRequest
+
+
+"""
+Constants
+"""
+FILTER_ARGS = ("category", "source", "host", "search", "since", "until")
+
+
+"""
+Helper Functions
+"""
+def _parse_list(args, name: str) -> frozenset | None:
+    """
+    Reads a filter given as repeated parameter or comma separated list (e.g. category=Error,Critical)
+    """
+    values = [value.strip() for arg in args.getlist(name) for value in arg.split(",") if value.strip()]
+    return frozenset(values) if values else None
+
+def _parse_datetime(args, name: str) -> datetime | None:
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise BadRequest(f"Query parameter '{name}' has to be an ISO 8601 datetime. It is '{value}'.")
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class ItemQuery:
+    """
+    Filter of log items given by the query parameters of a request:
+        - category: categories to include (e.g. "Error,Critical", case insensitive)
+        - source: names of containers to include
+        - host: names of Docker hosts to include
+        - search: keywords separated by spaces, all have to occur in id, source, message, solution or trace id
+        - since, until: time range (ISO 8601, UTC if no timezone is given)
+    """
+    def __init__(self, args):
+        categories = _parse_list(args, "category")
+        self.categories = frozenset(category.capitalize() for category in categories) if categories else None
+        self.sources = _parse_list(args, "source")
+        self.hosts = _parse_list(args, "host")
+        self.words = tuple(args.get("search", "").lower().split())
+        self.since = _parse_datetime(args, "since")
+        self.until = _parse_datetime(args, "until")
+        self.key = "&".join(f"{name}={','.join(args.getlist(name))}" for name in FILTER_ARGS if name in args) # identifies the filter
+
+    def __bool__(self) -> bool:
+        """
+        Tells if any filter is set
+        """
+        return bool(self.key)
+
+    def matches(self, item: dict) -> bool:
+        if self.categories is not None and item.get("category") not in self.categories:
+            return False
+        if self.sources is not None and item.get("source") not in self.sources:
+            return False
+        if self.hosts is not None and item.get("host") not in self.hosts:
+            return False
+        if self.since is not None or self.until is not None:
+            try:
+                timestamp = datetime.fromisoformat(item["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                return False
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            if self.since is not None and timestamp < self.since:
+                return False
+            if self.until is not None and timestamp > self.until:
+                return False
+        if self.words:
+            text = " ".join(str(item.get(field) or "") for field in ("id", "source", "message", "solution", "trace_id")).lower()
+            if not all(word in text for word in self.words):
+                return False
+        return True
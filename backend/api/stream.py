@@ -0,0 +1,177 @@
+"""
+This module implements helpers to encode and compress streamed responses of the API
+"""
+# System Imports:
+import json
+import zlib
+from typing import Any, Iterable, Iterator
+from werkzeug.exceptions import BadRequest, NotAcceptable
+
+# Optional Imports:
+try:
+    import brotli # optional, only used if the client accepts "br"
+except ImportError:
+    brotli = None
+try:
+    import msgpack # optional, only used if the client asks for format=msgpack
+except ImportError:
+    msgpack = None
+
+
+"""
+Constants
+"""
+BATCH_SIZE = 500 # number of items sent per chunk
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+FORMATS = {
+    "jsonl": "application/json-lines",
+    "columnar": "application/json-lines",
+    "msgpack": "application/x-msgpack",
+}
+
+
+"""
+Helper Functions
+"""
+def parse_int_arg(args, name: str, default: int, minimum: int = 0) -> int:
+    """
+    Reads an integer query parameter and raises a BadRequest if it is not a valid number
+
+    Args:
+        args: query arguments of the request (e.g. request.args)
+        name (str): name of the query parameter
+        default (int): value used if the parameter is missing
+        minimum (int): smallest accepted value
+
+    Returns:
+        int: parsed value
+    """
+    value = args.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"Query parameter '{name}' has to be an integer. It is '{value}'.")
+    if number < minimum:
+        raise BadRequest(f"Query parameter '{name}' has to be at least {minimum}. It is {number}.")
+    return number
+
+def negotiate_format(args) -> str:
+    """
+    Reads the 'format' query parameter and checks if the requested encoding is available
+
+    Returns:
+        str: one of the keys of FORMATS
+    """
+    fmt = args.get("format", "jsonl")
+    if fmt not in FORMATS:
+        raise BadRequest(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if fmt == "msgpack" and msgpack is None:
+        raise NotAcceptable("Format 'msgpack' is not available on this server (package 'msgpack' not installed).")
+    return fmt
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Picks the content encoding for the response based on the 'Accept-Encoding' header of the request.
+    Brotli is preferred (if installed) over gzip. Quality values of 0 disable an encoding.
+
+    Returns:
+        str | None: "br", "gzip" or None for no compression
+    """
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue # explicitly refused by client
+            except ValueError:
+                continue
+        accepted.add(token)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def batch_items(items: Iterable[Any], batch_size: int = BATCH_SIZE) -> Iterator[list]:
+    """
+    Groups the given items into lists of at most batch_size items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def encode_batch(batch: list[dict], fmt: str = "jsonl") -> bytes:
+    """
+    Serializes a batch of items into one chunk.
+        - jsonl: one JSON object per line
+        - columnar: one JSON line per batch with the keys listed once ({"columns": [...], "rows": [[...], ...]})
+        - msgpack: one msgpack array per batch
+
+    Returns:
+        bytes: encoded chunk
+    """
+    if not batch:
+        return b""
+    if fmt == "msgpack":
+        return msgpack.packb(batch, default=str)
+    if fmt == "columnar":
+        columns = list(batch[0].keys())
+        rows = [[item.get(column) for column in columns] for item in batch]
+        line = json.dumps({"columns": columns, "rows": rows}, separators=(",", ":"), default=str)
+        return (line + "\n").encode("utf-8")
+    dumps = json.JSONEncoder(separators=(",", ":"), default=str).encode
+    return ("\n".join(dumps(item) for item in batch) + "\n").encode("utf-8")
+
+def compress_chunks(chunks: Iterable[bytes], encoding: str | None) -> Iterator[bytes]:
+    """
+    Compresses a stream of chunks on the fly. Each chunk is flushed, so the client can decode
+    the data received so far without waiting for the end of the stream.
+    """
+    if encoding is None:
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush(zlib.Z_FINISH)
+
+def stream_items(items: Iterable[dict], fmt: str, encoding: str | None, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Batches, encodes and compresses the given items into the chunks of a streamed response
+    """
+    chunks = (encode_batch(batch, fmt) for batch in batch_items(items, batch_size))
+    return compress_chunks(chunks, encoding)
+
+def stream_headers(fmt: str, encoding: str | None) -> dict:
+    """
+    Returns the headers that describe a response created by stream_items()
+    """
+    headers = {"Vary": "Accept-Encoding", "X-Content-Format": fmt}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
@@ -0,0 +1,255 @@
+"""
+This module implements the historical backfill. Existing logs of containers or exported log files
+are split into ranges (time windows for containers, byte ranges for files), which are run through
+the ingest pipeline in parallel worker processes. Results are written into the stores in large
+batches, in the order of the ranges (so every source is appended in time order), not in the order
+the workers finish them. The stores are not ordered by time as a whole: the historical entries are
+appended after the entries the scanner already stored (see LogStore). Completed ranges are recorded
+in a checkpoint file, so an interrupted backfill continues where it stopped.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import cache
+import json
+import os
+from pathlib import Path
+import time
+
+from data import LogStore, get_settings
+from ingest import IngestPipeline, parse_docker_timestamp, serialize, template
+
+
+"""
+Constants
+"""
+CHUNK_SIZE = 16 * 1024 * 1024 # size of a byte range of a file (bytes)
+WINDOW = timedelta(hours=6) # length of a time range of a container
+BATCH_SIZE = 10000 # number of items appended to a store at once
+CHECKPOINT_FILE = Path(__file__).parent / "data" / "backfill.json"
+BUGS_FILE = "data/bugs.json"
+
+
+"""
+Planning
+"""
+def split_file(path: str, chunk_size: int = CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Splits a file into byte ranges of about chunk_size bytes. Ranges end at line breaks, so no line
+    is split between two ranges.
+
+    Returns:
+        list: (start, end) offsets of every range
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, "rb") as file:
+        while start < size:
+            file.seek(min(start + chunk_size, size))
+            file.readline() # move to the end of the current line
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def split_time(since: datetime, until: datetime, window: timedelta = WINDOW) -> list[tuple[datetime, datetime]]:
+    """
+    Splits the time between since and until into consecutive windows
+    """
+    ranges = []
+    start = since
+    while start < until:
+        end = min(start + window, until)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def plan_tasks(files: list[str], containers: list[str], since: datetime, until: datetime,
+               chunk_size: int = CHUNK_SIZE, window: timedelta = WINDOW) -> list[dict]:
+    """
+    Creates the list of ranges to process for the given sources
+
+    Returns:
+        list: tasks, each a dictionary with a unique 'id', its 'kind' ("file" or "container") and range
+    """
+    tasks = []
+    for path in files:
+        path = os.path.abspath(path)
+        for start, end in split_file(path, chunk_size):
+            tasks.append({"id": f"file:{path}:{start}-{end}", "kind": "file", "source": Path(path).stem,
+                          "path": path, "start": start, "end": end})
+    if containers:
+        from scanner import get_scanner
+        client = get_scanner().client
+        for name in containers:
+            container = client.containers.get(name)
+            created, _ = parse_docker_timestamp(container.attrs["Created"])
+            for start, end in split_time(max(since, created or since), until, window):
+                tasks.append({"id": f"container:{container.id}:{start.isoformat()}-{end.isoformat()}", "kind": "container",
+                              "source": container.name, "container": container.id,
+                              "start": start.isoformat(), "end": end.isoformat()})
+    return tasks
+
+
+"""
+Workers
+"""
+@cache
+def _worker_pipeline() -> IngestPipeline:
+    return IngestPipeline(get_settings(), bugs_filename=BUGS_FILE) # one pipeline per worker process
+
+def _read_file_range(task: dict) -> list[str]:
+    with open(task["path"], "rb") as file:
+        file.seek(task["start"])
+        data = file.read(task["end"] - task["start"])
+    return data.decode("utf-8", errors="replace").splitlines()
+
+def _read_container_range(task: dict) -> list[str]:
+    from scanner import get_scanner
+    start = datetime.fromisoformat(task["start"])
+    end = datetime.fromisoformat(task["end"])
+    container = get_scanner().client.containers.get(task["container"])
+    data = container.logs(stream=False, timestamps=True, since=start, until=end + timedelta(seconds=1))
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    # [INFO] Docker rounds 'since' and 'until' to seconds, keep only lines of this window
+    return [line for line in lines if start <= (parse_docker_timestamp(line)[0] or start) < end]
+
+def process_task(task: dict) -> tuple[str, list[dict], list[dict]]:
+    """
+    Reads the range of the given task and runs it through the ingest pipeline (in a worker process)
+
+    Returns:
+        tuple: task id, serialized logs and serialized records
+    """
+    lines = _read_file_range(task) if task["kind"] == "file" else _read_container_range(task)
+    logs, records = _worker_pipeline().process(lines, source=task["source"])
+    return task["id"], serialize(logs), serialize(records)
+
+
+"""
+Checkpoint
+"""
+def load_checkpoint() -> dict | None:
+    try:
+        with open(CHECKPOINT_FILE, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def check_range(checkpoint: dict, since: datetime | None, until: datetime | None):
+    """
+    Raises a RuntimeError if the given time range differs from the range of the checkpoint.
+    Missing bounds take the ones of the checkpoint.
+    """
+    for name, value in (("since", since), ("until", until)):
+        if value is not None and value.isoformat() != checkpoint[name]:
+            raise RuntimeError(f"The interrupted backfill covers {checkpoint['since']} - {checkpoint['until']}, "
+                               f"but --{name} {value.isoformat()} was given. Give the same range to resume "
+                               "or use --restart to start over.")
+
+def store_checkpoint(checkpoint: dict):
+    temporary = CHECKPOINT_FILE.with_suffix(".tmp")
+    with open(temporary, "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary, CHECKPOINT_FILE) # atomic, an interruption never leaves a broken checkpoint
+
+
+"""
+Backfill
+"""
+def _append_sorted(store: LogStore, items: list[dict], batch_size: int = BATCH_SIZE):
+    # [INFO] Ranges do not overlap and are appended in order, sorting within a range is enough.
+    items.sort(key=lambda item: item["timestamp"])
+    for index in range(0, len(items), batch_size):
+        store.append(items[index:index + batch_size])
+
+def backfill(files: list[str], containers: list[str], since: datetime | None = None, until: datetime | None = None,
+             workers: int | None = None, restart: bool = False, log_store: LogStore = None, record_store: LogStore = None):
+    """
+    Backfills the stores with the logs of the given files and containers. Records of errors
+    already in the record store are not created again.
+
+    Args:
+        files: paths of exported log files (one log line per line, optionally with Docker timestamps)
+        containers: names or IDs of containers to read
+        since: start of the time range for containers (default: 14 days ago)
+        until: end of the time range for containers (default: now)
+        workers: number of worker processes (default: number of CPUs)
+        restart: ignore an existing checkpoint and start from scratch. Without, an interrupted
+            backfill of the same sources is resumed (a RuntimeError is raised if the time range differs).
+        log_store: store for logs (default: data/logs.jsonl)
+        record_store: store for records (default: data/records.jsonl)
+    """
+    log_store = log_store or LogStore("logs.jsonl")
+    record_store = record_store or LogStore("records.jsonl")
+    sources = sorted([f"file:{os.path.abspath(path)}" for path in files] + [f"container:{name}" for name in containers])
+
+    # Plan Or Resume:
+    # [INFO] The plan and its time range are stored with the checkpoint, so resuming uses the exact
+    # same ranges. Without explicit bounds, the range of the checkpoint is used ('until' defaults to
+    # now, which changes with every call).
+    checkpoint = None if restart else load_checkpoint()
+    if checkpoint and checkpoint.get("sources") == sources and "since" in checkpoint:
+        check_range(checkpoint, since, until)
+        print(f"Resuming backfill of {checkpoint['since']} - {checkpoint['until']} "
+              f"({len(checkpoint['done'])}/{len(checkpoint['tasks'])} ranges done)")
+    else:
+        if checkpoint:
+            print("Checkpoint belongs to different sources or has no time range, starting over.")
+        until = until or datetime.now(timezone.utc)
+        since = since or until - timedelta(days=14)
+        checkpoint = {"sources": sources, "since": since.isoformat(), "until": until.isoformat(),
+                      "tasks": plan_tasks(files, containers, since, until), "done": []}
+        store_checkpoint(checkpoint)
+    done = set(checkpoint["done"])
+    pending = [task for task in checkpoint["tasks"] if task["id"] not in done]
+    total = len(checkpoint["tasks"])
+    if not pending:
+        print("Nothing to do.")
+        return
+
+    # Remember Existing Records:
+    # [INFO] Records are deduplicated by message template against the record store, so records
+    # created by the scanner or by an interrupted run of this backfill are not created again.
+    recorded = set()
+    for line in record_store.scan():
+        try:
+            recorded.add(template(json.loads(line)["message"]))
+        except (ValueError, KeyError, TypeError):
+            continue
+
+    # Process Ranges In Parallel:
+    # [INFO] Results are taken in the order of the plan. Ranges finished early wait in memory until
+    # the ranges before them are stored.
+    num_logs = num_records = 0
+    start_time = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_task, task) for task in pending]
+        try:
+            for number, future in enumerate(futures, start=1):
+                task_id, logs, records = future.result()
+                new_records = []
+                for record in records:
+                    key = template(record["message"])
+                    if key not in recorded:
+                        recorded.add(key)
+                        new_records.append(record)
+                records = new_records
+                _append_sorted(log_store, logs)
+                _append_sorted(record_store, records)
+                num_logs += len(logs)
+                num_records += len(records)
+
+                # Update Checkpoint and Progress:
+                checkpoint["done"].append(task_id)
+                store_checkpoint(checkpoint)
+                elapsed = time.monotonic() - start_time
+                remaining = elapsed / number * (len(pending) - number)
+                print(f"[{len(checkpoint['done'])}/{total}] {num_logs} logs, {num_records} records, "
+                      f"{elapsed:.0f} s elapsed, ~{remaining:.0f} s remaining", flush=True)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("Interrupted! Run the same command again to resume.")
+            raise
+    print(f"Backfill done: {num_logs} logs, {num_records} records from {len(pending)} ranges.")
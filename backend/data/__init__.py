@@ -1,16 +1,22 @@
 """
 This module implements functions to read and write data files in here
 """
+from functools import cache
 import json
+import os
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from collections import deque # Import deque for efficient log tailing
 
+from ringbuffer import LogRing
+
 
 class JSONFileHandler:
     def __init__(self, filename: str):
         assert filename != None, f"Invalid filename given ({filename})"
         self.filename = filename
+        self.revision = 0 # incremented on every write
 
     def _load_config(self) -> dict:
         """
@@ -39,11 +45,13 @@ class JSONFileHandler:
         """
         with open(self.filename, mode="w") as file:
             json.dump(configuration, file ,indent=4)
+        self.revision += 1
 
 class TXTFileHandler:
     def __init__(self, filename: str):
         assert filename != None, f"Invalid filename given ({filename})"
         self.filename = filename
+        self.revision = 0 # incremented on every write
 
     def _load_text(self) -> str:
         """
@@ -72,6 +80,7 @@ class TXTFileHandler:
         """
         with open(self.filename, mode="w") as file:
             file.write(text)
+        self.revision += 1
 
 class SettingsHandler(JSONFileHandler):
     def __init__(self, filename: str = "settings.json"):
@@ -83,6 +92,12 @@ class SettingsHandler(JSONFileHandler):
         blacklist_path = parent_path / "Blacklist.txt"
         self.blacklist = TXTFileHandler(blacklist_path)
 
+    def settings_revision(self) -> int:
+        """
+        Returns a number that changes whenever any of the settings files is written
+        """
+        return self.revision + self.whitelist.revision + self.blacklist.revision
+
     # --- Docker Interface ---
     def docker_interface(self, settings: dict | None = None) -> dict | None:
         config = self._load_config()
@@ -98,6 +113,13 @@ class SettingsHandler(JSONFileHandler):
             self.docker_interface(docker_interface)
             return None
         return docker_interface.get("network", "")
+    def docker_interface_hosts(self, hosts: list | None = None) -> list | None:
+        docker_interface = self.docker_interface()
+        if hosts is not None: # parameter given: setter method
+            docker_interface["hosts"] = hosts
+            self.docker_interface(docker_interface)
+            return None
+        return docker_interface.get("hosts", [])
     def docker_interface_whitelist(self, text: str | None = None) -> str | None:
         if text is not None: # parameter given: setter method
             self.whitelist._store_text(text)
@@ -125,6 +147,13 @@ class SettingsHandler(JSONFileHandler):
             self.scanner(scanner)
             return None
         return scanner.get("interval", 15000)
+    def scanner_reorder_window(self, window: int | None = None) -> int | None:
+        scanner = self.scanner()
+        if window is not None:
+            scanner["reorder_window"] = window
+            self.scanner(scanner)
+            return None
+        return scanner.get("reorder_window", 5000)
     def scanner_tags(self, tags: dict | None = None) -> dict | None:
         scanner = self.scanner()
         if tags is not None:
@@ -181,6 +210,13 @@ class SettingsHandler(JSONFileHandler):
             self.scanner(scanner)
             return None
         return scanner.get("recording", [])
+    def scanner_structured(self, keys: dict | None = None) -> dict | None:
+        scanner = self.scanner()
+        if keys is not None:
+            scanner["structured"] = keys
+            self.scanner(scanner)
+            return None
+        return scanner.get("structured", {})
 
     
     # --- Disk Usage ---
@@ -239,6 +275,64 @@ class SettingsHandler(JSONFileHandler):
             self.database(database)
             return None
         return database.get("key", "")
+
+
+    # --- Notifications ---
+    def notifications(self, settings: dict | None = None) -> dict | None:
+        config = self._load_config()
+        if settings is not None:
+            config["notifications"] = settings
+            self._store_config(config)
+            return None
+        return config.get("notifications", {})
+    def notifications_channels(self, channels: list | None = None) -> list | None:
+        notifications = self.notifications()
+        if channels is not None:
+            notifications["channels"] = channels
+            self.notifications(notifications)
+            return None
+        return notifications.get("channels", [])
+    def notifications_window(self, window: int | None = None) -> int | None:
+        notifications = self.notifications()
+        if window is not None:
+            assert isinstance(window, int) and window >= 0, f"Given number has to be positiv integer. It is {window}."
+            notifications["window"] = window
+            self.notifications(notifications)
+            return None
+        return notifications.get("window", 60000)
+    def notifications_categories(self, categories: list | None = None) -> list | None:
+        notifications = self.notifications()
+        if categories is not None:
+            notifications["categories"] = categories
+            self.notifications(notifications)
+            return None
+        return notifications.get("categories", ["critical"])
+
+
+    # --- Admin ---
+    def admin(self, settings: dict | None = None) -> dict | None:
+        config = self._load_config()
+        if settings is not None:
+            config["admin"] = settings
+            self._store_config(config)
+            return None
+        return config.get("admin", {})
+    def admin_profiling(self, enabled: bool | None = None) -> bool | None:
+        admin = self.admin()
+        if enabled is not None:
+            assert isinstance(enabled, bool), f"Given value has to be a boolean. It is {enabled}."
+            admin["profiling"] = enabled
+            self.admin(admin)
+            return None
+        return admin.get("profiling", False)
+
+@cache
+def get_settings(filename: str = "settings.json") -> SettingsHandler:
+    """
+    Returns the settings handler of the given file. The handler is created on first use and
+    shared afterwards, so all parts of the application see the same settings revision.
+    """
+    return SettingsHandler(filename)
         
 
 
@@ -271,7 +365,7 @@ class SettingsHandler(JSONFileHandler):
 # Define the structure for a single log message
 LogMessage = Dict[str, Any]
 
-def write_logs(filename: str, logs: List[LogMessage]) -> None:
+def write_logs(filename: str, logs: List[LogMessage], quiet: bool = False) -> int:
     """
     Writes a batch of log messages to a JSON Lines (JSONL) file.
 
@@ -282,20 +376,29 @@ def write_logs(filename: str, logs: List[LogMessage]) -> None:
     Args:
         filename: The path to the JSONL file.
         logs: A list of log dictionaries to be written (your batch).
+        quiet: Only report errors, not every successful write (e.g. for the scanner loop).
+
+    Returns:
+        int: number of bytes written, -1 if writing failed
     """
     try:
         # Open the file in append mode ('a')
+        num_bytes = 0
         with open(filename, 'a', encoding='utf-8') as f:
             for log in logs:
                 # 1. Serialize the dictionary to a JSON string
-                json_line = json.dumps(log)
+                json_line = json.dumps(log) + '\n'
                 # 2. Write the string, followed by a newline.
-                f.write(json_line + '\n')
-        print(f"Successfully wrote {len(logs)} logs to {filename} (appended).")
+                f.write(json_line)
+                num_bytes += len(json_line.encode('utf-8'))
+        if not quiet:
+            print(f"Successfully wrote {len(logs)} logs to {filename} (appended).")
+        return num_bytes
     except IOError as e:
         print(f"Error writing to file {filename}: {e}")
     except TypeError as e:
         print(f"Error serializing log data (check for un-serializable objects): {e}")
+    return -1
 
 def read_logs(filename: str, num_lines: Optional[int] = None) -> List[LogMessage]:
     """
@@ -348,4 +451,164 @@ def read_logs(filename: str, num_lines: Optional[int] = None) -> List[LogMessage
     except IOError as e:
         print(f"Error reading file {filename}: {e}")
 
-    return logs
\ No newline at end of file
+    return logs
+
+class LogStore:
+    """
+    Append-only store of log items in a JSON Lines file. Every write increments the write
+    generation, which can be used to detect changes without reading the file. The most recent
+    items are kept in a ring buffer as well, so first pages and the live tail are served from
+    memory.
+    Other processes may append to the file too (e.g. the backfill). Their lines are picked up by
+    the next call of generation, tail() or since(), which compare the size and inode of the file
+    with the part already read (one stat call). A replaced or truncated file resets the buffer.
+    Items are kept in the order they were appended, which is not strictly the order of their
+    timestamps (e.g. the backfill appends older items after newer ones). tail(), since() and
+    scan() return the file order.
+
+    Args:
+        filename (str): name of the file in the data directory
+        buffer_size (int): number of recent items kept in memory
+    """
+    def __init__(self, filename: str = "logs.jsonl", buffer_size: int = 10000):
+        parent_path = Path(__file__).parent
+        self.filename = parent_path / filename
+        self.buffer = LogRing(buffer_size)
+        self._generation = 0 # incremented on every write (of any process)
+        self._primed = False # buffer holds the tail of the file
+        self._inode = None # inode of the file when last read
+        self._size = 0 # size of the file when last checked
+        self._offset = 0 # bytes of the file read into the buffer (complete lines)
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._generation
+
+    def _read(self, start: int, end: int, num_items: Optional[int] = None) -> Tuple[List[LogMessage], int]:
+        """
+        Reads the items of the complete lines between the byte offsets (only the last num_items)
+
+        Returns:
+            tuple: items and the offset after the last complete line
+        """
+        lines = deque(maxlen=num_items)
+        position = start
+        for line in self.scan(start, end):
+            position += len(line)
+            lines.append(line)
+        items = []
+        for line in lines:
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                continue # skip damaged lines
+        return items, position
+
+    def _sync(self):
+        """
+        Picks up lines appended by other processes and detects a replaced or truncated file. Call
+        with the lock held.
+        """
+        status = self.stat()
+        inode, size = (status.st_ino, status.st_size) if status else (None, 0)
+        if inode == self._inode and size == self._size:
+            return # unchanged (the usual case)
+        self._generation += 1
+        if inode != self._inode or size < self._offset: # replaced or truncated, start over
+            self.buffer = LogRing(self.buffer.capacity)
+            self._primed = False
+            self._offset = 0
+        self._inode, self._size = inode, size
+        if self._primed: # otherwise the lines are read when priming
+            items, self._offset = self._read(self._offset, size)
+            self.buffer.extend(items)
+
+    def _prime(self):
+        """
+        Fills the buffer with the tail of the file on first use (not on construction, to keep the
+        startup free of I/O). Call with the lock held.
+        """
+        self._sync()
+        if not self._primed:
+            items, self._offset = self._read(0, self._size, self.buffer.capacity)
+            self.buffer.extend(items)
+            self._primed = True
+
+    def append(self, logs: List[LogMessage]) -> None:
+        """
+        Appends the given batch of log items to the store
+        """
+        if not logs:
+            return
+        with self._lock:
+            self._sync() # lines of other processes come first
+            num_bytes = write_logs(self.filename, logs, quiet=True) # called once per container and scan cycle
+            status = self.stat()
+            if (self._primed and num_bytes >= 0 and status is not None and status.st_ino == self._inode
+                    and self._size == self._offset and status.st_size == self._offset + num_bytes):
+                self.buffer.extend(logs) # only this batch was appended
+                self._offset = self._size = status.st_size
+                self._generation += 1
+            else:
+                self._sync() # not primed yet or other writers interleaved, read the file
+
+    def tail(self, num_lines: Optional[int] = None) -> List[LogMessage]:
+        """
+        Returns the last num_lines items of the store (all items if None). Requests fitting into
+        the buffer are served from memory.
+        """
+        with self._lock:
+            self._prime()
+            buffer = self.buffer
+        if num_lines and num_lines <= buffer.capacity:
+            return buffer.tail(num_lines)
+        return read_logs(self.filename, num_lines)
+
+    def since(self, cursor: Optional[int], limit: Optional[int] = None) -> Tuple[List[LogMessage], int]:
+        """
+        Returns the items appended after the given cursor (see LogRing.since), from memory
+        """
+        with self._lock:
+            self._prime()
+            buffer = self.buffer
+        return buffer.since(cursor, limit)
+
+    def stat(self) -> Optional[os.stat_result]:
+        """
+        Returns the status of the file (None if it does not exist yet)
+        """
+        try:
+            return self.filename.stat()
+        except FileNotFoundError:
+            return None
+
+    def scan(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yields the raw lines of the file (including the line break) between the byte offsets start
+        and end (default: the size of the file when called). Lines are read one by one, so memory
+        usage does not depend on the size of the file. A line still being written is skipped.
+        """
+        try:
+            file = open(self.filename, "rb")
+        except FileNotFoundError:
+            return
+        with file:
+            end = os.fstat(file.fileno()).st_size if end is None else end
+            file.seek(start)
+            position = start
+            for line in file:
+                position += len(line)
+                if position > end or not line.endswith(b"\n"):
+                    break
+                yield line
+
+    def is_empty(self) -> bool:
+        if self._primed and len(self.buffer):
+            return False
+        try:
+            return self.filename.stat().st_size == 0
+        except FileNotFoundError:
+            return True
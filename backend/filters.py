@@ -0,0 +1,165 @@
+"""
+This module implements the container filter built from the whitelist and blacklist. Every line of
+a list is one entry, which can be:
+    - exact:  "my-container" or a container ID (full or short 12 character form)
+    - prefix: "my-service-*" (only a trailing asterisk)
+    - glob:   "app-?-worker", "app-[0-9]*" (shell wildcards, see fnmatch)
+    - regex:  "re:app-(a|b)" (Python regular expression)
+Every entry has to match the whole name (or ID), also regular expressions: "re:worker" does not
+match "app-worker", "re:.*worker" does. Lines starting with "#" are comments. Names and IDs are
+matched the same way.
+"""
+import fnmatch
+import os
+import re
+
+
+"""
+Constants
+"""
+REGEX_PREFIX = "re:"
+GLOB_CHARACTERS = set("*?[")
+SHORT_ID_LENGTH = 12
+
+
+class ContainerMatcher:
+    """
+    Compiled list of filter entries. Exact entries are kept in a set (O(1) lookup), prefixes in a
+    tuple for str.startswith() and all glob entries are combined into a single pattern. Regex
+    entries are compiled one by one: combined, inline flags and backreferences of one entry would
+    break the others.
+    """
+    def __init__(self, entries: set[str]):
+        self.entries = frozenset(entries)
+        exact = set()
+        prefixes = []
+        globs = []
+        regexes = []
+        for entry in self.entries:
+            if entry.startswith(REGEX_PREFIX):
+                regexes.append(re.compile(entry[len(REGEX_PREFIX):])) # raises re.error for invalid entries
+            elif entry.endswith("*") and not GLOB_CHARACTERS & set(entry[:-1]):
+                prefixes.append(entry[:-1])
+            elif GLOB_CHARACTERS & set(entry):
+                globs.append(fnmatch.translate(entry))
+            else:
+                exact.add(entry)
+        self.exact = frozenset(exact)
+        self.prefixes = tuple(prefixes)
+        self.glob_pattern = re.compile("|".join(f"(?:{glob})" for glob in globs)) if globs else None
+        self.regexes = tuple(regexes)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def _matches(self, value: str) -> bool:
+        if value in self.exact:
+            return True
+        if self.prefixes and value.startswith(self.prefixes):
+            return True
+        if self.glob_pattern is not None and self.glob_pattern.fullmatch(value):
+            return True
+        return any(regex.fullmatch(value) for regex in self.regexes)
+
+    def matches(self, name: str, container_id: str = "") -> bool:
+        """
+        Tells if the container with the given name or ID matches any of the entries
+        """
+        if self._matches(name):
+            return True
+        if container_id:
+            return container_id[:SHORT_ID_LENGTH] in self.exact or self._matches(container_id)
+        return False
+
+
+class ContainerFilter:
+    """
+    Whitelist and blacklist read from text files. The files are compiled once and recompiled
+    automatically when they change (see refresh()). If the whitelist is empty, every container
+    passes it. Containers on the blacklist never pass. Every successful (re)load increments the
+    generation, so users of the filter can tell whether it changed since they last looked.
+    """
+    def __init__(self, whitelist_filename: str, blacklist_filename: str):
+        self.whitelist_filename = whitelist_filename
+        self.blacklist_filename = blacklist_filename
+        self.whitelist = ContainerMatcher(set())
+        self.blacklist = ContainerMatcher(set())
+        self._mtimes = None
+        self.generation = 0 # incremented whenever the lists are (re)loaded
+
+    @staticmethod
+    def _load_list(filename: str) -> set[str]:
+        """
+        Reads the given file and returns a set containing every line, with no duplicates
+
+        Args:
+            filename (str): path of the file to read
+
+        Returns:
+            set: set of lines without duplicates and comments, empty if the file was not found
+        """
+        try:
+            with open(filename, 'r') as file:
+                return {line.strip() for line in file if line.strip() and not line.strip().startswith("#")}
+        except FileNotFoundError:
+            return set() # empty set
+
+    def _stat(self) -> tuple:
+        mtimes = []
+        for filename in (self.whitelist_filename, self.blacklist_filename):
+            try:
+                stat = os.stat(filename)
+                mtimes.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def load(self):
+        """
+        Reads and compiles both lists. Raises a RuntimeError if the lists share items or contain
+        invalid regular expressions; the previous filter stays active in this case.
+        """
+        mtimes = self._stat()
+        whitelist = self._load_list(self.whitelist_filename)
+        blacklist = self._load_list(self.blacklist_filename)
+        shared_items = whitelist & blacklist
+        if shared_items: # share items between whitelist and blacklists is bad practive
+            error_message = "Whitelist and Blacklist share items, which is bad practice:"
+            for item in shared_items:
+                error_message += f"\r\n{item}"
+            raise RuntimeError(error_message) # inform user about which filter items are shared
+        try:
+            compiled = ContainerMatcher(whitelist), ContainerMatcher(blacklist)
+        except re.error as e:
+            raise RuntimeError(f"Invalid regular expression in filter lists: {e}")
+        self.whitelist, self.blacklist = compiled
+        self._mtimes = mtimes
+        self.generation += 1
+
+    def refresh(self) -> bool:
+        """
+        Reloads the lists if one of the files changed since the last load
+
+        Returns:
+            bool: True if the filter changed
+        """
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return False
+        try:
+            self.load()
+        except RuntimeError as e:
+            print(f"Keeping previous container filter: {e}")
+            self._mtimes = mtimes # do not retry until the files change again
+            return False
+        return True
+
+    def accepts(self, name: str, container_id: str = "") -> bool:
+        """
+        Tells if the container with the given name or ID belongs on the watchlist
+        """
+        if self.blacklist.matches(name, container_id):
+            return False
+        if not self.whitelist: # no whitelist, consider all containers
+            return True
+        return self.whitelist.matches(name, container_id)
@@ -0,0 +1,130 @@
+"""
+This module implements the Docker endpoints watched by the scanner. Every endpoint has its own
+client (with a pool of keep-alive connections), a budget of concurrent requests and tracks its
+health: after a failure the endpoint is skipped for an exponentially growing backoff time.
+"""
+from __future__ import annotations # annotations refer to lazily imported modules (docker)
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import docker
+    from data import SettingsHandler
+
+
+"""
+Constants
+"""
+DEFAULT_CONCURRENCY = 4 # concurrent requests per endpoint
+MIN_BACKOFF = 1.0 # first retry delay after a failure (seconds)
+MAX_BACKOFF = 300.0 # longest retry delay (seconds)
+
+
+class DockerEndpoint:
+    """
+    One Docker daemon watched by the scanner
+
+    Args:
+        url (str): address of the daemon (e.g. "unix:///var/run/docker.sock", "tcp://10.0.0.2:2375")
+        name (str): name used to tag findings of this host (default: the url)
+        concurrency (int): maximum number of concurrent requests to this daemon
+        local (bool): True if the daemon runs on this machine (its log directory might be mounted)
+    """
+    def __init__(self, url: str, name: str | None = None, concurrency: int = DEFAULT_CONCURRENCY, local: bool = False, timeout: int = 60):
+        assert isinstance(url, str) and url, f"Invalid url given ({url})"
+        assert isinstance(concurrency, int) and concurrency >= 1, f"Concurrency has to be a positive integer. It is {concurrency}."
+        self.url = url
+        self.name = name or url
+        self.concurrency = concurrency
+        self.local = local
+        self.timeout = timeout
+        self.failures = 0 # consecutive failures
+        self.retry_at = 0.0 # monotonic time before which the endpoint is skipped
+        self.last_error = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"DockerEndpoint({self.name!r}, {self.url!r})"
+
+    @property
+    def client(self) -> docker.DockerClient:
+        """
+        Client of this endpoint, created on first use. Its connection pool holds as many keep-alive
+        connections as the concurrency budget allows. Raises a RuntimeError if the daemon cannot be
+        reached.
+        """
+        with self._lock:
+            if self._client is None:
+                import docker # imported on demand, slow to import
+                try:
+                    self._client = docker.DockerClient(base_url=self.url, timeout=self.timeout, max_pool_size=self.concurrency, version="auto")
+                except docker.errors.DockerException as e:
+                    raise RuntimeError(f"Could not initialize the docker client for '{self.name}' ({self.url}): {e}")
+            return self._client
+
+    @property
+    def healthy(self) -> bool:
+        return self.failures == 0
+
+    def available(self) -> bool:
+        """
+        Tells if the endpoint may be contacted (it is not waiting for its backoff to expire)
+        """
+        return time.monotonic() >= self.retry_at
+
+    def record_success(self):
+        if self.failures:
+            print(f"Docker host '{self.name}' is reachable again.")
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+
+    def record_failure(self, error: Exception) -> float:
+        """
+        Marks the endpoint as unhealthy and computes when it may be contacted again
+
+        Returns:
+            float: backoff time in seconds
+        """
+        self.failures += 1
+        self.last_error = str(error)
+        backoff = min(MAX_BACKOFF, MIN_BACKOFF * 2 ** (self.failures - 1))
+        self.retry_at = time.monotonic() + backoff
+        with self._lock:
+            self._client = None # reconnect with a new connection pool
+        print(f"Docker host '{self.name}' failed ({self.failures}x), retrying in {backoff:.0f} seconds: {error}")
+        return backoff
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "retry_in": max(0.0, self.retry_at - time.monotonic()),
+            "last_error": self.last_error,
+        }
+
+
+def load_endpoints(settings: SettingsHandler) -> list[DockerEndpoint]:
+    """
+    Creates the endpoints listed in the settings (docker_interface.hosts). Every entry is either a
+    url or a dictionary {"url": ..., "name": ..., "concurrency": ...}. Without entries, the daemon
+    given by the environment variable 'DOCKER_HOST' is used.
+    """
+    endpoints = []
+    for entry in settings.docker_interface_hosts():
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        url = entry.get("url")
+        endpoints.append(DockerEndpoint(url, name=entry.get("name"), concurrency=int(entry.get("concurrency", DEFAULT_CONCURRENCY)),
+                                        local=url == os.environ.get("DOCKER_HOST")))
+    if endpoints:
+        return endpoints
+    host = os.environ.get("DOCKER_HOST")
+    if not host:
+        raise RuntimeWarning(f"Environment variable 'DOCKER_HOST' is not set. Make sure it points to your Docker daemon. If you are using Docker Desktop for example: 'unix:///home/<user>/.docker/desktop/docker.sock'.")
+    return [DockerEndpoint(host, name="local", local=True)]
@@ -0,0 +1,345 @@
+"""
+This module implements the ingest pipeline of the scanner. Raw log lines are categorized first, so
+the policies from the settings (scanner.logging and scanner.recording) can drop unwanted lines
+before any expensive work (timestamp parsing, bug matching) is done on them.
+"""
+from __future__ import annotations # annotations refer to modules only imported for type checking
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+import uuid
+
+from data import SettingsHandler
+from structured import DETECT_LINES, StructuredFormat
+
+if TYPE_CHECKING:
+    from profiling import Probe
+
+
+"""
+Constants
+"""
+CATEGORIES = ["critical", "error", "warning", "info", "debug"] # in order of priority
+DOCKER_TIMESTAMP_REGEX = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+Z(\d{2}:\d{2})?\s?")
+MULTILINE_THRESHOLD = timedelta(microseconds=80)
+RECORDED_CAPACITY = 10000 # message templates remembered to not record the same error twice
+
+# Fallback heuristics, used if none of the configured tags is found in a message:
+CRITICAL_REGEX = re.compile(r'(critical|fatal|panic)', re.IGNORECASE)
+ERROR_REGEX = re.compile(r'(error|exception|critical|fail|err)', re.IGNORECASE)
+WARNING_REGEX = re.compile(r'(warning|warn)', re.IGNORECASE)
+DEBUG_REGEX = re.compile(r'(debug|trace)', re.IGNORECASE)
+HEURISTICS = [("critical", CRITICAL_REGEX), ("error", ERROR_REGEX), ("warning", WARNING_REGEX), ("debug", DEBUG_REGEX)]
+
+# Variable parts of messages, replaced to deduplicate records and group notifications (see template):
+TEMPLATE_REGEX = re.compile(r"""
+    [0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12} # UUIDs
+    | \b0x[0-9a-f]+\b | \b[0-9a-f]{12,}\b                        # addresses, hashes, container IDs
+    | "[^"]*" | '[^']*'                                          # quoted values
+    | \d+(?:\.\d+)*                                              # numbers, IPs, versions
+""", re.IGNORECASE | re.VERBOSE)
+
+
+"""
+Helper Functions
+"""
+def template(message: str) -> str:
+    """
+    Reduces a message to its template by replacing variable parts (numbers, IDs, quoted values)
+    with placeholders, e.g. "Timeout after 30 s for 'db'" becomes "Timeout after <*> s for <*>"
+    """
+    first_line = message.split("\n", 1)[0] # stack traces differ in their details
+    return TEMPLATE_REGEX.sub("<*>", first_line)
+
+def parse_docker_timestamp(line: str) -> tuple[datetime | None, str]:
+    """
+    Docker can automatically prepend timestamps to log messages. These timestamps follow the
+    'RFC3339 Nano' format (YYYY-MM-DDTHH:MM:SS.NNNNNNNNNZ), which has to be trimmed to microseconds
+    before it can be converted. Because this timestamp is generated by Docker and not part of the
+    actual log message, it is removed from the message.
+
+    Returns:
+        tuple: timestamp (None if the line has no Docker timestamp) and the remaining message
+    """
+    match = DOCKER_TIMESTAMP_REGEX.match(line)
+    if not match:
+        return None, line
+    date_part, _, fraction = match.group(0).partition(".")
+    microseconds = "".join(c for c in fraction[:6] if c.isdigit()).ljust(6, "0")
+    timestamp = datetime.fromisoformat(f"{date_part}.{microseconds}+00:00")
+    return timestamp, line[match.end():]
+
+def parse_fuzzy_timestamp(message: str) -> datetime | None:
+    """
+    Tries to find a date somewhere in the message. Timestamps without timezone are assumed to be UTC.
+    """
+    from dateutil import parser # imported on demand, only needed for lines without Docker timestamp
+    try:
+        timestamp = parser.parse(message, fuzzy=True)
+    except Exception:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+def serialize(entries: list[dict]) -> list[dict]:
+    """
+    Converts entries of the pipeline into JSON serializable items for the stores
+    """
+    return [{**entry, "timestamp": entry["timestamp"].isoformat()} for entry in entries]
+
+
+class IngestPolicy:
+    """
+    Compiled view of the scanner settings: tags per category, the sets of categories to log
+    and to record and the keys of structured (JSON) logs.
+    """
+    def __init__(self, tags: dict[str, str], logging: list[str], recording: list[str], structured: dict | None = None):
+        self.tags = [(category, tag.strip()) for category in CATEGORIES
+                     for tag in tags.get(category, "").split(",") if tag.strip()]
+        self.logging = frozenset(logging)
+        self.recording = frozenset(recording)
+        self.kept = self.logging | self.recording
+        self.structured = StructuredFormat(structured)
+
+    @classmethod
+    def from_settings(cls, settings: SettingsHandler) -> "IngestPolicy":
+        scanner = settings.scanner()
+        return cls(scanner.get("tags", {}), scanner.get("logging", []), scanner.get("recording", []), scanner.get("structured", {}))
+
+    def categorize(self, message: str) -> str:
+        """
+        Returns the category of the message. Configured tags are checked first (plain substring
+        search), then the fallback heuristics. Messages without any hint are "info".
+        """
+        for category, tag in self.tags:
+            if tag in message:
+                return category
+        for category, regex in HEURISTICS:
+            if regex.search(message):
+                return category
+        return "info"
+
+
+class IngestPipeline:
+    """
+    Turns raw log lines of a container into log entries and records:
+        1. categorize every line (cheap) and drop lines of categories neither logged nor recorded
+        2. parse the timestamps of the remaining lines and merge multiline messages
+        3. match recordable entries against the known bugs, unknown ones become new records
+    Containers logging JSON objects skip the text heuristics of steps 1 and 2, level, timestamp,
+    message and trace id are read from the object instead (see StructuredFormat). The format is
+    detected from the first DETECT_LINES non-empty lines of every container and kept until the
+    container is replaced (new container id).
+    The policy is reloaded whenever the settings file changes.
+    """
+    def __init__(self, settings: SettingsHandler, bugs_filename: str = None):
+        self.settings = settings
+        self.bugs_filename = bugs_filename
+        self.policy = None
+        self.known_bugs = [] # list of (bug id, compiled pattern)
+        self.recorded = OrderedDict() # templates of messages that already got a record (least recently seen first)
+        self.formats = {} # (host, source) -> {"container": id, "structured": bool (None while detecting), "sample": lines}
+        self.counters = {category: {"seen": 0, "dropped": 0, "logged": 0, "recorded": 0, "matched": 0} for category in CATEGORIES}
+        self._settings_mtime = None
+        self._bugs_mtime = None
+        self.refresh()
+
+    @staticmethod
+    def _mtime(filename) -> int | None:
+        try:
+            return os.stat(filename).st_mtime_ns
+        except (FileNotFoundError, TypeError):
+            return None
+
+    def refresh(self):
+        """
+        Reloads the policy and the known bugs if their files changed since the last call
+        """
+        mtime = self._mtime(self.settings.filename)
+        if self.policy is None or mtime != self._settings_mtime:
+            self._settings_mtime = mtime
+            self.policy = IngestPolicy.from_settings(self.settings)
+            self.formats = {} # detect again with the new keys
+        mtime = self._mtime(self.bugs_filename)
+        if mtime != self._bugs_mtime:
+            self._bugs_mtime = mtime
+            self.known_bugs = self._load_bugs(self.bugs_filename)
+
+    @staticmethod
+    def _load_bugs(filename: str) -> list[tuple[str, re.Pattern]]:
+        """
+        Reads the known bugs file ({"<network>": [{"id": ..., "pattern": ...}, ...]}) and compiles
+        the patterns of all networks
+        """
+        try:
+            with open(filename, "r") as file:
+                bugs_per_network = json.load(file)
+        except (FileNotFoundError, TypeError):
+            return []
+        except json.JSONDecodeError as e:
+            print(f"Invalid JSON in known bugs file '{filename}': {e}")
+            return []
+        known_bugs = []
+        for bugs in bugs_per_network.values():
+            for bug in bugs:
+                try:
+                    known_bugs.append((bug["id"], re.compile(bug["pattern"], re.IGNORECASE)))
+                except (KeyError, re.error) as e:
+                    print(f"Skipping invalid known bug {bug}: {e}")
+        return known_bugs
+
+    def _remember(self, key: str) -> bool:
+        """
+        Remembers the template of a recorded message. Only the RECORDED_CAPACITY most recently seen
+        templates are kept.
+
+        Returns:
+            bool: True if the template is new (the message should be recorded)
+        """
+        if key in self.recorded:
+            self.recorded.move_to_end(key)
+            return False
+        self.recorded[key] = None
+        if len(self.recorded) > RECORDED_CAPACITY:
+            self.recorded.popitem(last=False)
+        return True
+
+    def seed(self, records: Iterable[dict]):
+        """
+        Remembers the messages of existing records (e.g. the tail of the record store after a
+        restart), so they are not recorded again
+        """
+        for record in records:
+            if record.get("message"):
+                self._remember(template(record["message"]))
+
+    def match_bug(self, message: str) -> str | None:
+        for bug_id, pattern in self.known_bugs:
+            if pattern.search(message):
+                return bug_id
+        return None
+
+    def _detect(self, lines: list[str], source: str, host: str | None, container_id: str | None) -> bool:
+        """
+        Tells if the container logs JSON objects. The non-empty lines of the first batches are
+        collected until DETECT_LINES lines were seen, before that every batch is judged by the
+        lines collected so far. A new container id (e.g. recreated container) starts over.
+        """
+        state = self.formats.get((host, source))
+        if state is None or state["container"] != container_id:
+            state = self.formats[(host, source)] = {"container": container_id, "structured": None, "sample": []}
+        if state["structured"] is not None:
+            return state["structured"]
+        sample = state["sample"]
+        for line in lines:
+            if len(sample) >= DETECT_LINES:
+                break
+            message = parse_docker_timestamp(line)[1]
+            if message.strip():
+                sample.append(message)
+        structured = self.policy.structured.detect(sample)
+        if len(sample) >= DETECT_LINES:
+            state["structured"], state["sample"] = structured, None
+        return structured
+
+    def process(self, lines: list[str], source: str, host: str | None = None, probe: Probe | None = None,
+                container_id: str | None = None) -> tuple[list[dict], list[dict]]:
+        """
+        Runs the given lines of one container through the pipeline
+
+        Args:
+            lines: raw log lines, optionally prefixed with Docker timestamps
+            source: name of the container the lines are from
+            host: name of the Docker host running the container, None to omit it
+            probe: probe of a profiled scan cycle, times the parse, classify and match stages
+            container_id: id of the container, the format is detected again when it changes
+
+        Returns:
+            tuple: log entries to store and new records to create
+        """
+        policy = self.policy
+        counters = self.counters
+
+        # Detect Structured Logs:
+        # [INFO] The format is detected once per container. Lines of a JSON container that are no
+        # JSON object (e.g. printed before the logger is set up) still take the text path.
+        structured = self._detect(lines, source, host, container_id) if lines else False
+
+        parse_timestamp, parse_fuzzy, categorize, match_bug = parse_docker_timestamp, parse_fuzzy_timestamp, policy.categorize, self.match_bug
+        parse_structured = policy.structured.parse if structured else None
+        if probe is not None: # only wrapped while profiling, no overhead otherwise
+            parse_timestamp, parse_fuzzy = probe.wrap("parse", parse_timestamp), probe.wrap("parse", parse_fuzzy)
+            categorize, match_bug = probe.wrap("classify", categorize), probe.wrap("match", match_bug)
+            if parse_structured is not None:
+                parse_structured = probe.wrap("parse", parse_structured)
+        entries = []
+        entry_timestamp = None # timestamp of the latest entry (kept or dropped)
+        entry_kept = False
+        for line in lines:
+            timestamp, message = parse_timestamp(line)
+            fields = parse_structured(message) if parse_structured is not None else None
+
+            if fields is None:
+                # Merge Multiline Log Messages:
+                # [INFO] Some log messages spread over multiple lines (e.g. stack traces). Lines within the
+                # threshold of the previous entry belong to it and share its category.
+                if timestamp is not None and entry_timestamp is not None and (timestamp - entry_timestamp) < MULTILINE_THRESHOLD:
+                    if entry_kept:
+                        entries[-1]["message"] += "\n" + message
+                    continue
+                category = categorize(message)
+                event_timestamp = trace_id = None
+            else: # structured, no text heuristics
+                category, event_timestamp, message, trace_id = fields
+
+            # Apply Policy Before Expensive Work:
+            counters[category]["seen"] += 1
+            if category not in policy.kept:
+                counters[category]["dropped"] += 1
+                entry_timestamp, entry_kept = timestamp, False
+                continue
+            # [INFO] Structured logs prefer their own timestamp over the one of Docker and are never
+            # searched for a date.
+            entry_time = event_timestamp or timestamp
+            if entry_time is None and fields is None:
+                entry_time = parse_fuzzy(message)
+            if entry_time is None:
+                counters[category]["dropped"] += 1 # skip, unable to parse
+                entry_kept = False
+                continue
+            entry = {"id": uuid.uuid4().hex, "timestamp": entry_time, "category": category.capitalize(), "source": source, "message": message}
+            if host is not None:
+                entry["host"] = host
+            if trace_id is not None:
+                entry["trace_id"] = trace_id
+            entries.append(entry)
+            entry_timestamp, entry_kept = (timestamp if timestamp is not None else entry_time), True
+
+        # Split Into Logs and Records:
+        logs = []
+        records = []
+        for entry in entries:
+            category = entry["category"].lower()
+            if category in policy.recording: # only recordable entries are matched against known bugs
+                bug_id = match_bug(entry["message"])
+                if bug_id is not None:
+                    entry["bug_id"] = bug_id
+                    counters[category]["matched"] += 1
+                elif self._remember(template(entry["message"])):
+                    records.append({**entry, "solution": None})
+                    counters[category]["recorded"] += 1
+            if category in policy.logging:
+                logs.append(entry)
+                counters[category]["logged"] += 1
+        return logs, records
+
+    def stats(self) -> dict:
+        """
+        Returns a copy of the per-category counters
+        """
+        return {category: dict(counter) for category, counter in self.counters.items()}
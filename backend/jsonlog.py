@@ -0,0 +1,156 @@
+"""
+This module implements a log source reading the files of Docker's 'json-file' logging driver
+directly (usually /var/lib/docker/containers/<id>/<id>-json.log). Every line of these files is a
+record {"log": "...", "stream": "stdout", "time": "<RFC3339 Nano>"}. Files are memory-mapped and
+read from the exact byte offset where the previous read stopped, so no line is read twice or
+lost. Rotated files (<id>-json.log.1, .2, ...) are tracked by inode. Docker splits lines longer
+than 16 KiB into several records, only the last one ends with a line break; these partial records
+are joined into one line again.
+"""
+import json
+import mmap
+import os
+from pathlib import Path
+
+
+"""
+Constants
+"""
+LOG_PREFIX = b'{"log":"'
+STREAM_SEPARATOR = b'","stream":"'
+TIME_SEPARATOR = b'","time":"'
+RECORD_SUFFIX = b'"}'
+
+
+"""
+Helper Functions
+"""
+def parse_record(line: bytes) -> tuple[str, str, str] | None:
+    """
+    Parses one record of a json-file log. Docker always writes the keys in the order log, stream,
+    time, which allows to slice the fields directly. Only messages containing escape sequences
+    have to be decoded by the JSON parser; records in any other form fall back to it entirely.
+
+    Returns:
+        tuple: message, stream and time of the record, None if the line is no valid record
+    """
+    if line.startswith(LOG_PREFIX) and line.endswith(RECORD_SUFFIX):
+        time_position = line.rfind(TIME_SEPARATOR)
+        stream_position = line.rfind(STREAM_SEPARATOR, 0, time_position)
+        if time_position > 0 and stream_position > 0:
+            raw_message = line[len(LOG_PREFIX):stream_position]
+            if b"\\" in raw_message: # escaped characters, e.g. \n or \"
+                message = json.loads(b'"' + raw_message + b'"')
+            else:
+                message = raw_message.decode("utf-8", errors="replace")
+            stream = line[stream_position + len(STREAM_SEPARATOR):time_position].decode("ascii", errors="replace")
+            time = line[time_position + len(TIME_SEPARATOR):-len(RECORD_SUFFIX)].decode("ascii", errors="replace")
+            return message, stream, time
+    try: # slow path
+        record = json.loads(line)
+        return record["log"], record.get("stream", ""), record["time"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def read_lines(file, offset: int, partials: dict | None = None) -> tuple[list[str], int]:
+    """
+    Reads the complete records of a json-file log starting at the given byte offset. An incomplete
+    record at the end of the file (still being written) is left for the next read. Partial records
+    (messages without trailing line break) are collected in partials until the record completing
+    the line arrives, possibly in a later read or in the next file after a rotation.
+
+    Args:
+        file: log file opened in binary mode
+        offset (int): byte offset to start at
+        partials (dict): stream -> (time of the first part, list of parts) of unfinished lines,
+                         updated in place
+
+    Returns:
+        tuple: log lines in the form "<time> <message>" (like 'docker logs --timestamps') and the
+               byte offset after the last complete record
+    """
+    lines = []
+    partials = {} if partials is None else partials
+    size = os.fstat(file.fileno()).st_size
+    if size < offset: # file was truncated, start over
+        offset = 0
+        partials.clear()
+    if size <= offset:
+        return lines, offset
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = offset
+        while True:
+            end = mapped.find(b"\n", position, size)
+            if end < 0:
+                break # incomplete record
+            record = parse_record(mapped[position:end])
+            position = end + 1
+            if record is None:
+                continue
+            message, stream, time = record
+            if not message.endswith("\n"): # part of a long line, continued by the next record of the stream
+                partials.setdefault(stream, (time, []))[1].append(message)
+                continue
+            if stream in partials:
+                time, parts = partials.pop(stream)
+                message = "".join(parts) + message
+            message = message.rstrip("\n")
+            lines.append(f"{time} {message}")
+    return lines, position
+
+
+class JSONFileLogReader:
+    """
+    Reads container logs from the log directory of the Docker daemon. The reader remembers the
+    byte offset of every file it has read (by inode), so rotated files are continued where they
+    were left and new files are read from the start.
+    """
+    def __init__(self, root: str | Path = "/var/lib/docker/containers"):
+        self.root = Path(root)
+        self.offsets = {} # container id -> {inode: offset}
+        self.partials = {} # container id -> unfinished lines per stream (see read_lines)
+
+    def log_files(self, container_id: str) -> list[Path]:
+        """
+        Returns the uncompressed log files of a container, from the oldest to the newest
+        """
+        current = self.root / container_id / f"{container_id}-json.log"
+        rotated = []
+        for path in current.parent.glob(f"{current.name}.*"):
+            suffix = path.name[len(current.name) + 1:]
+            if suffix.isdigit(): # skip compressed rotations (.gz)
+                rotated.append((int(suffix), path))
+        files = [path for _, path in sorted(rotated, reverse=True)]
+        if current.exists():
+            files.append(current)
+        return files
+
+    def available(self, container_id: str) -> bool:
+        """
+        Tells if the log file of the container is accessible (container uses the json-file driver
+        and the log directory is mounted)
+        """
+        return os.access(self.root / container_id / f"{container_id}-json.log", os.R_OK)
+
+    def read(self, container_id: str) -> list[str]:
+        """
+        Reads all records written since the last call, oldest first
+
+        Returns:
+            list: log lines in the form "<time> <message>"
+        """
+        known = self.offsets.get(container_id, {})
+        partials = self.partials.setdefault(container_id, {})
+        offsets = {}
+        lines = []
+        for path in self.log_files(container_id):
+            try:
+                with open(path, "rb") as file:
+                    inode = os.fstat(file.fileno()).st_ino # of the opened file, even if it is rotated meanwhile
+                    new_lines, offset = read_lines(file, known.get(inode, 0), partials)
+            except FileNotFoundError: # rotated away before opening
+                continue
+            lines.extend(new_lines)
+            offsets[inode] = offset
+        self.offsets[container_id] = offsets # forget files that were removed by rotation
+        return lines
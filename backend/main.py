@@ -1,30 +1,175 @@
 import json
 import argparse
-from scanner import scanner
-from app import app
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+import signal
+import subprocess
+import sys
+import time
 
 
 CONFIG_FILE = "data/config.json"
+STARTUP_MODULES = ["app", "api", "data", "scanner", "ingest", "filters", "scheduler", "hosts", "profiling"] # modules imported on startup
+STARTUP_BUDGET = 1.0 # target for import and initialization time (seconds)
+
+def read_config() -> dict:
+    """
+    Reads the optional configuration file, returns an empty configuration if it does not exist
+    """
+    try:
+        with open(CONFIG_FILE, mode="r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+def profile_startup(num_modules: int = 15):
+    """
+    Reports the import time per module and the time needed to initialize each part of the
+    application. Import times are measured by the interpreter ('-X importtime') in a fresh process,
+    so modules already imported here do not distort the result.
+
+    Args:
+        num_modules (int): number of slowest modules to display
+    """
+    # Measure Import Times:
+    command = [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(STARTUP_MODULES)]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).parent)
+    imports = [] # list of (self time, cumulative time, module) in microseconds
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if not fields[0].isdigit():
+            continue # header line
+        imports.append((int(fields[0]), int(fields[1]), fields[2]))
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else "Import failed!")
+    import_total = sum(self_time for self_time, _, _ in imports) / 1e6
+
+    print(f"Slowest imports ({import_total:.3f} s in total):")
+    print(f"{'self [ms]':>10} {'cumulative [ms]':>16}  module")
+    for self_time, cumulative, module in sorted(imports, key=lambda item: item[0], reverse=True)[:num_modules]:
+        print(f"{self_time/1000:>10.1f} {cumulative/1000:>16.1f}  {module.strip()}")
+
+    # Measure Initialization Times:
+    # [INFO] Creating the Flask app happens while importing 'app' and is part of the import times.
+    def load_settings():
+        from data import get_settings
+        return get_settings().scanner_interval()
+    def create_scanner():
+        from scanner import get_scanner
+        return get_scanner()
+    def create_pipeline():
+        from scanner import get_scanner
+        return get_scanner().pipeline
+    def connect_docker():
+        from scanner import get_scanner
+        return get_scanner().client
+    steps = [("settings", load_settings), ("scanner", create_scanner), ("pipeline", create_pipeline)]
+    lazy_steps = [("docker client", connect_docker)] # done on first use, not part of the startup
+    init_total = 0.0
+    print("\r\nInitialization:")
+    for name, step in steps + lazy_steps:
+        start = time.perf_counter()
+        try:
+            step()
+            status = "ok"
+        except Exception as e:
+            status = f"failed ({type(e).__name__})"
+        duration = time.perf_counter() - start
+        if (name, step) in steps:
+            init_total += duration
+        print(f"{duration*1000:>10.1f} ms  {name} [{status}]")
+
+    # Summary:
+    total = import_total + init_total
+    verdict = "within" if total <= STARTUP_BUDGET else "EXCEEDS"
+    print(f"\r\nStartup: {total:.3f} s ({verdict} budget of {STARTUP_BUDGET:.1f} s)")
+
+def parse_datetime(text: str) -> datetime:
+    """
+    Parses an ISO 8601 date or datetime given on the command line. Times without timezone are UTC.
+    """
+    value = datetime.fromisoformat(text)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
 if __name__ == "__main__":
     # Parse Input Argument:
     parser = argparse.ArgumentParser(description="Error Scanner")
     parser.add_argument("--network", type=str, help="Name of the Docker network to listen to")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and initialization times and exit")
+    commands = parser.add_subparsers(dest="command")
+    backfill_parser = commands.add_parser("backfill", help="Ingest existing logs of containers or exported log files and exit")
+    backfill_parser.add_argument("--container", action="append", default=[], help="Name or ID of a container to backfill (repeatable)")
+    backfill_parser.add_argument("--file", action="append", default=[], help="Path of an exported log file to backfill (repeatable)")
+    backfill_parser.add_argument("--since", type=parse_datetime, help="Start of the time range for containers (ISO 8601, default: 14 days ago)")
+    backfill_parser.add_argument("--until", type=parse_datetime, help="End of the time range for containers (ISO 8601, default: now)")
+    backfill_parser.add_argument("--workers", type=int, help="Number of worker processes (default: number of CPUs)")
+    backfill_parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted backfill")
     args = parser.parse_args()
     network = args.network
-    
+
+    if args.profile_startup:
+        profile_startup()
+        sys.exit(0)
+
+    if args.command == "backfill":
+        if not args.container and not args.file:
+            backfill_parser.error("Give at least one --container or --file.")
+        from backfill import backfill
+        try:
+            backfill(files=args.file, containers=args.container, since=args.since, until=args.until,
+                     workers=args.workers, restart=args.restart)
+        except RuntimeError as e: # checkpoint of a different time range
+            print(e)
+            sys.exit(1)
+        except KeyboardInterrupt:
+            sys.exit(130)
+        sys.exit(0)
+
+    # Import Application:
+    # [INFO] Imports happen after parsing the arguments, so '--help' and the profile mode are fast.
+    from scanner import get_scanner
+    from app import app
+    from api import log_store, record_store
+    from data import get_settings
+    from notify import get_notifier
+
     # Read Configuration:
-    config = None
-    try:
-        file = open(CONFIG_FILE, mode="r")
-        config = json.load(file)
-    except FileNotFoundError as e:
-        config = {}
-    finally:
-        file.close()
+    config = read_config()
+    debug = bool(config.get("debug", False)) # debugger and reloader, for development only
+
+    # Find Serving Process:
+    # [INFO] In debug mode the reloader runs this script twice: a watching parent and the serving
+    # child (WERKZEUG_RUN_MAIN is set). Only the serving process scans and notifies, otherwise
+    # every entry would be stored and notified twice.
+    serving = not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+    # Read Scan Interval:
+    # [INFO] The settings store the interval in milliseconds, the scanner expects seconds.
+    interval = get_settings().scanner_interval() / 1000
+    reorder_window = get_settings().scanner_reorder_window() / 1000 # entries are merged into one timeline
+
+    # Start Notifier:
+    # [INFO] Without configured channels (settings: notifications.channels) nothing is notified.
+    notifier = get_notifier()
+    if serving and notifier.channels:
+        notifier.start()
+    else:
+        notifier = None
 
     # Start Scanner In The Background:
-    scanner.run(interval=config.get("interval"), network_name=network)
+    # [INFO] The scanner connects to the Docker daemon in its own thread, the web tier starts
+    # even if the daemon is not reachable (yet).
+    if serving:
+        get_scanner().run(interval=interval, network_name=network, log_store=log_store, record_store=record_store, notifier=notifier,
+                          reorder_window=reorder_window)
+
+    # Store Held Back Entries On Termination:
+    # [INFO] SIGTERM (e.g. 'docker stop') ends the process like an interpreter exit, so the
+    # timelines store the entries they hold back (see merge.TimelineMerge.start).
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
     # Start App at Desired Port:
-    app.run(host="0.0.0.0", port=config.get("port",5000), debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=config.get("port",5000), debug=debug)
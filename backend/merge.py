@@ -0,0 +1,190 @@
+"""
+This module implements the merge of the entries of all containers into one timeline. Every
+container delivers its entries in time order, but containers are scanned independently (and on
+different hosts), so their batches arrive interleaved and delayed. The merge keeps a queue per
+container and a heap of the queue heads (k-way merge), entries leave in global time order without
+ever sorting the whole timeline. Entries are held back for a bounded reorder window to wait for
+late batches of other containers.
+Held back entries only exist in memory. They are stored when the merge stops, including on a
+normal interpreter exit (atexit, e.g. SIGTERM handled by main.py or a restart of the reloader).
+If the process is killed (SIGKILL, crash), the entries of the last window (plus one TICK) are lost.
+"""
+import atexit
+from collections import deque
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Hashable
+
+
+"""
+Constants
+"""
+REORDER_WINDOW = 5.0 # time entries are held back to reorder late arrivals (seconds)
+TICK = 0.25 # how often held back entries are checked (seconds)
+
+
+class TimelineMerge:
+    """
+    Merges the time ordered batches of several sources (e.g. containers) into one time ordered
+    stream, which is handed to the sink in batches. An entry is released once it is older than the
+    newest entry seen minus the window (watermark), or at the latest 'window' seconds after it
+    arrived (together with all older entries, to keep the order). Entries arriving after newer
+    entries were released already (later than the window) are passed on immediately and counted
+    as late.
+    Entries are ordered by their timestamp, capped at their arrival (wall clock) plus the window.
+    A single entry dated into the future (e.g. a container with a wrong clock) therefore moves the
+    watermark at most to its arrival time, instead of releasing every later entry unordered.
+
+    Args:
+        sink (callable): receives the released entries in time order (list of dict)
+        window (float): reorder window in seconds
+        name (str): name of the background thread
+    """
+    def __init__(self, sink: Callable[[list[dict]], None], window: float = REORDER_WINDOW, name: str = "timeline"):
+        self.sink = sink
+        self.window = window
+        self.name = name
+        self.queues = {} # source -> deque of (timestamp, entry), timestamps capped (see push)
+        self.versions = {} # source -> version of its queue head in the heap
+        self.heap = [] # (timestamp, sequence, source, version) of the queue heads
+        self.arrivals = deque() # (arrival, newest timestamp) per batch, in arrival order
+        self.newest = None # newest timestamp seen
+        self.released = None # timestamp of the last released entry
+        self.counters = {"received": 0, "released": 0, "late": 0, "batches": 0}
+        self._sequence = itertools.count() # tie breaker of equal timestamps (keeps arrival order)
+        self._lock = threading.Condition()
+        self._sink_lock = threading.Lock() # keeps the batches handed to the sink in order
+        self._thread = None
+        self._running = False
+
+    def _push_head(self, source: Hashable):
+        """
+        Puts the head of the queue of the source into the heap. Older heap items of the source
+        become stale (see _release).
+        """
+        version = self.versions[source] = self.versions.get(source, 0) + 1
+        heapq.heappush(self.heap, (self.queues[source][0][0], next(self._sequence), source, version))
+
+    def push(self, source: Hashable, entries: list[dict]):
+        """
+        Adds a batch of entries of one source, ordered by their 'timestamp' (datetime with timezone)
+        """
+        if not entries:
+            return
+        arrival = time.monotonic()
+        limit = datetime.now(timezone.utc) + timedelta(seconds=self.window)
+        batch = [(min(entry["timestamp"], limit), entry) for entry in entries]
+        if any(batch[i][0] > batch[i + 1][0] for i in range(len(batch) - 1)):
+            batch.sort(key=lambda item: item[0]) # e.g. fuzzy timestamps, nearly sorted (linear)
+        with self._lock:
+            queue = self.queues.get(source)
+            if not queue:
+                queue = self.queues[source] = deque(batch)
+                self._push_head(source)
+            elif batch[0][0] >= queue[-1][0]: # usual case, batch continues the source
+                queue.extend(batch)
+            else: # overlapping batch, merge both (linear) and renew the head
+                head = queue[0][0]
+                queue = self.queues[source] = deque(heapq.merge(queue, batch, key=lambda item: item[0]))
+                if queue[0][0] != head:
+                    self._push_head(source)
+            self.counters["received"] += len(batch)
+            self.arrivals.append((arrival, batch[-1][0]))
+            if self.newest is None or batch[-1][0] > self.newest:
+                self.newest = batch[-1][0]
+            self._lock.notify()
+
+    def _release(self, force: bool = False) -> list[dict]:
+        """
+        Pops the entries due for release from the heap, in time order. Call with the lock held.
+        """
+        if self.newest is None:
+            return []
+        # Entries of batches which arrived a window ago are due, and so are all older entries.
+        cutoff = self.newest - timedelta(seconds=self.window) # watermark
+        deadline = time.monotonic() - self.window
+        while self.arrivals and (force or self.arrivals[0][0] <= deadline):
+            cutoff = max(cutoff, self.arrivals.popleft()[1])
+        released = []
+        while self.heap:
+            timestamp, _, source, version = self.heap[0]
+            if version != self.versions.get(source): # stale head (queue was merged)
+                heapq.heappop(self.heap)
+                continue
+            if not force and timestamp > cutoff:
+                break # the oldest held entry is not due, neither are the newer ones
+            queue = self.queues[source]
+            _, entry = queue[0]
+            heapq.heappop(self.heap)
+            queue.popleft()
+            if queue:
+                self._push_head(source)
+            else:
+                del self.queues[source], self.versions[source]
+            if self.released is not None and timestamp < self.released:
+                self.counters["late"] += 1
+            else:
+                self.released = timestamp
+            released.append(entry)
+        if released:
+            self.counters["released"] += len(released)
+            self.counters["batches"] += 1
+        return released
+
+    def flush(self, force: bool = False):
+        """
+        Hands the entries due for release to the sink (all entries if forced)
+        """
+        with self._sink_lock:
+            with self._lock:
+                released = self._release(force)
+            if released:
+                self.sink(released)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._running:
+                    self._lock.wait(TICK)
+                running = self._running
+            try:
+                self.flush(force=not running)
+            except Exception as e: # keep merging, e.g. if the disk is full
+                print(f"Failed to store merged entries of '{self.name}': {e}")
+            if not running:
+                return
+
+    def start(self):
+        """
+        Starts releasing entries in a background thread. Held back entries are stored on exit of
+        the interpreter, if the merge was not stopped before.
+        """
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Releases all held back entries and stops the thread
+        """
+        if self._thread is not None:
+            with self._lock:
+                self._running = False
+                self._lock.notify()
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.stop)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "held": sum(len(queue) for queue in self.queues.values()),
+                "sources": len(self.queues),
+                "window": self.window,
+            }
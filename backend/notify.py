@@ -0,0 +1,337 @@
+"""
+This module implements the notifications about new findings. The scanner hands its findings to
+the notifier through a bounded queue and never waits for it. The notifier coalesces findings of
+the same bug (or the same message template) within a time window into one group and passes the
+groups to its channels. Every channel delivers in its own thread and is rate limited: groups
+arriving while the limit is exhausted are sent together in one digest.
+"""
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from functools import cache
+import json
+import queue
+import smtplib
+import threading
+import time
+import urllib.request
+
+from ingest import template # groups findings by message template
+from scheduler import RateLimiter
+
+
+"""
+Constants
+"""
+QUEUE_SIZE = 1000 # findings waiting for the notifier
+CHANNEL_QUEUE_SIZE = 100 # groups waiting for delivery per channel
+WINDOW = 60.0 # time findings of the same group are coalesced (seconds)
+RATE = 6.0 # notifications per minute and channel
+CATEGORIES = ("Critical",) # categories notified by default
+
+
+"""
+Helper Functions
+"""
+def format_groups(groups: list[dict]) -> tuple[str, str]:
+    """
+    Formats a list of groups as human readable notification
+
+    Returns:
+        tuple: subject and body
+    """
+    total = sum(group["count"] for group in groups)
+    first = groups[0]
+    if len(groups) == 1:
+        subject = f"[{first['category']}] {first['count']}x {first['key']}"
+    else:
+        subject = f"{total} findings in {len(groups)} groups"
+    lines = []
+    for group in groups:
+        origin = ", ".join(sorted(group["sources"]))
+        if group["hosts"]:
+            origin += " on " + ", ".join(sorted(group["hosts"]))
+        lines.append(f"[{group['category']}] {group['count']}x from {origin} ({group['first_seen']} - {group['last_seen']})")
+        lines.append(f"    {group['sample']}")
+    return subject[:200], "\n".join(lines)
+
+
+"""
+Channels
+"""
+class Channel(ABC):
+    """
+    Base of all channels. Groups are queued and delivered in a background thread; subclasses
+    implement deliver(). If the rate limit of the channel is exhausted, groups are collected until
+    the next notification is allowed and sent as one digest.
+
+    Args:
+        name (str): name of the channel (used in logs and statistics)
+        rate (float): notifications per minute
+        burst (int): notifications allowed at once
+    """
+    def __init__(self, name: str, rate: float = RATE, burst: int = 1):
+        self.name = name
+        self.limiter = RateLimiter(rate=rate / 60, burst=burst)
+        self.queue = queue.Queue(maxsize=CHANNEL_QUEUE_SIZE)
+        self.counters = {"sent": 0, "groups": 0, "failed": 0, "dropped": 0}
+        self._thread = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+    @abstractmethod
+    def deliver(self, subject: str, body: str, groups: list[dict]):
+        """
+        Sends one notification (a single group or a digest), raises an exception if it failed
+        """
+
+    def put(self, group: dict):
+        try:
+            self.queue.put_nowait(group)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"notify-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put(None) # wakes up the thread
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            group = self.queue.get()
+            if group is None:
+                return
+            groups = [group]
+
+            # Respect Rate Limit:
+            # [INFO] While waiting for the limiter, further groups are collected into a digest.
+            stopping = False
+            while (wait := self.limiter.try_acquire()) > 0:
+                try:
+                    group = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    continue
+                if group is None: # deliver what is left before stopping
+                    stopping = True
+                    break
+                groups.append(group)
+
+            # Deliver:
+            subject, body = format_groups(groups)
+            try:
+                self.deliver(subject, body, groups)
+                self.counters["sent"] += 1
+                self.counters["groups"] += len(groups)
+            except Exception as e: # a failing receiver must not stop the channel
+                self.counters["failed"] += 1
+                print(f"Notification channel '{self.name}' failed: {e}")
+            if stopping:
+                return
+
+class WebhookChannel(Channel):
+    """
+    Posts notifications as JSON {"subject": ..., "text": ..., "groups": [...]} to a URL
+
+    Args:
+        url (str): address of the webhook
+        timeout (float): timeout of a request in seconds
+    """
+    def __init__(self, name: str, url: str, timeout: float = 10.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, subject: str, body: str, groups: list[dict]):
+        payload = {"subject": subject, "text": body, "groups": groups}
+        data = json.dumps(payload, default=list).encode("utf-8")
+        request = urllib.request.Request(self.url, data=data, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class SMTPChannel(Channel):
+    """
+    Sends notifications as emails
+
+    Args:
+        host (str): address of the mail server
+        port (int): port of the mail server
+        sender (str): address of the sender
+        recipients (list): addresses of the recipients
+        username (str): login name, None to send without login
+        password (str): login password
+        starttls (bool): upgrade the connection with STARTTLS
+        timeout (float): timeout of the connection in seconds
+    """
+    def __init__(self, name: str, host: str, port: int = 25, sender: str = "errorscanner@localhost", recipients: list[str] = None,
+                 username: str = None, password: str = None, starttls: bool = False, timeout: float = 10.0, **kwargs):
+        super().__init__(name, **kwargs)
+        assert recipients, "At least one recipient is required."
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def deliver(self, subject: str, body: str, groups: list[dict]):
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password or "")
+            server.send_message(message)
+
+CHANNEL_TYPES = {"webhook": WebhookChannel, "smtp": SMTPChannel}
+
+
+"""
+Notifier
+"""
+class Notifier:
+    """
+    Coalesces findings into groups and hands finished groups to the channels. Findings of the same
+    bug (bug_id) or with the same message template form a group. A group is finished 'window'
+    seconds after its first finding.
+
+    Args:
+        channels (list): channels to notify
+        window (float): time findings are coalesced in seconds
+        categories (tuple): categories of findings to notify about (e.g. "Critical")
+    """
+    def __init__(self, channels: list[Channel], window: float = WINDOW, categories: tuple = CATEGORIES, queue_size: int = QUEUE_SIZE):
+        self.channels = channels
+        self.window = window
+        self.categories = set(categories)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.groups = {} # key -> group
+        self.counters = {"received": 0, "dropped": 0, "groups": 0}
+        self._thread = None
+
+    def submit(self, findings: list[dict]):
+        """
+        Hands findings to the notifier without blocking. Findings of other categories are ignored,
+        findings not fitting into the queue are dropped (and counted).
+        """
+        for finding in findings:
+            if finding.get("category") not in self.categories:
+                continue
+            try:
+                self.queue.put_nowait(finding)
+                self.counters["received"] += 1
+            except queue.Full:
+                self.counters["dropped"] += 1
+
+    def _add(self, finding: dict):
+        bug_id = finding.get("bug_id")
+        key = f"bug {bug_id}" if bug_id is not None else template(finding["message"])
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {
+                "key": key,
+                "bug_id": bug_id,
+                "category": finding["category"],
+                "sample": finding["message"],
+                "count": 0,
+                "sources": set(),
+                "hosts": set(),
+                "first_seen": finding["timestamp"],
+                "deadline": time.monotonic() + self.window,
+            }
+        group["count"] += 1
+        group["sources"].add(finding.get("source"))
+        if finding.get("host"):
+            group["hosts"].add(finding["host"])
+        group["last_seen"] = finding["timestamp"]
+
+    def _flush(self, force: bool = False):
+        now = time.monotonic()
+        for key, group in list(self.groups.items()):
+            if force or group["deadline"] <= now:
+                del self.groups[key]
+                group = {field: value for field, value in group.items() if field != "deadline"}
+                self.counters["groups"] += 1
+                for channel in self.channels:
+                    channel.put(group)
+
+    def _run(self):
+        while True:
+            timeout = min((group["deadline"] for group in self.groups.values()), default=time.monotonic() + self.window) - time.monotonic()
+            try:
+                finding = self.queue.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                finding = False
+            if finding is None: # stop
+                self._flush(force=True)
+                return
+            if finding:
+                self._add(finding)
+            self._flush()
+
+    def start(self):
+        """
+        Starts the notifier and its channels in background threads
+        """
+        if self._thread is None:
+            for channel in self.channels:
+                channel.start()
+            self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Sends the open groups and stops all threads
+        """
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+            for channel in self.channels:
+                channel.stop()
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "queued": self.queue.qsize(),
+            "open_groups": len(self.groups),
+            "channels": {channel.name: {**channel.counters, "queued": channel.queue.qsize()} for channel in self.channels},
+        }
+
+
+def load_notifier(settings) -> Notifier:
+    """
+    Creates the notifier configured in the settings (notifications.channels). Every channel is a
+    dictionary with its 'type' ("webhook" or "smtp"), a 'name', its 'rate' (per minute) and the
+    arguments of the channel class.
+    """
+    channels = []
+    for number, entry in enumerate(settings.notifications_channels()):
+        entry = dict(entry)
+        kind = entry.pop("type", None)
+        if kind not in CHANNEL_TYPES:
+            raise ValueError(f"Unknown notification channel type '{kind}'. Use one of: {', '.join(CHANNEL_TYPES)}")
+        name = entry.pop("name", f"{kind}-{number}")
+        channels.append(CHANNEL_TYPES[kind](name, **entry))
+    categories = [category.capitalize() for category in settings.notifications_categories()]
+    # [INFO] The settings store the window in milliseconds (like the scanner intervals).
+    return Notifier(channels, window=settings.notifications_window() / 1000, categories=categories)
+
+@cache
+def get_notifier() -> Notifier:
+    """
+    Returns the notifier of the application, created from the settings on first use
+    """
+    from data import get_settings
+    return load_notifier(get_settings())
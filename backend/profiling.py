@@ -0,0 +1,288 @@
+"""
+This module implements on-demand profiling of the scanner. The profiler is armed for the next N
+scan cycles (one cycle is the scan of one container). While armed, every cycle is measured with
+per-stage timers (fetch, decode, parse, classify, match, store) and optionally with cProfile, a
+statistical stack sampler (flamegraph output) and tracemalloc snapshots. When the profiler is not
+armed, the scanner only checks one attribute per cycle. Cycles of all host threads keep running
+concurrently while profiling, so the measurements include no waits caused by the profiler.
+"""
+from contextlib import contextmanager, nullcontext
+from functools import cache
+import marshal
+import pickle
+import sys
+import threading
+import time
+
+
+"""
+Constants
+"""
+STAGES = ("fetch", "decode", "parse", "classify", "match", "store")
+SAMPLE_INTERVAL = 0.005 # time between two stack samples (seconds)
+MEMORY_FRAMES = 25 # frames stored per allocation by tracemalloc
+MEMORY_TOP = 30 # number of allocation sites in the memory report
+_NO_STAGE = nullcontext()
+
+
+"""
+Helper Functions
+"""
+def no_stage(name: str):
+    """
+    Stand-in for Probe.stage when the profiler is off
+    """
+    return _NO_STAGE
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class Probe:
+    """
+    Measurements of one scan cycle
+    """
+    def __init__(self, number: int):
+        self.number = number
+        self.stages = dict.fromkeys(STAGES, 0.0) # stage -> seconds
+        self.start = time.perf_counter()
+        self.duration = None
+        self.profile = None # cProfile.Profile of this cycle
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def wrap(self, name: str, function):
+        """
+        Returns a version of the function that adds its run time to the given stage
+        """
+        stages = self.stages
+        clock = time.perf_counter
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stages[name] += clock() - start
+        return timed
+
+
+class Profiler:
+    """
+    Collects the probes of the cycles of one profiling session. Cycles are never delayed by the
+    profiler: stage timers and stack samples cover every cycle of every thread, cProfile only runs
+    in one cycle at a time (the interpreter allows one active profiler) and cycles starting
+    meanwhile are measured without it (see session "profiled").
+    """
+    def __init__(self):
+        self.armed = False # checked by the scanner before every cycle
+        self.session = None
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock() # held by the cycle running cProfile, never waited for
+        self._remaining = 0
+        self._stats = None # pstats.Stats of all cycles
+        self._samples = {} # folded stack -> number of samples
+        self._sampled_threads = set()
+        self._sampler = None
+        self._memory_start = None
+        self._memory_end = None
+        self._memory_started = False # tracemalloc was started by the profiler
+
+    def arm(self, cycles: int, cpu: bool = True, memory: bool = False) -> dict:
+        """
+        Starts a profiling session for the next cycles. Results of the previous session are
+        discarded.
+
+        Args:
+            cycles (int): number of cycles to profile
+            cpu (bool): profile with cProfile and sample stacks for a flamegraph
+            memory (bool): take tracemalloc snapshots before and after the session
+
+        Returns:
+            dict: status of the new session
+        """
+        assert isinstance(cycles, int) and cycles > 0, f"Number of cycles has to be a positive integer. It is {cycles}."
+        with self._lock:
+            if self.armed:
+                raise RuntimeError("A profiling session is already running.")
+            self.session = {
+                "cycles": cycles, "cpu": cpu, "memory": memory, "done": 0, "profiled": 0,
+                "started": time.time(), "finished": None,
+                "stages": {stage: {"total": 0.0, "max": 0.0} for stage in STAGES},
+                "durations": [],
+            }
+            self._remaining = cycles
+            self._stats = None
+            self._samples = {}
+            self._memory_start = self._memory_end = None
+            if memory:
+                import tracemalloc
+                self._memory_started = not tracemalloc.is_tracing()
+                if self._memory_started:
+                    tracemalloc.start(MEMORY_FRAMES)
+                self._memory_start = tracemalloc.take_snapshot()
+            if cpu:
+                self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self.armed = True
+            if self._sampler is not None:
+                self._sampler.start()
+            return self._status()
+
+    def disarm(self):
+        """
+        Ends the running session after the current cycle
+        """
+        with self._lock:
+            if self.armed:
+                self._finish()
+
+    def begin(self) -> Probe | None:
+        """
+        Starts the measurement of a cycle
+
+        Returns:
+            Probe: probe of the cycle, None if the session already has enough cycles
+        """
+        with self._lock:
+            if self._remaining <= 0:
+                return None
+            self._remaining -= 1
+            number = self.session["cycles"] - self._remaining
+            cpu = self.session["cpu"]
+        probe = Probe(number)
+        if cpu:
+            self._sampled_threads.add(threading.get_ident())
+            if self._profile_lock.acquire(blocking=False):
+                import cProfile
+                probe.profile = cProfile.Profile()
+                try:
+                    probe.profile.enable()
+                except ValueError: # another profiler is active (e.g. a debugger)
+                    probe.profile = None
+                    self._profile_lock.release()
+        return probe
+
+    def end(self, probe: Probe):
+        """
+        Ends the measurement of a cycle and adds it to the session
+        """
+        if probe.profile is not None:
+            probe.profile.disable()
+            self._profile_lock.release()
+        self._sampled_threads.discard(threading.get_ident())
+        probe.duration = time.perf_counter() - probe.start
+        with self._lock:
+            if self.session is None or not self.armed:
+                return # session was disarmed meanwhile
+            if probe.profile is not None:
+                import pstats
+                if self._stats is None:
+                    self._stats = pstats.Stats(probe.profile)
+                else:
+                    self._stats.add(probe.profile)
+                self.session["profiled"] += 1
+            for stage, seconds in probe.stages.items():
+                totals = self.session["stages"][stage]
+                totals["total"] += seconds
+                totals["max"] = max(totals["max"], seconds)
+            self.session["durations"].append(probe.duration)
+            self.session["done"] += 1
+            if self.session["done"] >= self.session["cycles"]:
+                self._finish()
+
+    def _finish(self):
+        self.armed = False
+        self._remaining = 0
+        self.session["finished"] = time.time()
+        if self.session["memory"]:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self._memory_end = tracemalloc.take_snapshot()
+            if self._memory_started:
+                tracemalloc.stop()
+                self._memory_started = False
+        self._sampler = None # stops with the session
+
+    def _sample(self):
+        """
+        Records the stacks of the threads running profiled cycles (statistical profiler)
+        """
+        while self.armed:
+            frames = sys._current_frames()
+            for ident in list(self._sampled_threads):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if stack:
+                    folded = ";".join(reversed(stack))
+                    self._samples[folded] = self._samples.get(folded, 0) + 1
+            time.sleep(SAMPLE_INTERVAL)
+
+    def status(self) -> dict:
+        """
+        Returns the state of the current (or last) session with the times of every stage
+        """
+        with self._lock:
+            return self._status()
+
+    def _status(self) -> dict:
+        if self.session is None:
+            return {"armed": False, "session": None}
+        session = {**self.session, "stages": {stage: dict(times) for stage, times in self.session["stages"].items()}}
+        durations = session.pop("durations")
+        session["cycle_total"] = sum(durations)
+        session["cycle_max"] = max(durations, default=0.0)
+        return {"armed": self.armed, "session": session}
+
+    def pstats_data(self) -> bytes | None:
+        """
+        Returns the cProfile results in the format of pstats files (load with pstats.Stats(filename)
+        or visualize with tools like snakeviz)
+        """
+        with self._lock:
+            if self._stats is None:
+                return None
+            return marshal.dumps(self._stats.stats)
+
+    def folded_stacks(self) -> str | None:
+        """
+        Returns the stack samples in the folded format of flamegraph.pl and speedscope
+        """
+        samples = dict(self._samples) # the sampler might still be adding samples
+        if not samples:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+    def memory_report(self) -> str | None:
+        """
+        Returns the allocation sites that grew the most during the session
+        """
+        if self._memory_start is None or self._memory_end is None:
+            return None
+        differences = self._memory_end.compare_to(self._memory_start, "lineno")
+        return "\n".join(str(difference) for difference in differences[:MEMORY_TOP]) + "\n"
+
+    def memory_snapshot(self) -> bytes | None:
+        """
+        Returns the tracemalloc snapshot taken after the session (load with pickle or
+        tracemalloc.Snapshot.load)
+        """
+        if self._memory_end is None:
+            return None
+        return pickle.dumps(self._memory_end)
+
+
+@cache
+def get_profiler() -> Profiler:
+    """
+    Returns the profiler of the application
+    """
+    return Profiler()
@@ -0,0 +1,257 @@
+"""
+This module implements a fixed-capacity ring buffer of the most recent log items. Items are kept
+in a compact form instead of dictionaries: timestamps, categories, sources and hosts are stored
+in parallel arrays (sources and hosts as indices into tables of names), IDs as raw bytes and
+messages as interned strings, so repeating messages share a single string object. Reading the
+buffer needs no I/O, which makes it suitable for first result pages and the live tail.
+Items read from the buffer equal the items written (as stored in the file): values that do not
+fit the compact form (e.g. IDs other than UUIDs, timestamps in another notation) are kept as they
+are and missing fields stay missing.
+"""
+from array import array
+from datetime import datetime, timedelta, timezone
+import sys
+import threading
+
+
+"""
+Constants
+"""
+CATEGORIES = ("Critical", "Error", "Warning", "Info", "Debug")
+UNKNOWN_CATEGORY = len(CATEGORIES) # index of categories not in the list (kept in the extras)
+CATEGORY_VALUES = (*CATEGORIES, None) # category per index, the actual value of UNKNOWN_CATEGORY is in the extras
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ID_SIZE = 16 # bytes of a UUID in hex form
+BASE_FIELDS = ("id", "timestamp", "category", "source", "message", "host")
+FIELD_BITS = {field: 1 << index for index, field in enumerate(BASE_FIELDS)} # bits of missing fields
+
+
+class LogRing:
+    """
+    Ring buffer holding the last 'capacity' log items. Every appended item gets a sequence number
+    (counting from 1), which readers use as a cursor to fetch only newer items.
+
+    Args:
+        capacity (int): maximum number of items kept, older items are overwritten
+    """
+    __slots__ = ("capacity", "sequence", "_timestamps", "_offsets", "_categories", "_sources", "_hosts", "_ids",
+                 "_missing", "_messages", "_extras", "_names", "_name_index", "_name_counts", "_free_names", "_condition")
+
+    def __init__(self, capacity: int = 10000):
+        assert isinstance(capacity, int) and capacity > 0, f"Capacity has to be a positive integer. It is {capacity}."
+        self.capacity = capacity
+        self.sequence = 0 # sequence number of the newest item
+        self._timestamps = array("q", bytes(8 * capacity)) # microseconds since epoch (UTC)
+        self._offsets = array("h", bytes(2 * capacity)) # UTC offset of the timestamps in minutes
+        self._categories = array("B", bytes(capacity)) # index into CATEGORIES
+        self._sources = array("I", bytes(4 * capacity)) # index into _names
+        self._hosts = array("I", bytes(4 * capacity)) # index into _names, 0 if none
+        self._ids = bytearray(ID_SIZE * capacity)
+        self._missing = array("B", bytes(capacity)) # bits of the base fields missing in the item (FIELD_BITS)
+        self._messages = [None] * capacity # interned strings
+        self._extras = [None] * capacity # remaining fields (e.g. bug_id, solution) or None
+        self._names = [None] # table of source and host names, index 0 means "none"
+        self._name_index = {}
+        self._name_counts = [0] # number of slots using each name
+        self._free_names = [] # indices of names no longer used
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return min(self.sequence, self.capacity)
+
+    def _name_id(self, name: str | None) -> int:
+        """
+        Returns the index of the name in the table of names and counts one more use of it
+        """
+        if name is None:
+            return 0
+        index = self._name_index.get(name)
+        if index is None:
+            name = sys.intern(name)
+            if self._free_names:
+                index = self._free_names.pop()
+                self._names[index] = name
+            else:
+                index = len(self._names)
+                self._names.append(name)
+                self._name_counts.append(0)
+            self._name_index[name] = index
+        self._name_counts[index] += 1
+        return index
+
+    def _release_name(self, index: int):
+        """
+        Counts one use of the name less, names no longer used are removed from the table
+        """
+        if index == 0:
+            return
+        self._name_counts[index] -= 1
+        if self._name_counts[index] == 0:
+            del self._name_index[self._names[index]]
+            self._names[index] = None
+            self._free_names.append(index)
+
+    def _put(self, item: dict):
+        slot = self.sequence % self.capacity
+        if self.sequence >= self.capacity: # overwrite the oldest item
+            self._release_name(self._sources[slot])
+            self._release_name(self._hosts[slot])
+        extras = {key: value for key, value in item.items() if key not in BASE_FIELDS}
+        missing = 0
+        for field in BASE_FIELDS:
+            if field not in item:
+                missing |= FIELD_BITS[field]
+
+        # Timestamp:
+        # [INFO] Timestamps are stored as UTC with their original offset. Timestamps which would
+        # not be written the same way again (e.g. "Z" suffix, other precision) are kept as they are.
+        timestamp = item.get("timestamp")
+        try:
+            value = datetime.fromisoformat(timestamp)
+            offset = value.utcoffset()
+            if offset is None or offset % timedelta(minutes=1) or value.isoformat() != timestamp:
+                raise ValueError("not stored compactly")
+            delta = value - EPOCH
+            self._timestamps[slot] = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+            self._offsets[slot] = offset // timedelta(minutes=1)
+        except (TypeError, ValueError):
+            self._timestamps[slot] = 0
+            self._offsets[slot] = 0
+            if "timestamp" in item:
+                extras["timestamp"] = timestamp
+
+        # Category:
+        category = item.get("category")
+        try:
+            self._categories[slot] = CATEGORIES.index(category)
+        except ValueError:
+            self._categories[slot] = UNKNOWN_CATEGORY
+            if "category" in item:
+                extras["category"] = category
+
+        # ID:
+        # [INFO] Items created by the ingest pipeline have UUIDs in hex form (32 characters), which
+        # are stored as 16 raw bytes. Other IDs are kept in the extras.
+        identifier = item.get("id")
+        try:
+            raw = bytes.fromhex(identifier)
+            if len(raw) != ID_SIZE or raw.hex() != identifier: # e.g. upper case is not restored
+                raise ValueError("not a UUID in hex form")
+            self._ids[slot * ID_SIZE:(slot + 1) * ID_SIZE] = raw
+        except (TypeError, ValueError):
+            if "id" in item:
+                extras["id"] = identifier
+
+        self._sources[slot] = self._name_id(item.get("source"))
+        self._hosts[slot] = self._name_id(item.get("host"))
+        message = item.get("message")
+        self._messages[slot] = sys.intern(message) if isinstance(message, str) else message
+        self._missing[slot] = missing
+        self._extras[slot] = extras or None
+        self.sequence += 1
+
+    def _get(self, sequence: int) -> dict:
+        slot = (sequence - 1) % self.capacity
+        extras = self._extras[slot] or {}
+        if "timestamp" in extras:
+            timestamp = extras["timestamp"]
+        else:
+            offset = timezone(timedelta(minutes=self._offsets[slot])) if self._offsets[slot] else timezone.utc
+            timestamp = (EPOCH + timedelta(microseconds=self._timestamps[slot])).astimezone(offset).isoformat()
+        item = {
+            "id": extras["id"] if "id" in extras else self._ids[slot * ID_SIZE:(slot + 1) * ID_SIZE].hex(),
+            "timestamp": timestamp,
+            "category": extras["category"] if "category" in extras else CATEGORY_VALUES[self._categories[slot]],
+            "source": self._names[self._sources[slot]],
+            "message": self._messages[slot],
+            "host": self._names[self._hosts[slot]],
+        }
+        missing = self._missing[slot]
+        if missing:
+            for field, bit in FIELD_BITS.items():
+                if missing & bit:
+                    del item[field]
+        for key, value in extras.items():
+            if key not in item:
+                item[key] = value
+        return item
+
+    def extend(self, items: list[dict]):
+        """
+        Appends the given items (oldest first) and wakes up readers waiting for new items
+        """
+        with self._condition:
+            for item in items:
+                self._put(item)
+            self._condition.notify_all()
+
+    def tail(self, num_items: int | None = None) -> list[dict]:
+        """
+        Returns the last num_items items, oldest first (all buffered items if None)
+        """
+        with self._condition:
+            num_items = len(self) if not num_items else min(num_items, len(self))
+            return [self._get(sequence) for sequence in range(self.sequence - num_items + 1, self.sequence + 1)]
+
+    def since(self, cursor: int | None, limit: int | None = None) -> tuple[list[dict], int]:
+        """
+        Returns the items appended after the given sequence number. Items already overwritten are
+        skipped.
+
+        Args:
+            cursor (int): sequence number of the last item the reader has seen (0 for none), None
+                          to get the last 'limit' items
+            limit (int): maximum number of items to return, None for all
+
+        Returns:
+            tuple: items oldest first and the cursor to use for the next call
+        """
+        with self._condition:
+            if cursor is None: # start a new tail
+                cursor = max(0, self.sequence - limit) if limit is not None else 0
+            elif cursor > self.sequence: # cursor of an earlier process, start over
+                cursor = 0
+            first = max(cursor + 1, self.sequence - len(self) + 1)
+            last = self.sequence if limit is None else min(self.sequence, first + limit - 1)
+            return [self._get(sequence) for sequence in range(first, last + 1)], max(cursor, last)
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """
+        Blocks until items after the given sequence number are appended or the timeout expires
+
+        Returns:
+            bool: True if new items are available
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.sequence > cursor, timeout=timeout)
+
+    def memory_usage(self) -> dict:
+        """
+        Returns the memory footprint of the buffer in bytes. Messages are counted once per distinct
+        string object, as repeating messages share their interned string.
+
+        Returns:
+            dict: number of items, capacity and bytes used by each part and in total
+        """
+        with self._condition:
+            arrays = sum(part.itemsize * len(part) for part in (self._timestamps, self._offsets, self._categories, self._sources,
+                                                                self._hosts, self._missing))
+            ids = len(self._ids)
+            distinct = {id(message): message for message in self._messages if message is not None}
+            messages = sys.getsizeof(self._messages) + sum(sys.getsizeof(message) for message in distinct.values())
+            extras = sys.getsizeof(self._extras) + sum(sys.getsizeof(extra) for extra in self._extras if extra is not None)
+            names = (sys.getsizeof(self._names) + sys.getsizeof(self._name_index) + sys.getsizeof(self._name_counts)
+                     + sum(sys.getsizeof(name) for name in self._names if name))
+            usage = {
+                "items": len(self),
+                "capacity": self.capacity,
+                "distinct_messages": len(distinct),
+                "names_used": len(self._name_index),
+                "arrays": arrays,
+                "ids": ids,
+                "messages": messages,
+                "extras": extras,
+                "names": names,
+            }
+            usage["total"] = arrays + ids + messages + extras + names
+            return usage
@@ -1,13 +1,27 @@
-import docker
+from __future__ import annotations # annotations refer to lazily imported modules (docker)
+from functools import cache
 import re
-from dateutil import parser
 import json
 from datetime import datetime, timedelta
 import time
 import os
 import threading
-import docker.models
-import docker.models.containers
+import traceback
+from typing import TYPE_CHECKING
+from data import LogStore, get_settings
+from filters import ContainerFilter
+from hosts import DockerEndpoint, load_endpoints
+from jsonlog import JSONFileLogReader
+from merge import REORDER_WINDOW, TimelineMerge
+from profiling import get_profiler, no_stage
+from ingest import ERROR_REGEX, WARNING_REGEX, MULTILINE_THRESHOLD, RECORDED_CAPACITY, parse_docker_timestamp, parse_fuzzy_timestamp, serialize
+from scheduler import RateLimiter, ScanScheduler
+
+if TYPE_CHECKING:
+    import docker
+    import docker.models.containers
+    from ingest import IngestPipeline
+    from notify import Notifier
 
 def find_errors_warnings(logs):
     """Finds error and warning messages in logs.
@@ -22,8 +36,9 @@ def find_errors_warnings(logs):
             - message: The log line containing the error or warning.
             - timestamp: A datetime object, or None if no timestamp was found.
     """
-    error_regex = re.compile(r'(error|exception|critical|fail|err)', re.IGNORECASE)
-    warning_regex = re.compile(r'(warning|warn)', re.IGNORECASE)
+    from dateutil import parser # imported on demand, slow to import
+    error_regex = ERROR_REGEX
+    warning_regex = WARNING_REGEX
     results = []
     for line in logs:
         timestamp = None
@@ -68,58 +83,81 @@ def compare_to_known_bugs(findings, known_bugs):
 
 
 class Scanner():
-    def __init__(self, bugs: str = "bugs.json", whitelist: str = "Whitelist.txt", blacklist: str = "Blacklist.txt"):
+    MIN_INTERVAL = 1.0 # shortest scan interval of a container producing errors (seconds)
+    MAX_INTERVAL = 300.0 # longest scan interval of an idle container (seconds)
+    POLL_STEP = 1.0 # longest uninterrupted sleep of the main loop (seconds)
+    FILTER_REFRESH = 5.0 # how often the filter lists are checked for changes (seconds)
+    UNIVERSE_REFRESH = 60.0 # how often the containers of the networks are listed again (seconds)
+
+    def __init__(self, bugs: str = "bugs.json", whitelist: str = "Whitelist.txt", blacklist: str = "Blacklist.txt",
+                 log_dir: str = None, endpoints: list[DockerEndpoint] = None):
         # Initialize Properties:
         self.bugs_filename = bugs
         self.whitelist_filename = whitelist
         self.blacklist_filename = blacklist
+        self.filter = ContainerFilter(whitelist, blacklist)
+        self.log_reader = JSONFileLogReader(log_dir) if log_dir else None # read json-file logs directly if mounted
         self.loop = True
-
-        # Initialize Docker Client:
-        host = os.environ.get("DOCKER_HOST")
-        if not host:
-            raise RuntimeWarning(f"Environment variable 'DOCKER_HOST' is not set. Make sure it points to your Docker daemon. If you are using Docker Desktop for example: 'unix:///home/<user>/.docker/desktop/docker.sock'.")
-        try:
-            docker.from_env()
-        except docker.errors.DockerException:
-            host = os.environ.get("DOCKER_HOST")
-            raise RuntimeError(f"Could not initialize the docker client!\r\n" \
-                f"Check the environment variable 'DOCKER_HOST' points to your Docker daemon.\r\n" \
-                f"DOCKER_HOST = '{host}'")
-
-    @staticmethod
-    def _load_list(filename: str) -> set[str]:
+        # [INFO] The Docker endpoints, their clients and the ingest pipeline are created on first use,
+        # so constructing the scanner is cheap and does not need a reachable Docker daemon.
+        self._endpoints = endpoints
+        self._pipeline = None
+        self._ingest_lock = threading.Lock() # the pipeline and the stores are shared by all hosts
+        self.notifier = None # set by main()
+        self.timelines = {} # store name -> merge of the entries of all containers, set by main()
+        self.profiler = get_profiler() # armed through the admin API
+
+    @property
+    def endpoints(self) -> list[DockerEndpoint]:
+        """
+        Docker endpoints to watch (see hosts.load_endpoints). Raises a RuntimeWarning if none is configured.
         """
-        Reads the given file and returns a set containing every line, with no duplicates
+        if self._endpoints is None:
+            self._endpoints = load_endpoints(get_settings())
+        return self._endpoints
 
-        Args:
-            filename (str): path of the file to read
+    @property
+    def client(self) -> docker.DockerClient:
+        """
+        Docker client of the first (usually local) endpoint, connected on first use. Raises a
+        RuntimeWarning if no endpoint is configured and a RuntimeError if the daemon cannot be reached.
+        """
+        return self.endpoints[0].client
 
-        Returns:
-            set: set of lines without duplicates, empty if the file was not found
+    @property
+    def pipeline(self) -> IngestPipeline:
         """
-        try:
-            file = open(filename, 'r')
-            return {line.strip() for line in file if line.strip()}
-        except FileNotFoundError:
-            return set() # empty set
+        Ingest pipeline, created on first use (loads the settings and compiles the known bugs)
+        """
+        if self._pipeline is None:
+            from ingest import IngestPipeline
+            self._pipeline = IngestPipeline(get_settings(), bugs_filename=self.bugs_filename)
+        return self._pipeline
 
     @staticmethod
-    def _get_container_logs(container: docker.models.containers.Container, since: datetime = None) -> list[str]:
+    def _get_container_logs(container: docker.models.containers.Container, since: datetime = None, stage=no_stage) -> list[str]:
         """
         Retrieves logs from a container, optionally since a specific time. Get logs since the last 
-        seen timestamp, or all logs if no timestamp yet.
+        seen timestamp, or all logs if no timestamp yet. Connection errors are raised, so the health
+        of the host can be tracked.
 
         Args:
             container: container object to read from
             since: A datetime object indicating the start time for the logs. If None, retrieves all logs.
+            stage: timer of the fetch and decode stages while profiling (see profiling.Probe.stage)
 
         Returns:
             A list of log lines (strings). Returns an empty list on error.
         """
+        import docker
+        import requests
         try:
-            logs = container.logs(stream=False, timestamps=True, since=since).decode('utf-8')
-            return logs.splitlines()
+            with stage("fetch"):
+                data = container.logs(stream=False, timestamps=True, since=since)
+            with stage("decode"):
+                return data.decode('utf-8').splitlines()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            raise # host is not reachable
         except docker.errors.APIError as e:
             print(f"Error retrieving logs for {container.id}: {e}")
             return []
@@ -142,29 +180,11 @@ class Scanner():
         logs = []
         for line in lines:
             # Parse Timestamp:
-            # [INFO]
-            # Docker can automatically prepend timestamps to log messages. These timestamps follow
-            # the 'RFC3339 Nano' format (YYYY-MM-DDTHH:MM:SS.NNNNNNNNNZHH:MM), which cannot be
-            # parse by the dateutil.parser below. In this case we have to adjust the string so the
-            # parser can convert it. Because this format of timestamp at the start of the log message
-            # is likely generated by Docker and not part of the actual log message, it is removed.
-            timestamp = None
-
-            # Look For RFC3339 Nano Timestamp (generated by Docker):
-            match = re.search(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+Z(\d{2}:\d{2})?\s?", line)
-            if match:
-                # nanosecond part needs to be trimmed to microseconds
-                dirty_string = match.group(0)
-                parts = dirty_string.split('.')
-                microsecond_part = parts[1][:6]
-                cleaned_string = f"{parts[0]}.{microsecond_part}Z"
-                timestamp = parser.isoparse(cleaned_string)
-                old_line = line
-                line = line.replace(dirty_string, "") # remove timestamp generated by Docker
-            else:
-                try:
-                    timestamp = parser.parse(line, fuzzy=True)  # try to extract date
-                except Exception as e:
+            # [INFO] Timestamps generated by Docker are removed from the message (see parse_docker_timestamp).
+            timestamp, line = parse_docker_timestamp(line)
+            if timestamp is None:
+                timestamp = parse_fuzzy_timestamp(line) # try to extract date
+                if timestamp is None:
                     continue # skip, unable to parse
             
             # Merge Multiline Log Messages:
@@ -172,8 +192,7 @@ class Scanner():
             # Some log messages spread over multiple line (e.g. stack traces). They originally get
             # extracted as separate logs. We now merge them under the assumption their timestamps are
             # within the threshold.
-            TIME_THRESHOLD = timedelta(microseconds=80)
-            if logs and (timestamp - logs[-1]["timestamp"]) < TIME_THRESHOLD:
+            if logs and (timestamp - logs[-1]["timestamp"]) < MULTILINE_THRESHOLD:
                 logs[-1]["message"] += "\n" + line # append to existing log message
             else:
                 log = {"timestamp": timestamp, "type": "unknown", "message": line}
@@ -181,44 +200,14 @@ class Scanner():
             
         return logs
 
-    def main(self, interval: int = 60, network_name: str = None):
+    @staticmethod
+    def _find_networks(client: docker.DockerClient, network_name: str = None) -> set[str]:
         """
-        Runs a loop to read logs from the Docker containers on the watchlist. The watchlist is a list 
-        of Docker containers to read from (names or IDs). The watchlist can be filtered with 
-        the help of a whitelist and a blacklist. If the whitelist ist empty, all containers are 
-        automatically added to the watchlist. Containers on the blacklist are removed from the 
-        watchlist.
-        If a network name is given, only containers inside that network are considered for the 
-        watchlist. Filtering lists apply to containers inside the network. If no network name is given 
-        all containers on the system are considered. 
-
-        Args:
-            interval (int): scanning interval in seconds (typical 60 sec)
-            bugs_file (str): filename of a list of known bugs
-            network_name (str): name of a Docker network to scan
+        Returns the names of the networks to scan. If a network name is given, only this network is 
+        used. Otherwise all networks this container is part of are used (empty if not running 
+        inside a container of this host).
         """
-        # Type Checking:
-        assert isinstance(interval, int)
-        assert isinstance(network_name, str) or network_name is None 
-
-        # Read Filter Lists:
-        whitelist = self._load_list(self.whitelist_filename)
-        blacklist = self._load_list(self.blacklist_filename)
-        shared_items = whitelist & blacklist
-        if shared_items: # share items between whitelist and blacklists is bad practive
-            error_message = "Whitelist and Blacklist share items, which is bad practice:"
-            for item in shared_items:
-                error_message = f"\r\n{item}"
-            raise RuntimeError(error_message) # inform user about which filter items are shared
-        
-        # Initalize Docker Client:
-        try:
-            client = docker.from_env()
-        except docker.errors.DockerException:
-            print(f"Could not connect to docker daemon!")
-            return
-        
-        # Find Docker Network(s):
+        import docker
         network_names = set()
         if network_name: # network is given, only use this network
             network_names.add(network_name)
@@ -239,8 +228,18 @@ class Scanner():
                     for network_name in network_settings.keys():
                         print(f"- {network_name}")
                         network_names.add(network_name)
-            
-        # Access Docker Network(s):
+        return network_names
+
+    @staticmethod
+    def _find_universe(client: docker.DockerClient, network_names: set[str]) -> set | None:
+        """
+        Lists the containers inside the given networks, or all running containers if no network 
+        names are given.
+
+        Returns:
+            set: set of containers, None if a network could not be accessed
+        """
+        import docker
         universe = set() # set of all container collections known to use
         if network_names:
             try:
@@ -250,108 +249,375 @@ class Scanner():
                     universe = universe | set(galaxy) # add containers from this network to our universe
             except docker.errors.NotFound:
                 print(f"Error: Network {network_name} not found.")
-                return
+                return None
             except docker.errors.APIError as e:
                 print(f"Error accessing network {network_name}: {e}.")
-                return
+                return None
         else: # no networks found, consider all containers as a fallback
             all_containers = client.containers
             assert isinstance(all_containers, docker.models.containers.ContainerCollection)
             universe = set(all_containers.list()) # all running containers are our universe now
+        return universe
+
+    def _build_watchlist(self, universe: set) -> dict:
+        """
+        Filters the universe with the white- and blacklist
 
-        # Build Watchlist:
+        Returns:
+            dict: containers on the watchlist by ID
+        """
         # [INFO] Containers can be part of multiple galaxies as they are part of multiple networks.
-        watchlist = set() # list of all containers to watch (actually a set so no duplicates)
-        for container in universe: # filter for white- and blacklist
-            if not whitelist: # no whitelist, consider all containers in the universe
-                watchlist.add(container)
-            if container.name in whitelist or container.id in whitelist:
-                watchlist.add(container)
-            if container.name in blacklist or container.id in blacklist:
-                watchlist.discard(container)
-        
-        # Display Watchlist:
-        print("Watchlist:")
-        for container in watchlist:
+        return {container.id: container for container in universe if self.filter.accepts(container.name, container.id)}
+
+    @staticmethod
+    def _print_watchlist(endpoint: DockerEndpoint, watchlist: dict):
+        print(f"Watchlist of '{endpoint.name}':")
+        for container in watchlist.values():
             print(f"- {container.name} [{container.id}]")
 
-        if False:
-            try:
-                with open(BUGS_FILE, 'r') as f:
-                    known_bugs = json.load(f)
-            except FileNotFoundError:
-                print(f"Error: Known bugs file '{known_bugs_file}' not found. Exiting.")
-                return
-            except json.JSONDecodeError:
-                print(f"Error: Invalid JSON in known bugs file '{known_bugs_file}'. Exiting.")
-                return
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}. Exiting.")
-                return
+    def _wait(self, seconds: float) -> bool:
+        """
+        Sleeps in steps to react to stop()
 
-        last_scanned = {} # store timestamp when each container was last scanned
+        Returns:
+            bool: False if the scanner was stopped meanwhile
+        """
+        deadline = time.monotonic() + seconds
         while self.loop:
-            # Initialize Iteration:
-            all_findings = {}  # Reset findings for each iteration
-            container_ids = [container.id for container in watchlist] # get IDs of containers in same network
-
-            #TODO: maybe update watchlist every iteration to keep track of (non-)running containers
-
-            for container in watchlist:
-                # Read New Logs:
-                since_time = last_scanned.get(container.id, None)
-                lines = self._get_container_logs(container, since=since_time)
-                if not lines:
-                    continue # no logs, skip to the next container
-
-                # Extract Log Messages:
-                logs = self._extract_logs(lines)
-
-                # Update Last Scanned Timestamp (use timestamp of the *last* log entry)
-                if logs:
-                    last_entry_timestamp = logs[-1]['timestamp']
-                    if last_entry_timestamp: # Only update if not None
-                        last_scanned[container.id] = last_entry_timestamp
-                    #TODO: print(json.dumps(logs, indent=4, default=str))  # Print results as JSON.
-
-            # Wait Before Next Iteration:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, self.POLL_STEP))
+        return False
+
+    def _scan_container(self, endpoint: DockerEndpoint, container, since_time: datetime | None,
+                        log_timeline: TimelineMerge | None, record_timeline: TimelineMerge | None) -> tuple[int, int, datetime | None]:
+        """
+        Reads the new logs of a container and runs them through the ingest pipeline. Runs in a worker
+        thread of the host. Resulting logs and records are handed to the timelines of the stores,
+        which merge them with the entries of the other containers.
+
+        Returns:
+            tuple: number of new lines, number of errors found and timestamp of the newest line
+        """
+        # Start Profiling:
+        # [INFO] While the profiler is armed, the cycle is measured (see profiling.py). Otherwise
+        # the stages are not timed at all.
+        probe = self.profiler.begin() if self.profiler.armed else None
+        stage = probe.stage if probe is not None else no_stage
+        try:
+            # Read New Logs:
+            # [INFO] If the log directory of the Docker daemon is mounted, the json-file log is read
+            # directly from the last byte offset. Otherwise logs are requested through the Docker API
+            # since the last seen timestamp.
+            if endpoint.local and self.log_reader is not None and self.log_reader.available(container.id):
+                since_time = None # exact offsets, no filtering needed
+                with stage("fetch"):
+                    lines = self.log_reader.read(container.id)
+            else:
+                lines = self._get_container_logs(container, since=since_time, stage=stage)
+
+            # Extract Log Messages:
+            with stage("parse"):
+                if since_time is not None: # Docker rounds 'since' to seconds, drop lines seen before
+                    lines = [line for line in lines if (parse_docker_timestamp(line)[0] or since_time) > since_time]
+                newest_timestamp = parse_docker_timestamp(lines[-1])[0] if lines else None
+            with self._ingest_lock:
+                self.pipeline.refresh() # pick up changed settings and known bugs
+                logs, records = self.pipeline.process(lines, source=container.name, host=endpoint.name, probe=probe,
+                                                      container_id=container.id)
+
+                # Store Results:
+                # [INFO] Batches are time ordered per container only. The timelines merge them into
+                # one time ordered stream and append it to the stores (see merge.TimelineMerge).
+                with stage("store"):
+                    source = (endpoint.name, container.id)
+                    if log_timeline is not None:
+                        log_timeline.push(source, logs)
+                    if record_timeline is not None:
+                        record_timeline.push(source, records)
+        finally:
+            if probe is not None:
+                self.profiler.end(probe)
+
+        # Notify About Findings:
+        # [INFO] New records and logs of known bugs are handed over without waiting, the notifier
+        # coalesces and delivers them in its own threads.
+        if self.notifier is not None:
+            self.notifier.submit(serialize(records + [log for log in logs if "bug_id" in log]))
+        num_errors = sum(1 for entry in logs + records if entry["category"] in ("Critical", "Error"))
+        return len(lines), num_errors, newest_timestamp
+
+    def _scan_host(self, endpoint: DockerEndpoint, interval: float, network_name: str | None, limiter: RateLimiter,
+                   log_timeline: TimelineMerge | None, record_timeline: TimelineMerge | None):
+        """
+        Scans the containers of one Docker host until the scanner is stopped. Up to
+        endpoint.concurrency containers are scanned at the same time. If the host fails, it is
+        skipped for an exponentially growing backoff time (see DockerEndpoint).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        import requests
+        CONNECTION_ERRORS = (RuntimeError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+        # Connect To Docker Host:
+        # [INFO] The daemon might be briefly unavailable (e.g. while restarting), keep trying.
+        while True:
             try:
-                time.sleep(interval)
-            except KeyboardInterrupt:
-                print("Bye!")
-                return
+                client = endpoint.client
+                network_names = self._find_networks(client, network_name)
+                universe = self._find_universe(client, network_names)
+                if universe is None:
+                    return
+                endpoint.record_success()
+                break
+            except CONNECTION_ERRORS as e:
+                endpoint.record_failure(e)
+                if not self._wait(endpoint.retry_at - time.monotonic()):
+                    return
+
+        # Schedule Containers:
+        # [INFO] Every container is kept in a priority queue ordered by the time its next scan is due.
+        # Containers producing errors are scanned more often, idle containers back off exponentially.
+        containers = self._build_watchlist(universe)
+        self._print_watchlist(endpoint, containers)
+        scheduler = ScanScheduler(
+            base_interval=interval,
+            min_interval=min(self.MIN_INTERVAL, interval),
+            max_interval=max(self.MAX_INTERVAL, interval),
+        )
+        for container_id in containers:
+            scheduler.add(container_id)
 
-    def run(self, interval: int, network_name: str):
+        last_scanned = {} # store timestamp when each container was last scanned
+        in_flight = {} # container id -> future of its running scan
+        last_universe_check = time.monotonic()
+        filter_generation = self.filter.generation # lists are refreshed by main()
+        with ThreadPoolExecutor(max_workers=endpoint.concurrency, thread_name_prefix=f"scan-{endpoint.name}") as executor:
+            while self.loop:
+                # Collect Finished Scans:
+                for container_id, future in list(in_flight.items()):
+                    if not future.done():
+                        continue
+                    del in_flight[container_id]
+                    try:
+                        num_lines, num_errors, newest_timestamp = future.result()
+                    except CONNECTION_ERRORS as e:
+                        endpoint.record_failure(e)
+                        if container_id in containers: # might have left the watchlist meanwhile
+                            scheduler.report(container_id, num_logs=1, num_errors=0) # retry at base interval
+                        continue
+                    except Exception as e: # one failing container must not stop scanning the host
+                        print(f"Scanning container '{container_id}' on '{endpoint.name}' failed: {e}")
+                        traceback.print_exception(e)
+                        if container_id in containers:
+                            scheduler.report(container_id, num_logs=1, num_errors=0) # retry at base interval
+                        continue
+                    endpoint.record_success()
+                    if newest_timestamp:
+                        last_scanned[container_id] = newest_timestamp
+                    if container_id in containers:
+                        scheduler.report(container_id, num_logs=num_lines, num_errors=num_errors)
+
+                # Back Off From Failed Host:
+                if not endpoint.available():
+                    if not self._wait(min(self.POLL_STEP, endpoint.retry_at - time.monotonic())):
+                        break
+                    continue
+
+                # Re-Evaluate Watchlist:
+                # [INFO] The watchlist is rebuilt if the filter lists changed (new generation) and the
+                # universe is listed again regularly to keep track of (non-)running containers.
+                now = time.monotonic()
+                filter_changed = self.filter.generation != filter_generation
+                filter_generation = self.filter.generation
+                if filter_changed or now - last_universe_check >= self.UNIVERSE_REFRESH:
+                    last_universe_check = now
+                    try:
+                        found = self._find_universe(endpoint.client, network_names)
+                    except CONNECTION_ERRORS as e:
+                        endpoint.record_failure(e)
+                        continue
+                    universe = found if found is not None else universe # keep last known universe on errors
+                    watchlist = self._build_watchlist(universe)
+                    if watchlist.keys() != containers.keys():
+                        self._print_watchlist(endpoint, watchlist)
+                    for container_id in containers.keys() - watchlist.keys():
+                        scheduler.remove(container_id)
+                    for container_id in watchlist.keys() - containers.keys():
+                        if container_id not in in_flight:
+                            scheduler.add(container_id)
+                    containers = watchlist
+
+                # Wait For Next Scan:
+                container_id, wait = scheduler.next_due()
+                if container_id is None or len(in_flight) >= endpoint.concurrency: # nothing to scan or budget used up
+                    wait = self.POLL_STEP if not in_flight else 0.05
+                elif wait <= 0: # container is due
+                    wait = limiter.try_acquire() # global rate limit of Docker API calls
+                if wait > 0:
+                    try:
+                        time.sleep(min(wait, self.POLL_STEP)) # sleep in steps to react to stop()
+                    except KeyboardInterrupt:
+                        print("Bye!")
+                        self.loop = False
+                    continue
+                container_id = scheduler.pop_due()
+                container = containers[container_id]
+                in_flight[container_id] = executor.submit(self._scan_container, endpoint, container,
+                                                          last_scanned.get(container_id), log_timeline, record_timeline)
+
+    def main(self, interval: float = 60, network_name: str = None, api_rate: float = 10.0,
+             log_store: LogStore = None, record_store: LogStore = None, notifier: Notifier = None,
+             reorder_window: float = REORDER_WINDOW):
+        """
+        Runs a loop to read logs from the Docker containers on the watchlist. The watchlist is a list 
+        of Docker containers to read from (names or IDs). The watchlist can be filtered with 
+        the help of a whitelist and a blacklist. If the whitelist ist empty, all containers are 
+        automatically added to the watchlist. Containers on the blacklist are removed from the 
+        watchlist.
+        If a network name is given, only containers inside that network are considered for the 
+        watchlist. Filtering lists apply to containers inside the network. If no network name is given 
+        all containers on the system are considered. 
+        Every configured Docker host is scanned in its own thread (see DockerEndpoint), with its own
+        watchlist, concurrency budget and backoff. Findings are tagged with the name of the host.
+        Each container is scanned on its own schedule: the interval shrinks while a container 
+        produces errors and backs off while it is idle (see ScanScheduler). Calls to the Docker API 
+        are limited to api_rate calls per second over all containers.
+        New logs run through the ingest pipeline, which applies the logging and recording policies 
+        of the settings (see IngestPipeline). Resulting logs and records of all containers are merged
+        into one time ordered timeline per store, entries are held back for reorder_window seconds
+        to wait for the batches of other containers (see TimelineMerge).
+
+        Args:
+            interval (float): base scanning interval in seconds (typical 60 sec)
+            network_name (str): name of a Docker network to scan
+            api_rate (float): maximum number of Docker API calls per second
+            log_store (LogStore): store for logged entries, None to discard them
+            record_store (LogStore): store for new records, None to discard them
+            notifier (Notifier): notifier for new records and known bugs, None to not notify
+            reorder_window (float): time entries are held back to merge them in time order (seconds)
+        """
+        # Type Checking:
+        assert isinstance(interval, (int, float)) and interval > 0
+        assert isinstance(network_name, str) or network_name is None
+        assert isinstance(api_rate, (int, float)) and api_rate > 0
+        assert isinstance(reorder_window, (int, float)) and reorder_window >= 0
+
+        # Read Filter Lists:
+        # [INFO] The lists are compiled into one matcher, which is reloaded while scanning whenever
+        # one of the files changes (e.g. edited through the settings page).
+        self.filter.load() # raises RuntimeError if the lists share items
+
+        # Find Docker Hosts:
+        try:
+            endpoints = self.endpoints
+        except RuntimeWarning as e: # configuration error, retrying does not help
+            print(e)
+            return
+
+        # Remember Existing Records:
+        # [INFO] Errors recorded before a restart are not recorded again (deduplicated by template).
+        if record_store is not None:
+            with self._ingest_lock:
+                self.pipeline.seed(record_store.tail(RECORDED_CAPACITY))
+
+        # Merge Containers Into One Timeline Per Store:
+        self.timelines = {}
+        for name, store in (("logs", log_store), ("records", record_store)):
+            if store is not None:
+                self.timelines[name] = TimelineMerge(lambda entries, store=store: store.append(serialize(entries)),
+                                                     window=reorder_window, name=f"timeline-{name}")
+                self.timelines[name].start()
+
+        # Scan Every Host In Its Own Thread:
+        self.notifier = notifier
+        limiter = RateLimiter(rate=api_rate, burst=max(1, int(api_rate)))
+        threads = []
+        for endpoint in endpoints:
+            thread = threading.Thread(target=self._scan_host, name=f"host-{endpoint.name}",
+                                      args=(endpoint, interval, network_name, limiter,
+                                            self.timelines.get("logs"), self.timelines.get("records")))
+            thread.start()
+            threads.append(thread)
+
+        # Refresh Filter Lists:
+        # [INFO] The lists are checked in this one place for all hosts. Every host rebuilds its
+        # watchlist when the generation of the filter changes.
+        while threads:
+            threads[0].join(timeout=self.FILTER_REFRESH)
+            threads = [thread for thread in threads if thread.is_alive()]
+            if threads and self.loop:
+                self.filter.refresh()
+
+        # Store Held Back Entries:
+        for timeline in self.timelines.values():
+            timeline.stop()
+
+    def run(self, interval: float, network_name: str, log_store: LogStore = None, record_store: LogStore = None,
+            notifier: Notifier = None, reorder_window: float = None):
         """
         Starts a thread in the background that runs the main loop.
 
         Args:
-            interval (int): scanning interval in seconds (typical 60 sec)
+            interval (float): base scanning interval in seconds (typical 60 sec)
             network_name (str): name of a Docker network to scan
+            log_store (LogStore): store for logged entries
+            record_store (LogStore): store for new records
+            notifier (Notifier): notifier for new findings
+            reorder_window (float): time entries are held back to merge them in time order (seconds)
         """
         # Sanity Check (Set Default Arguments):
-        args = {}
-        if isinstance(interval, int):
+        args = {"log_store": log_store, "record_store": record_store, "notifier": notifier}
+        if isinstance(interval, (int, float)) and interval > 0:
             args["interval"] = interval
+        if isinstance(reorder_window, (int, float)) and reorder_window >= 0:
+            args["reorder_window"] = reorder_window
         if isinstance(network_name, str):
             args["network_name"] = network_name
         
         # Start Main Loop:
+        # [INFO] The thread (and the host threads it starts) does not keep the interpreter alive,
+        # so exit handlers run on shutdown and the timelines store their held back entries.
         self.loop = True
-        thread = threading.Thread(target=self.main, kwargs=args)
+        thread = threading.Thread(target=self.main, kwargs=args, daemon=True)
         thread.start()
 
     def stop(self):
         self.loop = False
 
-scanner = Scanner(bugs="files/bugs.json", whitelist="files/Whitelist.txt", blacklist="files/Blacklist.txt")
+    def stats(self) -> dict:
+        """
+        Returns the per-category counters of the ingest pipeline
+        """
+        return self.pipeline.stats()
+
+    def timeline_stats(self) -> dict:
+        """
+        Returns the counters of the timeline of every store (entries received, released, late, ...)
+        """
+        return {name: timeline.stats() for name, timeline in self.timelines.items()}
+
+    def hosts(self) -> list[dict]:
+        """
+        Returns the health status of every Docker host
+        """
+        return [endpoint.status() for endpoint in self.endpoints]
+
+
+@cache
+def get_scanner() -> Scanner:
+    """
+    Returns the scanner of this application. It is created on first use and shared afterwards.
+    """
+    return Scanner(bugs="data/bugs.json", whitelist="data/Whitelist.txt", blacklist="data/Blacklist.txt",
+                   log_dir=os.environ.get("DOCKER_LOG_DIR"))
 
 if __name__ == "__main__":
     # Global Configuration:
     NETWORK_NAME = "lognet"  # Replace with your network name
     INTERVAL = 15  # Check every 60 seconds (adjust as needed)
     try:
-        scanner.main(interval=INTERVAL, network_name=NETWORK_NAME)
+        get_scanner().main(interval=INTERVAL, network_name=NETWORK_NAME)
     except KeyboardInterrupt:
         print("Bye!")
     except InterruptedError:
@@ -0,0 +1,166 @@
+"""
+This module implements the scheduling of container scans. Every container has its own scan
+interval, which adapts to the activity of the container, and all scans share a global rate limit
+for calls to the Docker API.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Hashable
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the number of calls per second. Up to 'burst' calls may happen at once,
+    after that calls are spread out evenly at the given rate.
+
+    Args:
+        rate (float): calls per second
+        burst (int): calls allowed at once
+        clock (callable): returns the current time in seconds (monotonic)
+    """
+    def __init__(self, rate: float = 10.0, burst: int = 10, clock: Callable[[], float] = time.monotonic):
+        assert rate > 0, f"Rate has to be positive. It is {rate}."
+        assert burst >= 1, f"Burst has to be at least 1. It is {burst}."
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available
+
+        Returns:
+            float: 0 if a token was taken, otherwise the time in seconds until the next token is available
+        """
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it
+        """
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class ScanScheduler:
+    """
+    Priority queue of the next due time of every container. The scan interval of a container
+    shrinks while it produces errors and backs off exponentially while it is idle. Due times are
+    given by the clock (default: time.monotonic).
+    """
+    def __init__(self, base_interval: float = 15.0, min_interval: float = 1.0, max_interval: float = 300.0,
+                 speedup: float = 0.5, backoff: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        assert 0 < min_interval <= base_interval <= max_interval, \
+            f"Intervals have to satisfy 0 < min <= base <= max. They are {min_interval}, {base_interval}, {max_interval}."
+        assert 0 < speedup <= 1, f"Speedup factor has to be in (0, 1]. It is {speedup}."
+        assert backoff >= 1, f"Backoff factor has to be at least 1. It is {backoff}."
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.backoff = backoff
+        self.clock = clock
+        self._heap = [] # entries (due, sequence, key), may contain outdated entries
+        self._due = {} # key -> due time of its valid heap entry
+        self._interval = {} # key -> current scan interval in seconds
+        self._counter = itertools.count() # tie breaker, keeps keys from being compared
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def keys(self) -> set:
+        return set(self._due)
+
+    def interval(self, key: Hashable) -> float:
+        return self._interval.get(key, self.base_interval)
+
+    def _push(self, key: Hashable, due: float):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._counter), key))
+
+    def add(self, key: Hashable, due: float | None = None):
+        """
+        Adds a container to the schedule, due immediately if no due time is given
+        """
+        if key in self._due:
+            return
+        self._interval.setdefault(key, self.base_interval)
+        self._push(key, self.clock() if due is None else due)
+
+    def remove(self, key: Hashable):
+        """
+        Removes a container from the schedule. Its heap entry is dropped lazily.
+        """
+        self._due.pop(key, None)
+        self._interval.pop(key, None)
+
+    def _discard_outdated(self):
+        while self._heap:
+            due, _, key = self._heap[0]
+            if self._due.get(key) == due:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> tuple[Hashable | None, float]:
+        """
+        Returns the container that is due next and the time in seconds until it is due
+        (0 if it is already overdue). Returns (None, 0) if the schedule is empty.
+        """
+        self._discard_outdated()
+        if not self._heap:
+            return None, 0.0
+        due, _, key = self._heap[0]
+        return key, max(0.0, due - self.clock())
+
+    def pop_due(self) -> Hashable | None:
+        """
+        Removes and returns the container that is due now. The container has to be rescheduled
+        with report() after it was scanned. Returns None if no container is due.
+        """
+        key, wait = self.next_due()
+        if key is None or wait > 0:
+            return None
+        heapq.heappop(self._heap)
+        del self._due[key]
+        return key
+
+    def report(self, key: Hashable, num_logs: int, num_errors: int) -> float:
+        """
+        Reschedules a container after a scan based on what the scan found:
+            - errors found: interval shrinks by the speedup factor (down to min_interval)
+            - no new logs: interval grows by the backoff factor (up to max_interval)
+            - only regular logs: interval returns to the base interval
+
+        Returns:
+            float: new scan interval of the container in seconds
+        """
+        interval = self._interval.get(key, self.base_interval)
+        if num_errors > 0:
+            interval = max(self.min_interval, interval * self.speedup)
+        elif num_logs == 0:
+            interval = min(self.max_interval, interval * self.backoff)
+        else:
+            interval = self.base_interval
+        self._interval[key] = interval
+        self._push(key, self.clock() + interval)
+        return interval
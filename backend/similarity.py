@@ -0,0 +1,206 @@
+"""
+This module implements a local similarity index over the records (message and solution). Records
+are reduced to sets of word shingles, which are summarized by MinHash signatures and put into the
+buckets of a locality sensitive hash (LSH). A query only compares the records sharing a bucket
+with it (sublinear in the number of records) and ranks them by TF-IDF cosine similarity.
+"""
+# System Imports:
+from collections import Counter
+import json
+import math
+import random
+import re
+import threading
+import zlib
+
+# Local Imports:
+from data import LogStore
+
+
+"""
+Constants
+"""
+BANDS = 20 # LSH bands, records sharing one band of their signatures are compared
+ROWS = 3 # values of a signature per band
+NUM_PERMUTATIONS = BANDS * ROWS # length of a MinHash signature
+PRIME = 4294967291 # largest prime below 2^32, products of 32 bit values fit into 64 bits
+SEED = 1
+TOKEN_REGEX = re.compile(r"[a-z_][a-z0-9_]+") # words, numbers and IDs are left out
+SOLUTION_WEIGHT = 0.5 # weight of the words of a solution compared to the message
+
+
+"""
+Helper Functions
+"""
+def tokenize(text: str) -> list[str]:
+    return TOKEN_REGEX.findall(text.lower())
+
+def shingles(tokens: list[str]) -> set[int]:
+    """
+    Returns the hashed words and word pairs of the given tokens
+    """
+    pairs = (f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    return {zlib.crc32(shingle.encode("utf-8")) for shingle in (*tokens, *pairs)}
+
+_random = random.Random(SEED)
+COEFFICIENTS = [(_random.randrange(1, PRIME), _random.randrange(0, PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+def signature(hashes: set[int]) -> tuple[int, ...]:
+    """
+    Returns the MinHash signature of a set of hashed shingles: for every permutation
+    h(x) = (a*x + b) mod PRIME the smallest value over the set
+    """
+    if not hashes:
+        return (PRIME,) * NUM_PERMUTATIONS
+    return tuple([min([(a * value + b) % PRIME for value in hashes]) for a, b in COEFFICIENTS])
+
+
+class SimilarityIndex:
+    """
+    Index of records, queried for the records most similar to a text. Records are added, updated
+    (same id again) and removed one by one, the index is never rebuilt.
+    """
+    def __init__(self):
+        self.records = {} # record id -> record
+        self.vectors = {} # record id -> term frequencies (Counter)
+        self.signatures = {} # record id -> MinHash signature
+        self.buckets = [{} for _ in range(BANDS)] # per band: band of a signature -> set of record ids
+        self.document_frequency = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _terms(record: dict) -> Counter:
+        terms = Counter(tokenize(record.get("message") or ""))
+        for token, count in Counter(tokenize(record.get("solution") or "")).items():
+            terms[token] += count * SOLUTION_WEIGHT
+        return terms
+
+    @staticmethod
+    def _bands(record_signature: tuple) -> list[tuple]:
+        return [record_signature[band * ROWS:(band + 1) * ROWS] for band in range(BANDS)]
+
+    def _remove(self, record_id: str):
+        if record_id not in self.records:
+            return
+        del self.records[record_id]
+        for band, key in enumerate(self._bands(self.signatures.pop(record_id))):
+            bucket = self.buckets[band][key]
+            bucket.discard(record_id)
+            if not bucket:
+                del self.buckets[band][key]
+        self.document_frequency.subtract(self.vectors.pop(record_id).keys())
+
+    def add(self, record: dict):
+        """
+        Adds the record to the index or updates it if a record with the same id exists
+        """
+        record_id = record["id"]
+        # [INFO] Findings are matched by their message, so only the message is hashed. The words
+        # of the solution only contribute to the ranking.
+        record_signature = signature(shingles(tokenize(record.get("message") or "")))
+        terms = self._terms(record)
+        with self._lock:
+            self._remove(record_id)
+            self.records[record_id] = record
+            self.vectors[record_id] = terms
+            self.signatures[record_id] = record_signature
+            self.document_frequency.update(terms.keys())
+            for band, key in enumerate(self._bands(record_signature)):
+                self.buckets[band].setdefault(key, set()).add(record_id)
+
+    def remove(self, record_id: str):
+        with self._lock:
+            self._remove(record_id)
+
+    def _weights(self, terms: Counter) -> dict[str, float]:
+        """
+        Returns the TF-IDF weights of the given term frequencies (normalized to length 1)
+        """
+        num_records = len(self.records) + 1
+        # [INFO] Terms occurring in every record get a tiny weight instead of 0, so a text consisting
+        # only of common terms still matches records containing them.
+        weights = {term: count * (math.log(num_records / (1 + self.document_frequency[term])) + 1e-6)
+                   for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def query(self, text: str, k: int = 5, exclude: str | None = None) -> list[tuple[float, dict]]:
+        """
+        Returns the k records most similar to the given text. Only records sharing at least one
+        LSH bucket with the text are considered.
+
+        Args:
+            text (str): message of a finding
+            k (int): number of records to return
+            exclude (str): id of a record to leave out (e.g. the record itself)
+
+        Returns:
+            list: (score, record) tuples, most similar first. Scores are cosine similarities (0..1).
+        """
+        tokens = tokenize(text)
+        bands = self._bands(signature(shingles(tokens)))
+        query_terms = Counter(tokens)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(bands):
+                candidates |= self.buckets[band].get(key, set())
+            candidates.discard(exclude)
+            query_weights = self._weights(query_terms)
+            results = []
+            for record_id in candidates:
+                record_weights = self._weights(self.vectors[record_id])
+                score = sum(weight * record_weights.get(term, 0.0) for term, weight in query_weights.items())
+                results.append((round(score, 4), self.records[record_id]))
+        results.sort(key=lambda result: result[0], reverse=True)
+        return results[:k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "records": len(self.records),
+                "terms": sum(1 for count in self.document_frequency.values() if count > 0),
+                "buckets": sum(len(buckets) for buckets in self.buckets),
+            }
+
+
+class RecordIndex(SimilarityIndex):
+    """
+    Similarity index following a record store. Every refresh() reads only the lines appended to
+    the store since the last call; a record stored again (same id) replaces the older version.
+    """
+    def __init__(self, store: LogStore):
+        super().__init__()
+        self.store = store
+        self.offset = 0 # bytes of the store already indexed
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Indexes the records appended to the store
+
+        Returns:
+            int: number of records added or updated
+        """
+        with self._refresh_lock:
+            status = self.store.stat()
+            if status is None:
+                return 0
+            if status.st_size < self.offset: # store was truncated, start over
+                for record_id in list(self.records):
+                    self.remove(record_id)
+                self.offset = 0
+            num_records = 0
+            for line in self.store.scan(self.offset):
+                self.offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("id"):
+                    self.add(record)
+                    num_records += 1
+            return num_records
+
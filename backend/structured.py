@@ -0,0 +1,133 @@
+"""
+This module implements the fast path for structured logs. Many services log one JSON object per
+line. Instead of guessing timestamp and category from the text, the fields are read from the
+object by configurable keys (settings: scanner.structured). Whether a container logs JSON is
+detected from its first non-empty lines (DETECT_LINES) and cached per container.
+"""
+# System Imports:
+from datetime import datetime, timezone
+import json
+
+
+"""
+Constants
+"""
+# Default keys per field, the first key found is used. Dots address nested objects (e.g. log.level).
+FIELD_KEYS = {
+    "level": ["level", "lvl", "severity", "log.level", "levelname", "@l"],
+    "timestamp": ["timestamp", "time", "ts", "@timestamp", "@t", "asctime"],
+    "message": ["message", "msg", "@m", "@mt", "event"],
+    "trace": ["trace_id", "traceId", "trace.id", "dd.trace_id", "traceparent"],
+}
+LEVELS = { # level names -> category (see ingest.CATEGORIES)
+    "critical": "critical", "crit": "critical", "fatal": "critical", "panic": "critical",
+    "emerg": "critical", "emergency": "critical", "alert": "critical",
+    "error": "error", "err": "error", "severe": "error",
+    "warning": "warning", "warn": "warning",
+    "info": "info", "information": "info", "notice": "info",
+    "debug": "debug", "trace": "debug", "verbose": "debug", "fine": "debug",
+}
+NUMERIC_LEVELS = ((60, "critical"), (50, "error"), (40, "warning"), (30, "info"), (0, "debug")) # e.g. pino, bunyan
+DETECT_LINES = 20 # lines inspected to detect the format of a container
+EPOCH_MILLISECONDS = 1e11 # numeric timestamps above are milliseconds, below seconds
+
+
+"""
+Helper Functions
+"""
+def _lookup(payload: dict, keys: list[str]):
+    """
+    Returns the value of the first key present in the payload (None if none is)
+    """
+    for key in keys:
+        value = payload.get(key)
+        if value is None and "." in key:
+            value = payload
+            for part in key.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+def parse_level(value) -> str:
+    """
+    Returns the category of a level given as name (e.g. "WARN") or number (e.g. 50). Unknown levels are "info".
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return next((category for threshold, category in NUMERIC_LEVELS if value >= threshold), "debug") # below 0, NaN
+    if isinstance(value, str):
+        return LEVELS.get(value.strip().lower(), "info")
+    return "info"
+
+def parse_timestamp(value) -> datetime | None:
+    """
+    Returns the timestamp given as ISO 8601 string or UNIX time (seconds or milliseconds). Timestamps
+    without timezone are assumed to be UTC.
+    """
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return datetime.fromtimestamp(value / 1000 if value > EPOCH_MILLISECONDS else value, tz=timezone.utc)
+        if isinstance(value, str):
+            timestamp = datetime.fromisoformat(value.replace("Z", "+00:00").replace(",", ".", 1))
+            return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        pass
+    return None
+
+
+class StructuredFormat:
+    """
+    Reads log entries from JSON objects. The keys of every field are configurable (see FIELD_KEYS).
+
+    Args:
+        keys (dict): keys per field ("level", "timestamp", "message", "trace"), missing fields use the defaults
+    """
+    def __init__(self, keys: dict[str, list[str]] | None = None):
+        keys = keys or {}
+        self.level_keys = list(keys.get("level") or FIELD_KEYS["level"])
+        self.timestamp_keys = list(keys.get("timestamp") or FIELD_KEYS["timestamp"])
+        self.message_keys = list(keys.get("message") or FIELD_KEYS["message"])
+        self.trace_keys = list(keys.get("trace") or FIELD_KEYS["trace"])
+
+    @staticmethod
+    def decode(message: str) -> dict | None:
+        """
+        Returns the JSON object of the message, None if the message is no JSON object
+        """
+        if not message.startswith("{"):
+            return None
+        try:
+            payload = json.loads(message)
+        except (ValueError, RecursionError): # RecursionError: deeply nested objects
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def detect(self, messages: list[str]) -> bool:
+        """
+        Tells if the given messages (without Docker timestamps) are mostly JSON objects
+        """
+        sample = [message for message in messages[:DETECT_LINES] if message.strip()]
+        if not sample:
+            return False
+        num_objects = sum(1 for message in sample if self.decode(message.strip()) is not None)
+        return num_objects * 2 > len(sample)
+
+    def parse(self, message: str) -> tuple[str, datetime | None, str, str | None] | None:
+        """
+        Reads the fields of a structured log line
+
+        Returns:
+            tuple: category, timestamp (None if missing), message and trace id (None if missing).
+                None if the line is no JSON object.
+        """
+        payload = self.decode(message)
+        if payload is None:
+            return None
+        text = _lookup(payload, self.message_keys)
+        trace = _lookup(payload, self.trace_keys)
+        return (
+            parse_level(_lookup(payload, self.level_keys)),
+            parse_timestamp(_lookup(payload, self.timestamp_keys)),
+            message if text is None else str(text), # without message field, keep the whole object
+            None if trace is None else str(trace),
+        )
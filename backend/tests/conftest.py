@@ -0,0 +1,10 @@
+"""
+Shared setup of the tests. The backend modules import each other as top level modules (as when
+running main.py from this directory), so the backend directory is put on the path.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,64 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import backfill
+from data import LogStore
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, "CHECKPOINT_FILE", tmp_path / "backfill.json")
+    return LogStore(str(tmp_path / "logs.jsonl")), LogStore(str(tmp_path / "records.jsonl"))
+
+def write_log(path, messages):
+    with open(path, "w") as file:
+        for second, message in enumerate(messages):
+            file.write(f"2025-01-01T10:00:{second:02d}.000000000Z {message}\n")
+
+def read_records(store):
+    return [json.loads(line)["message"] for line in store.scan()]
+
+def test_records_are_deduplicated_against_store(tmp_path, stores):
+    log_store, record_store = stores
+    record_store.append([{"id": "a" * 32, "timestamp": "2025-01-01T00:00:00+00:00", "category": "Error",
+                          "source": "old", "message": "**ERROR** timeout after 30 s", "solution": None}])
+    path = tmp_path / "service.log"
+    write_log(path, ["**ERROR** timeout after 45 s", "**ERROR** disk full"])
+    backfill.backfill(files=[str(path)], containers=[], workers=1, log_store=log_store, record_store=record_store)
+    assert read_records(record_store) == ["**ERROR** timeout after 30 s", "**ERROR** disk full"]
+
+    # a second run (e.g. with --restart) does not duplicate the records either
+    backfill.backfill(files=[str(path)], containers=[], workers=1, restart=True, log_store=log_store, record_store=record_store)
+    assert len(read_records(record_store)) == 2
+
+def test_resume_with_different_range_is_refused(tmp_path, stores):
+    log_store, record_store = stores
+    path = tmp_path / "service.log"
+    write_log(path, ["**ERROR** disk full"])
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    until = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    checkpoint = {"sources": [f"file:{path}"], "since": since.isoformat(), "until": until.isoformat(),
+                  "tasks": backfill.plan_tasks([str(path)], [], since, until), "done": []}
+    backfill.store_checkpoint(checkpoint)
+    with pytest.raises(RuntimeError):
+        backfill.backfill(files=[str(path)], containers=[], since=since, until=datetime(2025, 1, 3, tzinfo=timezone.utc),
+                          workers=1, log_store=log_store, record_store=record_store)
+    assert backfill.load_checkpoint()["until"] == until.isoformat() # kept for resuming
+
+    # without bounds, the range of the checkpoint is resumed
+    backfill.backfill(files=[str(path)], containers=[], workers=1, log_store=log_store, record_store=record_store)
+    assert backfill.load_checkpoint()["done"] == [task["id"] for task in checkpoint["tasks"]]
+    assert read_records(record_store) == ["**ERROR** disk full"]
+
+def test_ranges_are_appended_in_order(tmp_path, stores, monkeypatch):
+    log_store, record_store = stores
+    plan_tasks = backfill.plan_tasks
+    monkeypatch.setattr(backfill, "plan_tasks", lambda *args: plan_tasks(*args, chunk_size=100)) # many small ranges
+    path = tmp_path / "service.log"
+    messages = [f"**ERROR** failure {chr(97 + index // 26)}{chr(97 + index % 26)}" for index in range(40)]
+    write_log(path, messages)
+    backfill.backfill(files=[str(path)], containers=[], workers=4, log_store=log_store, record_store=record_store)
+    assert len(backfill.load_checkpoint()["tasks"]) > 10
+    assert read_records(record_store) == messages
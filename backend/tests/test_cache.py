@@ -0,0 +1,80 @@
+"""
+Tests of the conditional GET requests (entity tags and "304 Not Modified")
+"""
+import importlib
+import json
+
+import pytest
+from flask import Flask
+
+from api.cache import BOOT_ID, make_etag
+from data import LogStore, SettingsHandler, TXTFileHandler
+
+form_module = importlib.import_module("api.form") # 'api.form' is shadowed by the blueprint
+api_module = importlib.import_module("api")
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    (tmp_path / "settings.json").write_text("{}")
+    settings = SettingsHandler(str(tmp_path / "settings.json")) # absolute, not below data/
+    settings.whitelist = TXTFileHandler(tmp_path / "Whitelist.txt")
+    settings.blacklist = TXTFileHandler(tmp_path / "Blacklist.txt")
+    monkeypatch.setattr(form_module, "get_settings", lambda: settings)
+    return settings
+
+@pytest.fixture
+def client(settings, tmp_path):
+    store = LogStore(str(tmp_path / "logs.jsonl"))
+    store.append([{"id": str(index), "timestamp": "2025-01-01T10:00:00+00:00", "category": "Error", "source": "api",
+                   "message": f"message {index}"} for index in range(5)])
+    app = Flask(__name__)
+    app.register_blueprint(form_module.form)
+    app.add_url_rule("/logs", "logs", lambda: api_module.store_response(store, num_items=40))
+    client = app.test_client()
+    client.store = store
+    return client
+
+def test_make_etag_contains_boot_id():
+    assert make_etag("logs", 3, None) == f"{BOOT_ID}-logs-3-None"
+
+def test_etag_is_stable_across_identical_requests(client):
+    first = client.get("/form/docker-interface")
+    second = client.get("/form/docker-interface")
+    assert first.status_code == second.status_code == 200
+    assert first.headers["ETag"].startswith('W/"')
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+@pytest.mark.parametrize("header", ["{etag}", "{strong}", '"other", {etag}', "*"])
+def test_matching_etag_is_not_modified(client, header):
+    etag = client.get("/form/docker-interface").headers["ETag"]
+    strong = etag.removeprefix("W/") # weak comparison: a strong tag with the same value matches
+    response = client.get("/form/docker-interface", headers={"If-None-Match": header.format(etag=etag, strong=strong)})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+def test_other_etag_is_answered_in_full(client):
+    response = client.get("/form/docker-interface", headers={"If-None-Match": 'W/"other"'})
+    assert response.status_code == 200
+    assert json.loads(response.data)["network"] == ""
+
+def test_settings_post_changes_etag(client, settings):
+    etag = client.get("/form/docker-interface").headers["ETag"]
+    assert client.post("/form/docker-interface", data=json.dumps({"network": "backend"})).status_code == 200
+    response = client.get("/form/docker-interface", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert json.loads(response.data)["network"] == "backend"
+
+def test_store_etag_changes_with_appends_and_queries(client):
+    first = client.get("/logs").headers["ETag"]
+    assert client.get("/logs").headers["ETag"] == first
+    assert client.get("/logs", headers={"If-None-Match": first}).status_code == 304
+    assert client.get("/logs?category=Error").headers["ETag"] != first
+    client.store.append([{"id": "5", "timestamp": "2025-01-01T10:00:01+00:00", "category": "Info", "source": "api", "message": "new"}])
+    response = client.get("/logs", headers={"If-None-Match": first})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first
+    assert len(response.data.decode().splitlines()) == 6
@@ -0,0 +1,55 @@
+"""
+Tests of the range handling of the export endpoints
+"""
+import json
+
+import pytest
+from flask import Flask
+
+from api.export import export_response
+from data import LogStore
+
+
+ITEMS = [{"id": str(number), "category": "Error" if number % 2 else "Info", "message": f"message {number}",
+          "timestamp": "2025-01-01T10:00:00+00:00", "source": "api"} for number in range(20)]
+
+@pytest.fixture
+def client(tmp_path):
+    store = LogStore(str(tmp_path / "logs.jsonl")) # absolute, not below data/
+    store.append(ITEMS)
+    app = Flask(__name__)
+    app.add_url_rule("/export", "export", lambda: export_response(store, "logs"))
+    client = app.test_client()
+    client.content = store.filename.read_bytes()
+    return client
+
+def test_range_of_unfiltered_export(client):
+    etag = client.get("/export").headers["ETag"].strip('"')
+    response = client.get("/export", headers={"Range": "bytes=10-19", "If-Range": f'"{etag}"'})
+    assert response.status_code == 206
+    assert response.data == client.content[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(client.content)}"
+
+def test_range_with_other_etag_sends_everything(client):
+    response = client.get("/export", headers={"Range": "bytes=10-19", "If-Range": '"other"'})
+    assert response.status_code == 200
+    assert response.data == client.content
+
+def test_range_with_if_range_date_sends_everything(client):
+    response = client.get("/export", headers={"Range": "bytes=10-19", "If-Range": "Wed, 01 Jan 2025 10:00:00 GMT"})
+    assert response.status_code == 200
+    assert response.data == client.content
+
+@pytest.mark.parametrize("query", ["?category=Error", "?format=csv"])
+def test_filtered_and_csv_exports_ignore_ranges(client, query):
+    full = client.get("/export" + query)
+    assert full.headers["Accept-Ranges"] == "none"
+    response = client.get("/export" + query, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 200
+    assert response.data == full.data
+    if query == "?category=Error":
+        assert [json.loads(line)["id"] for line in response.data.splitlines()] == [item["id"] for item in ITEMS[1::2]]
+
+def test_unsatisfiable_range(client):
+    response = client.get("/export", headers={"Range": f"bytes={len(client.content) + 10}-"})
+    assert response.status_code == 416
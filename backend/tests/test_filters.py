@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from filters import ContainerFilter, ContainerMatcher
+
+
+@pytest.mark.parametrize("entry, name, expected", [
+    ("app", "app", True),
+    ("app", "app-1", False),
+    ("app-*", "app-1", True),
+    ("app-?-worker", "app-1-worker", True),
+    ("app-?-worker", "app-1-worker-2", False),
+    ("re:worker", "app-worker", False), # entries match the whole name
+    ("re:.*worker", "app-worker", True),
+    ("re:app-(a|b)", "app-a", True),
+    ("re:app-(a|b)", "app-ab", False),
+])
+def test_entries_match_whole_name(entry, name, expected):
+    assert ContainerMatcher({entry}).matches(name) is expected
+
+def test_regex_entries_do_not_affect_each_other():
+    # inline flags and backreferences are only valid within their own entry
+    matcher = ContainerMatcher({"re:(?i)DB-.*", r"re:(\w+)-\1", "cache-*"})
+    assert matcher.matches("db-main")
+    assert matcher.matches("echo-echo")
+    assert not matcher.matches("echo-delta")
+    assert matcher.matches("cache-1")
+
+def test_short_container_id():
+    container_id = "0123456789ab" + "c" * 52
+    assert ContainerMatcher({"0123456789ab"}).matches("other", container_id)
+
+def test_invalid_regex_is_rejected():
+    with pytest.raises(re.error):
+        ContainerMatcher({"re:(unclosed"})
+
+def test_filter_lists(tmp_path):
+    whitelist, blacklist = tmp_path / "white.txt", tmp_path / "black.txt"
+    whitelist.write_text("# comment\napp-*\n")
+    blacklist.write_text("app-debug\n")
+    container_filter = ContainerFilter(str(whitelist), str(blacklist))
+    container_filter.load()
+    assert container_filter.accepts("app-1")
+    assert not container_filter.accepts("app-debug")
+    assert not container_filter.accepts("db")
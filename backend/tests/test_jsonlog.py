@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from jsonlog import JSONFileLogReader, parse_record
+
+FIXTURES = Path(__file__).parent / "fixtures" / "json-file"
+CONTAINER_ID = "c" * 64
+
+
+def record(message: str, stream: str = "stdout", time: str = "2025-01-01T10:00:00.000000000Z") -> str:
+    return json.dumps({"log": message, "stream": stream, "time": time}, separators=(",", ":")) + "\n"
+
+@pytest.fixture
+def log_dir(tmp_path):
+    (tmp_path / CONTAINER_ID).mkdir()
+    return tmp_path
+
+def log_file(log_dir: Path) -> Path:
+    return log_dir / CONTAINER_ID / f"{CONTAINER_ID}-json.log"
+
+def test_parse_record():
+    assert parse_record(record("plain\n").encode()) == ("plain\n", "stdout", "2025-01-01T10:00:00.000000000Z")
+    assert parse_record(record('say "hi"\n', "stderr").encode())[0] == 'say "hi"\n'
+    assert parse_record(b'{"time":"t","log":"reordered\\n"}') == ("reordered\n", "", "t") # slow path
+    assert parse_record(b"not json") is None
+
+def test_fixture_with_split_line(log_dir):
+    shutil.copy(FIXTURES / "split-json.log", log_file(log_dir))
+    lines = JSONFileLogReader(log_dir).read(CONTAINER_ID)
+    assert lines == [
+        "2025-01-01T10:00:00.000000001Z Server started on port 8080",
+        '2025-01-01T10:00:01.000000002Z ERROR: "quoted" value\tand tab',
+        "2025-01-01T10:00:02.500000000Z request handled",
+        "2025-01-01T10:00:02.000000003Z Traceback (most recent call last) part one | part two | ValueError: end of the long line",
+        "2025-01-01T10:00:03.000000006Z Grüße ✓",
+    ]
+
+def test_long_line_split_over_reads(log_dir):
+    reader = JSONFileLogReader(log_dir)
+    path = log_file(log_dir)
+    first, second = "x" * 16384, "y" * 100
+    path.write_text(record(first))
+    assert reader.read(CONTAINER_ID) == []
+    with open(path, "a") as file:
+        file.write(record(second + "\n", time="2025-01-01T10:00:00.000000001Z"))
+    assert reader.read(CONTAINER_ID) == [f"2025-01-01T10:00:00.000000000Z {first}{second}"]
+
+def test_incomplete_record_is_read_later(log_dir):
+    reader = JSONFileLogReader(log_dir)
+    path = log_file(log_dir)
+    line = record("complete\n")
+    path.write_text(record("first\n") + line[:10])
+    assert reader.read(CONTAINER_ID) == ["2025-01-01T10:00:00.000000000Z first"]
+    with open(path, "a") as file:
+        file.write(line[10:])
+    assert reader.read(CONTAINER_ID) == ["2025-01-01T10:00:00.000000000Z complete"]
+    assert reader.read(CONTAINER_ID) == []
+
+def test_rotation(log_dir):
+    reader = JSONFileLogReader(log_dir)
+    path = log_file(log_dir)
+    path.write_text(record("one\n"))
+    assert reader.read(CONTAINER_ID) == ["2025-01-01T10:00:00.000000000Z one"]
+    with open(path, "a") as file: # written before the rotation, not read yet
+        file.write(record("two\n"))
+    os.rename(path, path.with_name(path.name + ".1")) # rotated, inode moves with the file
+    path.write_text(record("three\n"))
+    assert reader.read(CONTAINER_ID) == ["2025-01-01T10:00:00.000000000Z two", "2025-01-01T10:00:00.000000000Z three"]
+    assert reader.read(CONTAINER_ID) == []
+
+def test_truncation(log_dir):
+    reader = JSONFileLogReader(log_dir)
+    path = log_file(log_dir)
+    path.write_text(record("old line\n") + record("another old line\n") + record("unfinished "))
+    assert len(reader.read(CONTAINER_ID)) == 2
+    with open(path, "w") as file: # truncated in place (same inode)
+        file.write(record("new\n"))
+    assert reader.read(CONTAINER_ID) == ["2025-01-01T10:00:00.000000000Z new"]
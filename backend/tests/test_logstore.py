@@ -0,0 +1,78 @@
+"""
+Tests of the log store with a second writer (e.g. the backfill running in another process)
+"""
+import os
+
+import pytest
+
+from data import LogStore
+
+
+def items(start: int, stop: int) -> list[dict]:
+    return [{"id": str(index), "timestamp": f"2025-01-01T10:00:{index:02d}+00:00", "category": "Error",
+             "source": "api", "message": f"message {index}"} for index in range(start, stop)]
+
+def ids(entries: list[dict]) -> list[str]:
+    return [entry["id"] for entry in entries]
+
+def write(path: str, entries: list[dict]) -> str:
+    LogStore(path).append(entries)
+    return path
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "logs.jsonl") # absolute, not below data/
+
+def test_generation_is_stable_without_writes(path):
+    store = LogStore(path)
+    store.append(items(0, 2))
+    generation = store.generation
+    assert store.generation == generation
+    store.tail(10)
+    assert store.generation == generation
+    store.append(items(2, 3))
+    assert store.generation > generation
+
+def test_appends_of_other_processes_are_picked_up(path):
+    server, other = LogStore(path), LogStore(path)
+    server.append(items(0, 3))
+    assert ids(server.tail(10)) == ["0", "1", "2"]
+    generation = server.generation
+    _, cursor = server.since(None)
+
+    other.append(items(3, 5)) # e.g. the backfill
+    assert server.generation > generation
+    assert ids(server.tail(10)) == ["0", "1", "2", "3", "4"]
+    assert ids(server.since(cursor)[0]) == ["3", "4"]
+
+    server.append(items(5, 6)) # own appends still go to the buffer
+    assert ids(server.tail(3)) == ["3", "4", "5"]
+
+def test_partial_line_of_other_writer_waits_until_complete(path):
+    store = LogStore(path)
+    store.append(items(0, 1))
+    store.tail(10)
+    with open(path, "a") as file:
+        file.write('{"id": "1", "message": "half')
+    assert ids(store.tail(10)) == ["0"]
+    generation = store.generation
+    assert store.generation == generation # no change while the line is incomplete
+    with open(path, "a") as file:
+        file.write(' a line"}\n')
+    assert ids(store.tail(10)) == ["0", "1"]
+
+def test_replaced_file_resets_buffer(path):
+    store = LogStore(path)
+    store.append(items(0, 3))
+    _, cursor = store.since(None)
+    os.replace(write(path + ".new", items(10, 12)), path)
+    assert ids(store.tail(10)) == ["10", "11"]
+    assert ids(store.since(cursor)[0]) == ["10", "11"] # cursor of the old file starts over
+
+def test_truncated_file_resets_buffer(path):
+    store = LogStore(path)
+    store.append(items(0, 3))
+    store.tail(10)
+    open(path, "w").close()
+    store.append(items(3, 4))
+    assert ids(store.tail(10)) == ["3"]
@@ -0,0 +1,64 @@
+"""
+Tests of the merge of container batches into one timeline
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from merge import TimelineMerge
+
+
+def entries(*timestamps: datetime, source: str = "") -> list[dict]:
+    return [{"timestamp": timestamp, "message": f"{source}{number}"} for number, timestamp in enumerate(timestamps)]
+
+def merge(window: float) -> tuple[TimelineMerge, list]:
+    released = []
+    return TimelineMerge(released.extend, window=window), released
+
+def test_batches_of_several_sources_are_merged_in_time_order():
+    timeline, released = merge(window=60)
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    timeline.push("a", entries(base, base + timedelta(seconds=2), base + timedelta(seconds=4), source="a"))
+    timeline.push("b", entries(base + timedelta(seconds=1), base + timedelta(seconds=3), source="b"))
+    timeline.push("a", entries(base + timedelta(seconds=1.5), source="late-a")) # overlaps the queue of a
+    timeline.flush(force=True)
+    assert [entry["timestamp"] for entry in released] == sorted(entry["timestamp"] for entry in released)
+    assert len(released) == 6
+    assert timeline.stats()["held"] == 0
+
+def test_entries_older_than_the_watermark_are_released():
+    timeline, released = merge(window=5)
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    timeline.push("a", entries(base, base + timedelta(seconds=10)))
+    timeline.flush()
+    assert [entry["timestamp"] for entry in released] == [base] # the newer entry is within the window
+
+def test_future_entry_does_not_disable_reordering():
+    timeline, released = merge(window=5)
+    now = datetime.now(timezone.utc)
+    timeline.push("wrong-clock", entries(now + timedelta(days=1)))
+    timeline.push("b", entries(now + timedelta(seconds=1)))
+    timeline.push("c", entries(now + timedelta(seconds=0.5))) # late, but within the window
+    timeline.flush()
+    assert released == []
+    timeline.flush(force=True)
+    assert [entry["timestamp"] for entry in released] == [now + timedelta(seconds=0.5), now + timedelta(seconds=1), now + timedelta(days=1)]
+
+def test_expired_batch_releases_older_entries_in_order():
+    timeline, released = merge(window=0.2)
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    timeline.push("a", entries(base + timedelta(seconds=0.1), source="a"))
+    time.sleep(0.25)
+    timeline.push("b", entries(base, source="b")) # older, but arrived just now
+    timeline.flush()
+    assert [entry["message"] for entry in released] == ["b0", "a0"]
+    assert timeline.stats()["late"] == 0
+
+def test_stop_stores_held_entries():
+    timeline, released = merge(window=60)
+    timeline.start()
+    now = datetime.now(timezone.utc)
+    timeline.push("a", entries(now, now + timedelta(seconds=1)))
+    time.sleep(0.3)
+    assert released == [] # held back within the window
+    timeline.stop()
+    assert len(released) == 2
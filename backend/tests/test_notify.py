@@ -0,0 +1,151 @@
+"""
+Tests of the notifier against a stub webhook receiver and a stub SMTP server (both local)
+"""
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from notify import Channel, Notifier, SMTPChannel, WebhookChannel, template
+
+
+def finding(message: str, category: str = "Critical", source: str = "api", **fields) -> dict:
+    return {"category": category, "message": message, "timestamp": "2025-01-01T10:00:00+00:00", "source": source, **fields}
+
+@pytest.fixture
+def webhook():
+    """
+    Webhook receiver collecting the posted payloads. Answers with the status in 'status'.
+    """
+    received = []
+    state = {"status": 204}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(state["status"])
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SimpleNamespace(url=f"http://127.0.0.1:{server.server_address[1]}/", received=received, state=state)
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def smtp_server():
+    """
+    SMTP server speaking just enough of the protocol to accept mails, collects the mail contents
+    """
+    mails = []
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reply = lambda text: self.wfile.write(text.encode() + b"\r\n")
+            reply("220 stub")
+            in_data, lines = False, []
+            for raw in self.rfile:
+                line = raw.decode().rstrip("\r\n")
+                if in_data:
+                    if line == ".":
+                        mails.append("\n".join(lines))
+                        in_data, lines = False, []
+                        reply("250 accepted")
+                    else:
+                        lines.append(line)
+                    continue
+                command = line.split(" ")[0].upper()
+                if command in ("EHLO", "HELO"):
+                    reply("250 stub")
+                elif command == "DATA":
+                    in_data = True
+                    reply("354 go ahead")
+                elif command == "QUIT":
+                    reply("221 bye")
+                    return
+                else:
+                    reply("250 ok")
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1], mails
+    server.shutdown()
+    server.server_close()
+
+
+def test_channel_requires_deliver():
+    with pytest.raises(TypeError):
+        Channel("abstract")
+
+def test_template():
+    assert template("Timeout after 30 s for 'db' at 0xdeadbeef") == "Timeout after <*> s for <*> at <*>"
+    assert template("Crash\n  at line 12") == "Crash"
+
+def test_findings_are_coalesced(webhook, smtp_server):
+    port, mails = smtp_server
+    notifier = Notifier([WebhookChannel("hook", webhook.url, rate=600), SMTPChannel("mail", "127.0.0.1", port, recipients=["ops@example.com"], rate=600)],
+                        window=0.3)
+    notifier.start()
+    notifier.submit([finding(f"Disk {i}% full", source=f"c{i % 2}") for i in range(50)])
+    notifier.submit([finding("Known crash", bug_id=7), finding("Known crash again", bug_id=7)])
+    notifier.submit([finding("Just info", category="Info")]) # not notified
+    time.sleep(0.6)
+    notifier.stop()
+
+    groups = {group["key"]: group for payload in webhook.received for group in payload["groups"]}
+    assert set(groups) == {"Disk <*>% full", "bug 7"}
+    assert groups["Disk <*>% full"]["count"] == 50
+    assert sorted(groups["Disk <*>% full"]["sources"]) == ["c0", "c1"]
+    assert groups["bug 7"]["count"] == 2
+    assert len(mails) == len(webhook.received) >= 1
+    assert "50x" in "\n".join(mails)
+    assert notifier.stats()["received"] == 52
+
+def test_rate_limited_channel_sends_digest(webhook):
+    notifier = Notifier([WebhookChannel("hook", webhook.url, rate=60, burst=1)], window=0.05) # one per second
+    notifier.start()
+    for number in range(3):
+        notifier.submit([finding(f"Problem {chr(ord('a') + number)}")])
+        time.sleep(0.15)
+    time.sleep(1.2)
+    notifier.stop()
+    assert len(webhook.received) == 2 # first group at once, the others in one digest
+    assert len(webhook.received[1]["groups"]) == 2
+    assert webhook.received[1]["subject"].startswith("2 findings in 2 groups")
+
+def test_queue_overflow_is_counted():
+    notifier = Notifier([], queue_size=5) # not started, nothing is taken from the queue
+    notifier.submit([finding(f"Problem {number}") for number in range(8)])
+    stats = notifier.stats()
+    assert (stats["received"], stats["dropped"], stats["queued"]) == (5, 3, 5)
+
+def test_channel_failure_does_not_stop_channel(webhook):
+    webhook.state["status"] = 500
+    channel = WebhookChannel("hook", webhook.url, rate=6000, burst=10)
+    notifier = Notifier([channel], window=0.05)
+    notifier.start()
+    notifier.submit([finding("First problem")])
+    time.sleep(0.3)
+    webhook.state["status"] = 204
+    notifier.submit([finding("Other trouble")])
+    time.sleep(0.3)
+    notifier.stop()
+    assert channel.counters["failed"] == 1
+    assert channel.counters["sent"] == 1
+    assert [payload["groups"][0]["key"] for payload in webhook.received] == ["First problem", "Other trouble"]
+
+def test_unreachable_channel_is_counted():
+    channel = SMTPChannel("mail", "127.0.0.1", 1, recipients=["ops@example.com"], timeout=1)
+    notifier = Notifier([channel], window=0.05)
+    notifier.start()
+    notifier.submit([finding("Problem")])
+    time.sleep(0.5)
+    notifier.stop()
+    assert channel.counters == {"sent": 0, "groups": 0, "failed": 1, "dropped": 0}
@@ -0,0 +1,66 @@
+"""
+Tests of the profiler with cycles running concurrently in several threads
+"""
+import threading
+
+from profiling import Profiler
+
+
+def run_cycles(profiler: Profiler, num_threads: int) -> list:
+    """
+    Runs one cycle per thread, all cycles are inside begin/end at the same time
+    """
+    barrier = threading.Barrier(num_threads, timeout=5)
+    errors = []
+    def cycle():
+        probe = profiler.begin()
+        try:
+            with probe.stage("parse"):
+                barrier.wait() # blocks forever if cycles were serialized
+        except threading.BrokenBarrierError as e:
+            errors.append(e)
+        finally:
+            profiler.end(probe)
+    threads = [threading.Thread(target=cycle) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+def test_cycles_of_several_threads_are_not_serialized():
+    profiler = Profiler()
+    profiler.arm(3, cpu=True)
+    assert run_cycles(profiler, 3) == []
+    session = profiler.status()["session"]
+    assert not profiler.armed
+    assert session["done"] == 3
+    assert 1 <= session["profiled"] <= 3
+    assert session["stages"]["parse"]["total"] > 0
+    assert profiler.pstats_data() is not None
+
+def test_cycles_without_cpu_profiling():
+    profiler = Profiler()
+    profiler.arm(2, cpu=False)
+    assert run_cycles(profiler, 2) == []
+    assert profiler.status()["session"]["profiled"] == 0
+    assert profiler.pstats_data() is None
+
+def test_admin_endpoints_are_disabled_by_default(tmp_path, monkeypatch):
+    import importlib
+    from flask import Flask
+    import data
+    admin_module = importlib.import_module("api.admin") # 'api.admin' is shadowed by the blueprint
+
+    (tmp_path / "settings.json").write_text("{}")
+    settings = data.SettingsHandler(str(tmp_path / "settings.json")) # absolute, not below data/
+    monkeypatch.setattr(admin_module, "get_settings", lambda: settings)
+    app = Flask(__name__)
+    app.register_blueprint(admin_module.admin)
+    client = app.test_client()
+
+    for path in ["/admin/profile", "/admin/profile/pstats", "/admin/profile/memory?format=snapshot"]:
+        assert client.get(path).status_code == 403
+    settings.admin_profiling(True)
+    assert client.get("/admin/profile").status_code == 200
+    assert client.get("/admin/profile/pstats").status_code == 404 # no session yet
@@ -0,0 +1,107 @@
+"""
+Tests of the ring buffer of recent log items
+"""
+import json
+import uuid
+
+import pytest
+
+from data import LogStore
+from ringbuffer import LogRing
+
+
+def item(index: int, **fields) -> dict:
+    entry = {"id": uuid.UUID(int=index).hex, "timestamp": f"2025-01-01T10:{index // 60 % 60:02d}:{index % 60:02d}+00:00",
+             "category": "Error", "source": f"container-{index % 3}", "message": f"message {index}"}
+    entry.update(fields)
+    return {key: value for key, value in entry.items() if value is not ...} # ... removes a field
+
+def ids(entries: list[dict]) -> list[str]:
+    return [entry["id"] for entry in entries]
+
+@pytest.mark.parametrize("entry", [
+    item(1),
+    item(2, host="alpha", bug_id="B-7", solution=None, trace_id="abc"),
+    item(3, id=...), # no id
+    item(4, id=None),
+    item(5, id="4F9A" * 8), # not restored from raw bytes (case)
+    item(6, id="short"),
+    item(7, timestamp="2025-01-01T12:00:00.123456+02:00"), # offset is kept
+    item(8, timestamp="2025-01-01T05:30:00-05:30"),
+    item(9, timestamp="2025-01-01T10:00:00Z"), # other notation, kept as it is
+    item(10, timestamp="2025-01-01T10:00:00"), # no timezone
+    item(11, timestamp="2025-01-01T10:00:00+00:00:30"), # offset with seconds
+    item(12, timestamp=None),
+    item(13, timestamp=...),
+    item(14, category="Fatal"),
+    item(15, category=...),
+    item(16, category=None),
+    item(17, source=...),
+    item(18, source=None, host=None),
+    item(19, message=...),
+    item(20, message=None),
+    {"message": "only a message"},
+])
+def test_items_round_trip(entry):
+    ring = LogRing(4)
+    ring.extend([entry])
+    assert ring.tail(1) == [entry]
+
+def test_wrap_around_keeps_the_newest_items():
+    ring = LogRing(5)
+    ring.extend([item(index) for index in range(12)])
+    assert len(ring) == 5
+    assert ring.sequence == 12
+    assert ring.tail() == [item(index) for index in range(7, 12)]
+    assert ring.tail(2) == [item(10), item(11)]
+    assert ring.tail(100) == ring.tail()
+
+def test_since_cursor_across_overwrite():
+    ring = LogRing(5)
+    ring.extend([item(index) for index in range(3)])
+    entries, cursor = ring.since(0)
+    assert entries == [item(0), item(1), item(2)] and cursor == 3
+    ring.extend([item(index) for index in range(3, 10)]) # items 3 and 4 are overwritten before being read
+    entries, cursor = ring.since(cursor)
+    assert entries == [item(index) for index in range(5, 10)] and cursor == 10
+    assert ring.since(cursor) == ([], 10)
+
+def test_since_with_limit_and_without_cursor():
+    ring = LogRing(10)
+    ring.extend([item(index) for index in range(8)])
+    entries, cursor = ring.since(2, limit=3)
+    assert ids(entries) == ids([item(2), item(3), item(4)]) and cursor == 5
+    entries, cursor = ring.since(None, limit=2) # new tail starts with the last items
+    assert ids(entries) == ids([item(6), item(7)]) and cursor == 8
+    assert ring.since(50) == ([item(index) for index in range(8)], 8) # cursor of an earlier process
+
+def test_names_are_reclaimed_when_overwritten():
+    ring = LogRing(3)
+    ring.extend([item(index, source=f"source-{index}", host="alpha") for index in range(100)])
+    assert ring.memory_usage()["names_used"] == 4 # 3 sources and 1 host
+    assert len(ring._names) <= 6 # free indices are reused
+    assert [entry["source"] for entry in ring.tail()] == ["source-97", "source-98", "source-99"]
+
+def test_tail_matches_store_file_order(tmp_path):
+    store = LogStore(str(tmp_path / "logs.jsonl"))
+    store.buffer = LogRing(50)
+    entries = [item(index, timestamp=f"2025-01-01T10:00:{59 - index % 60:02d}+01:00") for index in range(80)] # not in time order
+    for start in range(0, 80, 7):
+        store.append(entries[start:start + 7])
+    in_file = [json.loads(line) for line in store.scan()]
+    assert store.tail(50) == in_file[-50:] == entries[-50:]
+    restarted = LogStore(str(tmp_path / "logs.jsonl")) # primed from the file
+    restarted.buffer = LogRing(50)
+    assert restarted.tail(50) == in_file[-50:]
+
+def test_memory_usage():
+    ring = LogRing(100)
+    empty = ring.memory_usage()
+    assert empty["items"] == 0 and empty["capacity"] == 100 and empty["distinct_messages"] == 0
+    ring.extend([item(index, message="same message " + "x" * 1000) for index in range(100)])
+    usage = ring.memory_usage()
+    assert usage["items"] == 100
+    assert usage["distinct_messages"] == 1 # repeating messages share one interned string
+    assert usage["ids"] == 100 * 16
+    assert usage["total"] == sum(usage[part] for part in ("arrays", "ids", "messages", "extras", "names"))
+    assert 1000 < usage["messages"] < 2 * 1000 # counted once, not 100 times
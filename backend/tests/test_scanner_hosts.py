@@ -0,0 +1,153 @@
+"""
+Scans fake Docker hosts (no daemon needed): one healthy host and one failing with connection
+errors, to check that hosts are isolated from each other.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from hosts import DockerEndpoint
+from ingest import IngestPipeline
+from scanner import Scanner
+
+
+class FakeContainer:
+    def __init__(self, name: str, host: "FakeEndpoint"):
+        self.id = f"{host.name}-{name}".ljust(64, "0")
+        self.name = name
+        self.host = host
+
+    def logs(self, stream=False, timestamps=True, since=None):
+        if self.host.down:
+            raise requests.exceptions.ConnectionError(f"{self.host.name} is down")
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f000Z")
+        return f"{timestamp} **ERROR** failure in {self.name}\n".encode()
+
+class FakeEndpoint(DockerEndpoint):
+    def __init__(self, name: str, containers: list[str], down: bool = False):
+        super().__init__(f"tcp://{name}:2375", name=name)
+        self.down = down
+        self.containers = [FakeContainer(container, self) for container in containers]
+
+    @property
+    def client(self):
+        if self.down:
+            raise RuntimeError(f"Could not initialize the docker client for '{self.name}'")
+        return SimpleNamespace(networks=SimpleNamespace(get=lambda name: SimpleNamespace(containers=self.containers)))
+
+class ListStore:
+    def __init__(self):
+        self.items = []
+        self._lock = threading.Lock()
+
+    def append(self, items):
+        with self._lock:
+            self.items.extend(items)
+
+    def tail(self, num=None):
+        return []
+
+    def count(self, **fields) -> int:
+        with self._lock:
+            return sum(1 for item in self.items if all(item.get(key) == value for key, value in fields.items()))
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    """
+    Runs a scanner over the given endpoints in the background, stopped after the test
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "white.txt").write_text("")
+    (tmp_path / "black.txt").write_text("")
+    running = []
+
+    def start(endpoints: list[FakeEndpoint]) -> tuple[Scanner, ListStore]:
+        scanner = Scanner(bugs=str(tmp_path / "bugs.json"), whitelist=str(tmp_path / "white.txt"),
+                          blacklist=str(tmp_path / "black.txt"), endpoints=endpoints)
+        scanner.FILTER_REFRESH = 0.1
+        scanner.POLL_STEP = 0.1
+        log_store = ListStore()
+        thread = threading.Thread(target=scanner.main, kwargs={"interval": 0.1, "network_name": "net", "api_rate": 1000,
+                                                               "log_store": log_store, "reorder_window": 0})
+        thread.start()
+        running.append((scanner, thread))
+        return scanner, log_store
+
+    yield start
+    for scanner, thread in running:
+        scanner.stop()
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_healthy_host_keeps_scanning_while_other_is_down(scan):
+    healthy = FakeEndpoint("alpha", ["api"])
+    failing = FakeEndpoint("beta", ["db"], down=True)
+    scanner, store = scan([healthy, failing])
+
+    assert wait_for(lambda: store.count(host="alpha") >= 3)
+    first = store.count(host="alpha")
+    assert wait_for(lambda: store.count(host="alpha") > first) # still scanning
+    assert store.count(host="beta") == 0
+    assert failing.failures >= 1
+    assert [host["healthy"] for host in scanner.hosts()] == [True, False]
+
+    # Recovery: scanned again once its backoff expired
+    failing.down = False
+    assert wait_for(lambda: store.count(host="beta") >= 1, timeout=10)
+    assert failing.healthy
+
+def test_host_failing_while_scanning_backs_off(scan):
+    healthy = FakeEndpoint("alpha", ["api"])
+    flaky = FakeEndpoint("beta", ["db"])
+    scanner, store = scan([healthy, flaky])
+    assert wait_for(lambda: store.count(host="beta") >= 1)
+
+    flaky.down = True # connection errors while fetching logs
+    assert wait_for(lambda: flaky.failures >= 1)
+    before = store.count(host="alpha")
+    assert wait_for(lambda: store.count(host="alpha") > before)
+
+    flaky.down = False
+    after = store.count(host="beta")
+    assert wait_for(lambda: store.count(host="beta") > after, timeout=10)
+
+def test_failing_container_does_not_stop_host(scan, monkeypatch):
+    process = IngestPipeline.process
+    def broken_process(self, lines, source, *args, **kwargs):
+        if source == "broken":
+            raise ValueError("cannot parse")
+        return process(self, lines, source, *args, **kwargs)
+    monkeypatch.setattr(IngestPipeline, "process", broken_process)
+
+    _, store = scan([FakeEndpoint("alpha", ["broken", "api"])])
+    assert wait_for(lambda: store.count(source="api") >= 3)
+    first = store.count(source="api")
+    assert wait_for(lambda: store.count(source="api") > first)
+
+def test_filter_change_reaches_all_hosts(scan, tmp_path):
+    scanner, store = scan([FakeEndpoint("alpha", ["api", "db"]), FakeEndpoint("beta", ["api", "db"])])
+    assert wait_for(lambda: store.count(host="alpha", source="db") and store.count(host="beta", source="db"))
+
+    (tmp_path / "black.txt").write_text("db\n")
+    generation = scanner.filter.generation
+    assert wait_for(lambda: scanner.filter.generation > generation)
+    time.sleep(0.5) # scans in flight finish
+    before = {host: store.count(host=host, source="db") for host in ("alpha", "beta")}
+    time.sleep(0.5)
+    assert {host: store.count(host=host, source="db") for host in ("alpha", "beta")} == before
+    api = store.count(source="api")
+    assert wait_for(lambda: store.count(source="api") > api)
@@ -0,0 +1,110 @@
+"""
+Tests of the scan schedule and the rate limit, driven by a manual clock
+"""
+import pytest
+
+from scheduler import RateLimiter, ScanScheduler
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def test_containers_are_popped_in_due_order(clock):
+    scheduler = ScanScheduler(base_interval=15, clock=clock)
+    scheduler.add("b", due=clock() + 2)
+    scheduler.add("a") # due now
+    scheduler.add("c", due=clock() + 1)
+    assert scheduler.next_due() == ("a", 0.0)
+    assert scheduler.pop_due() == "a"
+    assert scheduler.pop_due() is None # "c" is due in 1 second
+    assert scheduler.next_due() == ("c", 1.0)
+    clock.advance(5)
+    assert [scheduler.pop_due(), scheduler.pop_due(), scheduler.pop_due()] == ["c", "b", None]
+    assert len(scheduler) == 0
+    assert scheduler.next_due() == (None, 0.0)
+
+def test_adding_a_scheduled_container_keeps_its_due_time(clock):
+    scheduler = ScanScheduler(clock=clock)
+    scheduler.add("a", due=clock() + 10)
+    scheduler.add("a") # already scheduled, not due now
+    assert scheduler.next_due() == ("a", 10.0)
+
+def test_removed_container_is_dropped_lazily(clock):
+    scheduler = ScanScheduler(clock=clock)
+    scheduler.add("a")
+    scheduler.add("b", due=clock() + 1)
+    scheduler.remove("a")
+    assert "a" not in scheduler and scheduler.keys() == {"b"}
+    assert len(scheduler._heap) == 2 # entry of "a" is still in the heap
+    assert scheduler.next_due() == ("b", 1.0)
+    assert len(scheduler._heap) == 1
+
+def test_rescheduled_container_ignores_outdated_entry(clock):
+    scheduler = ScanScheduler(base_interval=15, clock=clock)
+    scheduler.add("a", due=clock() + 1)
+    scheduler.remove("a")
+    scheduler.add("a", due=clock() + 20) # the entry due in 1 second is outdated
+    clock.advance(2)
+    assert scheduler.pop_due() is None
+    assert scheduler.next_due() == ("a", 18.0)
+
+def test_errors_speed_up_scans_down_to_the_minimum(clock):
+    scheduler = ScanScheduler(base_interval=15, min_interval=1, max_interval=300, clock=clock)
+    scheduler.add("a")
+    intervals = [scheduler.report("a", num_logs=10, num_errors=1) for _ in range(6)]
+    assert intervals == [7.5, 3.75, 1.875, 1.0, 1.0, 1.0]
+    assert scheduler.next_due() == ("a", 1.0)
+
+def test_idle_containers_back_off_up_to_the_maximum(clock):
+    scheduler = ScanScheduler(base_interval=15, min_interval=1, max_interval=300, clock=clock)
+    intervals = [scheduler.report("a", num_logs=0, num_errors=0) for _ in range(6)]
+    assert intervals == [30, 60, 120, 240, 300, 300]
+    assert scheduler.interval("a") == 300
+
+def test_regular_logs_reset_the_interval(clock):
+    scheduler = ScanScheduler(base_interval=15, clock=clock)
+    scheduler.report("a", num_logs=0, num_errors=0)
+    scheduler.report("b", num_logs=5, num_errors=2)
+    assert scheduler.report("a", num_logs=3, num_errors=0) == 15
+    assert scheduler.report("b", num_logs=3, num_errors=0) == 15
+
+def test_report_schedules_the_next_scan(clock):
+    scheduler = ScanScheduler(base_interval=15, clock=clock)
+    scheduler.add("a")
+    assert scheduler.pop_due() == "a"
+    assert "a" not in scheduler # in flight
+    scheduler.report("a", num_logs=0, num_errors=0)
+    assert scheduler.next_due() == ("a", 30.0)
+    clock.advance(30)
+    assert scheduler.pop_due() == "a"
+
+def test_rate_limiter_allows_a_burst(clock):
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire() == pytest.approx(0.5) # next token in 1/rate seconds
+
+def test_rate_limiter_refills_at_the_rate(clock):
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    for _ in range(3):
+        limiter.try_acquire()
+    clock.advance(0.25)
+    assert limiter.try_acquire() == pytest.approx(0.25) # half a token refilled
+    clock.advance(0.25)
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+def test_rate_limiter_refill_is_capped_at_the_burst(clock):
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    clock.advance(3600)
+    assert [limiter.try_acquire() for _ in range(4)][-1] == pytest.approx(0.5)
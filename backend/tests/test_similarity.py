@@ -0,0 +1,123 @@
+"""
+Tests of the similarity index of the records and the endpoints of similar records
+"""
+import importlib
+import json
+
+import pytest
+from flask import Flask
+
+from data import LogStore
+from similarity import RecordIndex, SimilarityIndex
+
+api_module = importlib.import_module("api")
+
+
+def record(record_id: str, message: str, solution: str = "") -> dict:
+    return {"id": record_id, "timestamp": "2025-01-01T10:00:00+00:00", "category": "Error", "source": "api",
+            "message": message, "solution": solution}
+
+RECORDS = [
+    record("disk", "write failed: no space left on device /var/lib/data", "Free up disk space."),
+    record("disk-tmp", "write failed: no space left on device /tmp", "Clean up the temporary files."),
+    record("disk-other", "write failed: permission denied on device /var/lib/data"),
+    record("database", "connection to database refused by host db", "Start the database."),
+    record("timeout", "request timed out after waiting for upstream"),
+]
+
+@pytest.fixture
+def store(tmp_path):
+    store = LogStore(str(tmp_path / "records.jsonl"))
+    store.append(RECORDS[:3])
+    return store
+
+def ranking(results: list[tuple[float, dict]]) -> list[str]:
+    return [entry["id"] for _, entry in results]
+
+def test_refresh_reads_only_appended_records(store):
+    index = RecordIndex(store)
+    assert index.refresh() == 3
+    assert index.offset == store.stat().st_size
+    assert index.refresh() == 0 # nothing appended
+    store.append(RECORDS[3:])
+    offset = index.offset
+    assert index.refresh() == 2
+    assert index.offset > offset
+    assert sorted(index.records) == sorted(entry["id"] for entry in RECORDS)
+
+def test_refresh_skips_incomplete_and_invalid_lines(store):
+    index = RecordIndex(store)
+    index.refresh()
+    with open(store.filename, "ab") as file:
+        file.write(b"not json\n" + json.dumps({"message": "without id"}).encode() + b"\n")
+        file.write(json.dumps(RECORDS[3]).encode()) # line still being written
+    assert index.refresh() == 0
+    with open(store.filename, "ab") as file:
+        file.write(b"\n")
+    assert index.refresh() == 1
+    assert "database" in index.records
+
+def test_record_stored_again_replaces_the_older_version(store):
+    index = RecordIndex(store)
+    index.refresh()
+    store.append([record("disk", "connection to database refused by host db", "Restart it.")])
+    assert index.refresh() == 1
+    assert len(index) == 3
+    assert index.records["disk"]["solution"] == "Restart it."
+    assert "disk" not in ranking(index.query("write failed: no space left on device /tmp"))
+    assert ranking(index.query("connection to database refused by host db"))[0] == "disk"
+
+def test_removed_record_leaves_no_trace():
+    index = SimilarityIndex()
+    for entry in RECORDS:
+        index.add(entry)
+    stats = index.stats()
+    index.add(record("extra", "completely unrelated words appear here"))
+    index.remove("extra")
+    assert index.stats() == stats
+    assert index.query("completely unrelated words appear here") == []
+    index.remove("unknown") # ignored
+
+def test_truncated_store_starts_over(store):
+    index = RecordIndex(store)
+    index.refresh()
+    store.filename.write_text(json.dumps(RECORDS[4]) + "\n")
+    assert index.refresh() == 1
+    assert list(index.records) == ["timeout"]
+    assert index.stats()["records"] == 1
+
+def test_query_ranks_most_similar_first():
+    index = SimilarityIndex()
+    for entry in RECORDS:
+        index.add(entry)
+    results = index.query("write failed: no space left on device /var/lib/data", k=3)
+    assert ranking(results)[:2] == ["disk", "disk-tmp"]
+    scores = [score for score, _ in results]
+    assert scores == sorted(scores, reverse=True) and 0 < scores[-1] <= scores[0] <= 1
+    assert ranking(index.query("write failed: no space left on device /var/lib/data", exclude="disk"))[0] == "disk-tmp"
+
+@pytest.fixture
+def client(store, monkeypatch):
+    store.append(RECORDS[3:])
+    monkeypatch.setattr(api_module, "record_index", RecordIndex(store))
+    app = Flask(__name__)
+    app.register_blueprint(api_module.api)
+    return app.test_client()
+
+def test_similar_records_endpoint(client):
+    response = client.get("/api/records/disk/similar?k=2")
+    assert response.status_code == 200
+    similar = json.loads(response.data)
+    assert [entry["id"] for entry in similar] == ["disk-tmp", "disk-other"]
+    assert similar[0]["score"] >= similar[1]["score"]
+    assert similar[0]["solution"] == "Clean up the temporary files."
+    assert response.headers["Cache-Control"] == "no-cache"
+
+def test_similar_records_endpoint_errors(client):
+    assert client.get("/api/records/unknown/similar").status_code == 404
+    assert client.get("/api/records/disk/similar?k=abc").status_code == 400
+    assert client.get("/api/records/similar").status_code == 400
+
+def test_similar_records_by_message(client):
+    response = client.get("/api/records/similar", query_string={"message": "connection to database refused by host postgres", "k": 1})
+    assert [entry["id"] for entry in json.loads(response.data)] == ["database"]
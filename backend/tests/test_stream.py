@@ -0,0 +1,99 @@
+"""
+Tests of the encoding and compression of streamed responses
+"""
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask, Response, request
+
+from api import stream
+from api.stream import BATCH_SIZE, batch_items, compress_chunks, negotiate_encoding, parse_int_arg
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/items")
+    def items():
+        num = parse_int_arg(request.args, "num", default=3)
+        fmt = stream.negotiate_format(request.args)
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        chunks = stream.stream_items(({"id": str(index)} for index in range(num)), fmt, encoding)
+        return Response(chunks, mimetype=stream.FORMATS[fmt], headers=stream.stream_headers(fmt, encoding))
+
+    return app.test_client()
+
+@pytest.mark.parametrize("query", ["num=abc", "num=-1", "num=1.5"])
+def test_invalid_integer_is_bad_request(client, query):
+    response = client.get(f"/items?{query}")
+    assert response.status_code == 400
+    assert b"num" in response.data
+
+def test_missing_integer_uses_default(client):
+    response = client.get("/items?num=")
+    assert response.data.decode().splitlines() == ['{"id":"0"}', '{"id":"1"}', '{"id":"2"}']
+
+def test_unknown_format_is_bad_request(client):
+    assert client.get("/items?format=xml").status_code == 400
+
+def test_msgpack_without_package_is_not_acceptable(client, monkeypatch):
+    monkeypatch.setattr(stream, "msgpack", None)
+    assert client.get("/items?format=msgpack").status_code == 406
+
+def test_columnar_format(client):
+    response = client.get("/items?format=columnar")
+    assert json.loads(response.data) == {"columns": ["id"], "rows": [["0"], ["1"], ["2"]]}
+    assert response.headers["X-Content-Format"] == "columnar"
+
+@pytest.mark.parametrize("accept_encoding, brotli_installed, encoding", [
+    (None, True, None),
+    ("", True, None),
+    ("gzip", True, "gzip"),
+    ("br, gzip", True, "br"),
+    ("br, gzip", False, "gzip"), # brotli missing: fall back to gzip
+    ("br", False, None),
+    ("*", False, "gzip"),
+    ("*", True, "br"),
+    ("gzip;q=0, br", False, None), # refused explicitly
+    ("gzip; q=0.5", False, "gzip"),
+    ("GZIP;q=abc", False, None), # invalid quality value
+    ("identity", True, None),
+])
+def test_negotiate_encoding(monkeypatch, accept_encoding, brotli_installed, encoding):
+    monkeypatch.setattr(stream, "brotli", object() if brotli_installed else None)
+    assert negotiate_encoding(accept_encoding) == encoding
+
+@pytest.mark.parametrize("num_items, sizes", [
+    (0, []),
+    (1, [1]),
+    (BATCH_SIZE - 1, [BATCH_SIZE - 1]),
+    (BATCH_SIZE, [BATCH_SIZE]),
+    (BATCH_SIZE + 1, [BATCH_SIZE, 1]),
+    (2 * BATCH_SIZE, [BATCH_SIZE, BATCH_SIZE]),
+])
+def test_batch_boundaries(num_items, sizes):
+    batches = list(batch_items(range(num_items)))
+    assert [len(batch) for batch in batches] == sizes
+    assert [item for batch in batches for item in batch] == list(range(num_items))
+
+def test_gzip_chunks_are_decodable_while_streaming():
+    chunks = [b"first line\n", b"", b"second line\n"]
+    compressed = list(compress_chunks(iter(chunks), "gzip"))
+    # [INFO] After Z_SYNC_FLUSH everything sent so far can be decoded, before the stream ends.
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(compressed[0]) == b"first line\n"
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+
+def test_gzip_response(client):
+    response = client.get(f"/items?num={BATCH_SIZE + 10}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert len(lines) == BATCH_SIZE + 10
+    assert json.loads(lines[-1]) == {"id": str(BATCH_SIZE + 9)}
+
+def test_uncompressed_chunks_skip_empty():
+    assert list(compress_chunks(iter([b"a", b"", b"b"]), None)) == [b"a", b"b"]
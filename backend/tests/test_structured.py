@@ -0,0 +1,96 @@
+"""
+Table tests of the structured (JSON) log fields and of the format detection per container
+"""
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from data import SettingsHandler
+from ingest import IngestPipeline
+from structured import DETECT_LINES, StructuredFormat, _lookup, parse_level, parse_timestamp
+
+
+@pytest.mark.parametrize("value, category", [
+    ("error", "error"), ("ERROR", "error"), (" Warn ", "warning"), ("fatal", "critical"),
+    ("information", "info"), ("trace", "debug"), ("unknown", "info"), ("", "info"),
+    (60, "critical"), (50, "error"), (40, "warning"), (30, "info"), (20, "debug"), (10, "debug"), # pino, bunyan
+    (55.5, "error"), (-1, "debug"), (float("nan"), "debug"), (True, "info"), (False, "info"), (None, "info"), (["error"], "info"),
+])
+def test_parse_level(value, category):
+    assert parse_level(value) == category
+
+UTC = timezone.utc
+
+@pytest.mark.parametrize("value, timestamp", [
+    ("2025-01-02T03:04:05Z", datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)),
+    ("2025-01-02T03:04:05.123Z", datetime(2025, 1, 2, 3, 4, 5, 123000, tzinfo=UTC)),
+    ("2025-01-02 03:04:05,123", datetime(2025, 1, 2, 3, 4, 5, 123000, tzinfo=UTC)), # Python logging (asctime)
+    ("2025-01-02T05:04:05+02:00", datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)),
+    ("2025-01-02T03:04:05", datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)), # no timezone: UTC
+    (1735787045, datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)), # seconds
+    (1735787045.5, datetime(2025, 1, 2, 3, 4, 5, 500000, tzinfo=UTC)),
+    (1735787045123, datetime(2025, 1, 2, 3, 4, 5, 123000, tzinfo=UTC)), # milliseconds
+    (10**20, None), (-10**20, None), (float("nan"), None), # overflow, invalid
+    ("yesterday", None), ("", None), (True, None), (None, None),
+])
+def test_parse_timestamp(value, timestamp):
+    assert parse_timestamp(value) == timestamp
+
+@pytest.mark.parametrize("payload, keys, value", [
+    ({"level": "info"}, ["level"], "info"),
+    ({"lvl": "warn", "level": "info"}, ["level", "lvl"], "info"), # first key found wins
+    ({"log": {"level": "error"}}, ["log.level"], "error"), # nested
+    ({"log.level": "debug", "log": {"level": "error"}}, ["log.level"], "debug"), # literal key first
+    ({"log": "error"}, ["log.level"], None), # not an object
+    ({"a": {"b": {"c": 1}}}, ["a.b.c"], 1),
+    ({"a": {"b": None}}, ["a.b", "x"], None),
+    ({"level": 0}, ["level"], 0), # falsy values are values
+])
+def test_lookup(payload, keys, value):
+    assert _lookup(payload, keys) == value
+
+@pytest.mark.parametrize("messages, structured", [
+    (['{"level": "info", "msg": "a"}'] * 3, True),
+    (['{"msg": "a"}', "starting...", '{"msg": "b"}'], True), # mostly JSON
+    (['{"msg": "a"}', "starting...", "listening"], False),
+    (["[1, 2]", '"text"', "{not json"], False), # only objects count
+    (["", "   ", '{"msg": "a"}'], True), # empty lines are ignored
+    ([], False),
+])
+def test_detect(messages, structured):
+    assert StructuredFormat().detect(messages) is structured
+
+def test_parse_with_configured_keys():
+    structured = StructuredFormat({"message": ["text"], "trace": ["span.trace"]})
+    line = json.dumps({"level": 50, "time": 1735787045123, "text": "failed", "span": {"trace": 42}})
+    assert structured.parse(line) == ("error", datetime(2025, 1, 2, 3, 4, 5, 123000, tzinfo=UTC), "failed", "42")
+    assert structured.parse("plain text") is None
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    (tmp_path / "settings.json").write_text(json.dumps({"scanner": {"logging": ["critical", "error", "warning", "info", "debug"]}}))
+    return IngestPipeline(SettingsHandler(str(tmp_path / "settings.json"))) # absolute, not below data/
+
+def json_lines(number: int) -> list[str]:
+    return [f'2025-01-02T03:04:05.{index:09d}Z {{"level": "error", "msg": "request {index} failed"}}' for index in range(number)]
+
+def text_lines(number: int) -> list[str]:
+    return [f"2025-01-02T03:04:05.{index:09d}Z starting worker {index}" for index in range(number)]
+
+def test_detection_waits_for_enough_lines(pipeline):
+    pipeline.process(text_lines(2) + ["2025-01-02T03:04:05.000000009Z "], source="api", container_id="1")
+    assert pipeline.formats[(None, "api")]["structured"] is None # 2 non-empty lines are not enough
+    logs, _ = pipeline.process(json_lines(DETECT_LINES), source="api", container_id="1")
+    assert pipeline.formats[(None, "api")]["structured"] is True
+    assert logs[0]["message"] == "request 0 failed" # judged by the lines seen so far (mostly JSON)
+
+def test_detection_is_redone_for_new_container(pipeline):
+    pipeline.process(text_lines(DETECT_LINES), source="api", container_id="1")
+    assert pipeline.formats[(None, "api")]["structured"] is False
+    pipeline.process(json_lines(1), source="api", container_id="1")
+    assert pipeline.formats[(None, "api")]["structured"] is False # locked in
+    logs, _ = pipeline.process(json_lines(DETECT_LINES), source="api", container_id="2") # recreated container
+    assert pipeline.formats[(None, "api")]["structured"] is True
+    assert logs[0]["message"] == "request 0 failed"
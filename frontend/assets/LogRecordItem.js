@@ -161,12 +161,13 @@ export class LogRecordItem {
     /**
      * Tells if the given string is a date or datetime in ISO format. Valid is either the short
      * format (only date, YYYY-MM-DD), standard format (date and time, YYYY-MM-DDThh:mm:ss) or the
-     * long format (with milliseconds, YYYY-MM-DDThh:mm:ss.zzz).
+     * long format (with milliseconds, YYYY-MM-DDThh:mm:ss.zzz). Date and time may be followed by a
+     * timezone designator (Z or +hh:mm).
      * @param {String} str String to check
      * @returns 'true' if the string is a valid format
      */
     #isValidDatetimeString(str) {
-        const ISO_FORMAT = /^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2}(?:\.\d+)?)?$/;
+        const ISO_FORMAT = /^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)?$/;
         return ISO_FORMAT.test(str);
     }
 }
\ No newline at end of file
@@ -1,7 +1,10 @@
 // React Components:
+import { useFetchData } from '../hooks/useFetchData';
 
 // Material Components:
 import 'mdui/components/button-icon.js';
+import 'mdui/components/list.js';
+import 'mdui/components/list-item.js';
 import 'mdui/components/top-app-bar.js';
 import 'mdui/components/top-app-bar-title.js';
 
@@ -9,6 +12,37 @@ import 'mdui/components/top-app-bar-title.js';
 import ZeroMd from 'zero-md';
 customElements.define('zero-md', ZeroMd);
 
+const NUM_SIMILAR = 5; // similar records shown
+
+/**
+ * Lists the existing records most similar to the message of the given item (e.g. to find the
+ * solution of a new error). The item itself is left out if it is a record.
+ * @param {Object} log item whose message is compared
+ */
+function SimilarRecords({ log }) {
+    const query = new URLSearchParams({ message: log.message, exclude: log.id, k: NUM_SIMILAR });
+    const { data:similar } = useFetchData(`/api/records/similar?${query}`);
+    if(!similar || similar.length === 0) { return null; }
+    return (
+        <>
+            <mdui-divider></mdui-divider>
+            <h4>Similar Records:</h4>
+            <mdui-list>
+                {similar.map(record => (
+                    <mdui-list-item key={record.id} headline-line={1} description-line={1} rounded>
+                        <div>
+                            {record.message}
+                        </div>
+                        <div slot='description'>
+                            {Math.round(record.score * 100)}% similar{record.solution ? " · solved" : ""}
+                        </div>
+                    </mdui-list-item>
+                ))}
+            </mdui-list>
+        </>
+    );
+}
+
 function DetailsView({ top, log }) {
     return (
         <>
@@ -56,6 +90,7 @@ function DetailsView({ top, log }) {
                     </>
                     )}
                 </div>
+                {log.message && <SimilarRecords log={log} />}
             </div>
         </>
     );
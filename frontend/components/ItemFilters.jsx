@@ -24,7 +24,11 @@ function ItemFilters({items, updateFilteredItems}) {
         searchQuery: '',
         startDatetime: new Date(0),
         endDatetime: new Date(),
+        startAuto: true, // start follows the oldest item until the user picks a date
+        endAuto: true, // end follows the newest item until the user picks a date
     });
+    const filterCacheRef = useRef({ items: [], predicate: null, filteredItems: [] }); // result of the last filtering
+    const boundsRef = useRef({ items: [], min: Infinity, max: -Infinity }); // time range of the items
 
     ///////////////////////////////////////////////////////////////////////////////////////////////
     // Helper Functions:
@@ -46,32 +50,32 @@ function ItemFilters({items, updateFilteredItems}) {
         setFilters(prev => ({ ...prev, [key]: value }));
     }
 
-    function applyFilters() {
-        return items.filter(item => {
-            console.assert(item instanceof LogRecordItem, "'item' has to be of type 'LogRecordItem'");
-
-            // Check Category:
-            if (!filters.categories.includes(item.category)) {
-                return false;
-            }
-
-            // Check Text Search Query:
-            if (!item.search(filters.searchQuery)) {
-                return false;
-            }
-
-            // Check Datetime Range:
-            const start = filters.startDatetime.getTime();
-            const end = filters.endDatetime.getTime();
-            const current = item.timestamp;
-            if(!((start <= current) && (current <= end))) {
-                return false;
-            }
+    /**
+     * Tells if 'items' consists of 'previous' with new items appended (the stream hook only appends)
+     */
+    function isAppended(items, previous) {
+        if(previous.length === 0 || items.length < previous.length) {
+            return previous.length === 0;
+        }
+        return items[previous.length - 1] === previous[previous.length - 1] && items[0] === previous[0];
+    }
 
-            return true;
-        });
+    function applyFilters(predicate) {
+        // Filter Incrementally:
+        // [INFO] If only new items were appended and the filters did not change, only the new items
+        // have to be checked. Otherwise all items are filtered again.
+        const cache = filterCacheRef.current;
+        let filteredItems;
+        if(cache.predicate === predicate && isAppended(items, cache.items)) {
+            const newItems = items.slice(cache.items.length).filter(predicate);
+            filteredItems = newItems.length > 0 ? cache.filteredItems.concat(newItems) : cache.filteredItems;
+        } else {
+            filteredItems = items.filter(predicate);
+        }
+        filterCacheRef.current = { items: items, predicate: predicate, filteredItems: filteredItems };
+        return filteredItems;
     }
-    
+
     // Handler For Search Input:
     function updateSearchQuery() {
         const query = textSearchRef.current.value;
@@ -129,7 +133,7 @@ function ItemFilters({items, updateFilteredItems}) {
                 newDate.setFullYear(confirmedDateObj.getFullYear());
                 newDate.setMonth(confirmedDateObj.getMonth());
                 newDate.setDate(confirmedDateObj.getDate());
-                const newFilters = { ...prevFilters, startDatetime:newDate }
+                const newFilters = { ...prevFilters, startDatetime:newDate, startAuto:false }
                 return newFilters;
             }
             setFilters(updateFilterDate);
@@ -144,7 +148,7 @@ function ItemFilters({items, updateFilteredItems}) {
                 newDate.setMinutes(confirmedDateObj.getMinutes());
                 newDate.setSeconds(confirmedDateObj.getSeconds());
                 newDate.setMilliseconds(confirmedDateObj.getMilliseconds());
-                const newFilters = { ...prevFilters, startDatetime:newDate }
+                const newFilters = { ...prevFilters, startDatetime:newDate, startAuto:false }
                 return newFilters;
             }
             setFilters(updateFilterDate);
@@ -158,7 +162,7 @@ function ItemFilters({items, updateFilteredItems}) {
                 newDate.setFullYear(confirmedDateObj.getFullYear());
                 newDate.setMonth(confirmedDateObj.getMonth());
                 newDate.setDate(confirmedDateObj.getDate());
-                const newFilters = { ...prevFilters, endDatetime:newDate }
+                const newFilters = { ...prevFilters, endDatetime:newDate, endAuto:false }
                 return newFilters;
             }
             setFilters(updateFilterDate);
@@ -173,7 +177,7 @@ function ItemFilters({items, updateFilteredItems}) {
                 newDate.setMinutes(confirmedDateObj.getMinutes());
                 newDate.setSeconds(confirmedDateObj.getSeconds());
                 newDate.setMilliseconds(confirmedDateObj.getMilliseconds());
-                const newFilters = { ...prevFilters, endDatetime:newDate }
+                const newFilters = { ...prevFilters, endDatetime:newDate, endAuto:false }
                 return newFilters;
             }
             setFilters(updateFilterDate);
@@ -204,13 +208,27 @@ function ItemFilters({items, updateFilteredItems}) {
     }, []);
 
     // Update Datetime Filter on New Items:
+    // [INFO] The time range of the items is updated with the appended items only. Ends of the
+    // range the user did not pick follow the items.
     useEffect(() => {
+        let { min, max } = boundsRef.current;
+        const appended = isAppended(items, boundsRef.current.items);
+        if(!appended) {
+            min = Infinity;
+            max = -Infinity;
+        }
+        for(let index = appended ? boundsRef.current.items.length : 0; index < items.length; index++) {
+            const timestamp = items[index].timestamp;
+            if(timestamp < min) { min = timestamp; }
+            if(timestamp > max) { max = timestamp; }
+        }
+        boundsRef.current = { items: items, min: min, max: max };
         if(items.length > 0) {
-            const timestamps = items.map(item => item.timestamp);
-            const initStartDate = new Date(Math.min(...timestamps));
-            const initEndDate = new Date(Math.max(...timestamps));
-            updateFilter("startDatetime", new Date(initStartDate));
-            updateFilter("endDatetime", new Date(initEndDate));
+            setFilters(prev => ({
+                ...prev,
+                startDatetime: prev.startAuto ? new Date(min) : prev.startDatetime,
+                endDatetime: prev.endAuto ? new Date(max) : prev.endDatetime,
+            }));
         }
     }, [items]);
 
@@ -246,11 +264,42 @@ function ItemFilters({items, updateFilteredItems}) {
         }
     },[filters.endDatetime]);
 
+    // Filter Predicate:
+    // [INFO] Ends of the time range following the items do not exclude any item, so they are not
+    // part of the predicate. The predicate only changes if the user changes a filter.
+    const rangeStart = filters.startAuto ? -Infinity : filters.startDatetime.getTime();
+    const rangeEnd = filters.endAuto ? Infinity : filters.endDatetime.getTime();
+    const predicate = useMemo(() => {
+        const categories = new Set(filters.categories);
+        const query = filters.searchQuery;
+        return (item) => {
+            console.assert(item instanceof LogRecordItem, "'item' has to be of type 'LogRecordItem'");
+
+            // Check Category:
+            if (!categories.has(item.category)) {
+                return false;
+            }
+
+            // Check Datetime Range:
+            const current = item.timestamp;
+            if(!((rangeStart <= current) && (current <= rangeEnd))) {
+                return false;
+            }
+
+            // Check Text Search Query:
+            if (!item.search(query)) {
+                return false;
+            }
+
+            return true;
+        };
+    }, [filters.categories, filters.searchQuery, rangeStart, rangeEnd]);
+
     // Update Filtered Items:
     useEffect(() => {
-        const filteredItems = applyFilters();
-        updateFilteredItems(filteredItems);
-    }, [items, filters]);
+        const filteredItems = applyFilters(predicate);
+        updateFilteredItems(filteredItems); // same array if nothing new passed, no re-render then
+    }, [items, predicate]);
 
     return(
         <>
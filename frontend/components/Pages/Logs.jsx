@@ -5,6 +5,7 @@ import RecordForm from '../RecordForm';
 import LogItemView from '../LogItemView.jsx';
 import DetailsView from '../DetailsView';
 import TopBar from '../TopBar';
+import VirtualList from '../VirtualList.jsx';
 
 // Material Components:
 import 'mdui/components/button.js';
@@ -99,9 +100,7 @@ function Logs() {
     );
 
     const ListPane = filteredItems.length > 0 ? (
-        <mdui-list>
-            {filteredItems.map(item => (<LogItemView key={item.id} log={item} onClick={showDetails} isSelected={item === selectedItem} />))}
-        </mdui-list>
+        <VirtualList items={filteredItems} renderItem={item => (<LogItemView key={item.id} log={item} onClick={showDetails} isSelected={item === selectedItem} />)} />
     ) : (
         <div style={{alignItems:'center', display:'flex', justifyContent:'center', margin:'auto'}}>
             <mdui-button-icon icon="search_off" variant="standard"></mdui-button-icon>
@@ -8,6 +8,7 @@ import RecordItemView from '../RecordItemView';
 import RecordForm from '../RecordForm.jsx';
 import TopBar from '../TopBar';
 import HorizontalRow from '../HorizontalRow.jsx';
+import VirtualList from '../VirtualList.jsx';
 
 // Material Components:
 import 'mdui/components/button-icon.js';
@@ -102,9 +103,7 @@ function Records() {
     );
 
     const ListPane = filteredItems.length > 0 ? (
-        <mdui-list>
-            {filteredItems.map(item => (<RecordItemView key={item.id} log={item} onClick={showDetails} isSelected={item === selectedItem} />))}
-        </mdui-list>
+        <VirtualList items={filteredItems} renderItem={item => (<RecordItemView key={item.id} log={item} onClick={showDetails} isSelected={item === selectedItem} />)} />
     ) : (
         <div style={{alignItems:'center', display:'flex', justifyContent:'center', margin:'auto'}}>
             <mdui-button-icon icon="search_off" variant="standard"></mdui-button-icon>
@@ -0,0 +1,88 @@
+// React Components:
+import { useEffect, useLayoutEffect, useRef, useState } from 'react';
+
+// Material Components:
+import 'mdui/components/list.js';
+
+const DEFAULT_ITEM_HEIGHT = 73; // two-line list item with divider (px)
+const OVERSCAN = 8; // items rendered above and below the visible area
+
+/**
+ * List that only renders the items inside the visible area (plus a few above and below). All
+ * items are expected to have the same height, which is measured from the first rendered item.
+ * @param {Array} items all items of the list
+ * @param {function} renderItem returns the element of an item
+ * @param {number} itemHeight estimated height of an item in pixels (until measured)
+ */
+function VirtualList({ items, renderItem, itemHeight = DEFAULT_ITEM_HEIGHT }) {
+    const scrollerRef = useRef(null);
+    const listRef = useRef(null);
+    const frameRef = useRef(null);
+    const [scrollTop, setScrollTop] = useState(0);
+    const [viewportHeight, setViewportHeight] = useState(0);
+    const [rowHeight, setRowHeight] = useState(itemHeight);
+
+    ///////////////////////////////////////////////////////////////////////////////////////////////
+    // Helper Functions:
+    ///////////////////////////////////////////////////////////////////////////////////////////////
+
+    // Handler For Scroll Events (at most one update per frame):
+    function onScroll() {
+        if(frameRef.current !== null) { return; }
+        frameRef.current = requestAnimationFrame(() => {
+            frameRef.current = null;
+            if(scrollerRef.current) {
+                setScrollTop(scrollerRef.current.scrollTop);
+            }
+        });
+    }
+
+    ///////////////////////////////////////////////////////////////////////////////////////////////
+    // Hooks:
+    ///////////////////////////////////////////////////////////////////////////////////////////////
+    // Track Viewport Height:
+    useEffect(() => {
+        const scroller = scrollerRef.current;
+        if(!scroller) { return; }
+        const observer = new ResizeObserver(() => setViewportHeight(scroller.clientHeight));
+        observer.observe(scroller);
+        setViewportHeight(scroller.clientHeight);
+        return () => {
+            observer.disconnect();
+            if(frameRef.current !== null) {
+                cancelAnimationFrame(frameRef.current);
+            }
+        };
+    }, []);
+
+    // Measure Item Height:
+    useLayoutEffect(() => {
+        const list = listRef.current;
+        if(!list || list.children.length < 2) { return; }
+        // [INFO] Every item consists of a divider and a list item, measure the distance between
+        // the first two dividers to include margins.
+        const first = list.children[0].getBoundingClientRect().top;
+        const second = list.children[2] ? list.children[2].getBoundingClientRect().top : null;
+        const measured = second !== null ? second - first : list.getBoundingClientRect().height;
+        if(measured > 0 && Math.abs(measured - rowHeight) >= 1) {
+            setRowHeight(measured);
+        }
+    });
+
+    // Visible Range:
+    const start = Math.max(0, Math.floor(scrollTop / rowHeight) - OVERSCAN);
+    const end = Math.min(items.length, Math.ceil((scrollTop + viewportHeight) / rowHeight) + OVERSCAN);
+    const visibleItems = items.slice(start, end);
+
+    return(
+        <div ref={scrollerRef} onScroll={onScroll} style={{height:"100%", overflowY:"auto"}}>
+            <div style={{height:`${items.length * rowHeight}px`, position:"relative"}}>
+                <mdui-list ref={listRef} style={{left:0, position:"absolute", right:0, top:`${start * rowHeight}px`}}>
+                    {visibleItems.map(renderItem)}
+                </mdui-list>
+            </div>
+        </div>
+    );
+}
+
+export default VirtualList;
@@ -1,10 +1,14 @@
 // React Imports:
-import { useState, useEffect, useMemo, useCallback } from 'react';
+import { useState, useEffect, useMemo, useCallback, useRef } from 'react';
 import { LogRecordItem } from "../assets/LogRecordItem.js";
 
 // Material Components:
 import { snackbar } from 'mdui/functions/snackbar.js';
 
+// Validators (ETag) and data of the last successful response per endpoint. Used to send
+// conditional requests, which the server answers with "304 Not Modified" if nothing changed.
+const responseCache = new Map();
+
 function printMessage(msg, delay = 0) {
     snackbar({
         message: msg,
@@ -25,13 +29,23 @@ export function useFetchData(endpoint) {
     async function fetchData() {
         try {
             setIsLoading(true); // enable loading animation
-            const response = await fetch(endpoint, { method: "GET" });
+            const cached = responseCache.get(endpoint);
+            const headers = cached ? { "If-None-Match": cached.etag } : {};
+            const response = await fetch(endpoint, { method: "GET", headers: headers, cache: "no-store" });
+            if(response.status === 304 && cached) {
+                setData(cached.data); // not modified, reuse data of last response
+                return;
+            }
             if(!response.ok) {
                 const text = await response.text();
                 printMessage(`Failed to fetch data: [${response.status} ${response.statusText}] ${text}`);
                 return;
             }
             const parsed = await response.json();
+            const etag = response.headers.get("ETag");
+            if(etag) {
+                responseCache.set(endpoint, { etag: etag, data: parsed });
+            }
             setData(parsed);
         } catch(error) {
             if(error instanceof SyntaxError) {
@@ -62,54 +76,105 @@ export function useFetchData(endpoint) {
 }
 
 /**
- * Custom hook to fetch data from the given endpoint as a continously updating stream
+ * Custom hook to fetch data from the given endpoint as a continously updating stream. Parsed items
+ * are collected and applied in one batch per animation frame, so the component re-renders at most
+ * once per frame instead of once per item.
  * @param {String} endpoint path to fetch from
  * @returns {{isLoading: boolean, data: Array | null, refetchData: function}}
  */
 export function useFetchDataStream(endpoint) {
     const [data, setData] = useState([]);
     const [isLoading, setIsLoading] = useState(false);
+    const pendingRef = useRef([]); // parsed items not yet applied to the state
+    const frameRef = useRef(null); // requested animation frame, null if none
+
+    /**
+     * Appends all pending items to the data in one state update
+     */
+    function flushPending() {
+        if(frameRef.current !== null) {
+            cancelAnimationFrame(frameRef.current);
+            frameRef.current = null;
+        }
+        const batch = pendingRef.current;
+        if(batch.length === 0) { return; }
+        pendingRef.current = [];
+        setData(prevData => prevData.concat(batch));
+    }
+
+    /**
+     * Queues an item and schedules the next flush (once per animation frame)
+     */
+    function enqueue(item) {
+        pendingRef.current.push(item);
+        if(frameRef.current === null) {
+            frameRef.current = requestAnimationFrame(() => {
+                frameRef.current = null;
+                flushPending();
+            });
+        }
+    }
 
     async function fetchData() {
         try {
             setIsLoading(true); // enable loading animation
             
             // Fetch Data:
-            const response = await fetch(endpoint);
+            const cached = responseCache.get(endpoint);
+            const headers = cached ? { "If-None-Match": cached.etag } : {};
+            const response = await fetch(endpoint, { headers: headers, cache: "no-store" });
+            if(response.status === 304 && cached) {
+                setData(cached.data); // not modified, reuse items of last response
+                return;
+            }
             if(!response.ok) {
                 const text = await response.text();
                 printMessage(`Failed to fetch data [${response.status} ${response.statusText}] ${text}`);
                 return;
             }
             const reader = response.body.getReader()// decode bytes to text chungs
+            const decoder = new TextDecoder();
+            pendingRef.current = []; // drop items of a previous request
             setData([]); // clear current data after successful request
 
             // Read Incoming Stream:
             let buffer = ''; // byte buffer to accumulate chunks
+            const received = []; // all items of this response
             while(true) {
                 // const { done, value } = await reader.read();
                 let { value, done } = await Promise.race([
                     reader.read(),
                     new Promise((_, reject) => setTimeout(reject, 10000, new Error("Timeout: Did not receive any data.")))
                 ]); // timeout of the response breaks
-                buffer += new TextDecoder().decode(value);
+                buffer += decoder.decode(value, { stream: !done });
+                let lineStart = 0;
                 let newlineIndex;
-                while((newlineIndex = buffer.indexOf('\n')) !== -1) {
-                    const line = buffer.substring(0, newlineIndex);
-                    buffer = buffer.substring(newlineIndex + 1); // advance buffer past the line (including the newline character)
+                while((newlineIndex = buffer.indexOf('\n', lineStart)) !== -1) {
+                    const line = buffer.substring(lineStart, newlineIndex);
+                    lineStart = newlineIndex + 1; // advance past the line (including the newline character)
                     let trimmed = line.trim() // remove whitespaces
                     if(!trimmed) { continue; } // skip loop on empty line 
                     try {
                         const jsonObject = JSON.parse(trimmed);
                         const item = new LogRecordItem(jsonObject);
-                        setData(prevData => [...prevData, item]);
+                        received.push(item);
+                        enqueue(item);
                     } catch(e) {
                         console.warn(`Error parsing JSON "${trimmed}": ${e}`);
                     }
                 }
+                buffer = buffer.substring(lineStart); // keep incomplete line
                 if(done) { break; }
             }
+            flushPending(); // apply the last items without waiting for the next frame
+
+            // Remember Validator:
+            const etag = response.headers.get("ETag");
+            if(etag) {
+                responseCache.set(endpoint, { etag: etag, data: received });
+            }
         } catch(error) {
+            flushPending();
             printMessage(`${error} Failed fetch data.`);
         } finally {
             // Disable Loading Animation:
@@ -124,6 +189,17 @@ export function useFetchDataStream(endpoint) {
         fetchData();
     }, [endpoint]);
 
+    /**
+     * Cancel a scheduled flush when unmounting
+     */
+    useEffect(() => {
+        return () => {
+            if(frameRef.current !== null) {
+                cancelAnimationFrame(frameRef.current);
+            }
+        };
+    }, []);
+
     /**
      * Callback function to fetch data manually
      */